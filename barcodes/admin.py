@@ -1,7 +1,25 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
-from .models import Campaign, CampaignBarcode, UserBarcode
+from .telemetry import campaign_forecast, telemetry_setting
+from .models import (
+    BarcodeRedemption, Campaign, CampaignBarcode, CampaignBarcodeStats, PendingUserBarcode, UserBarcode,
+    UserBarcodeHistory,
+)
+
+
+def barcode_preview_html(barcode_code, width, height):
+    """Önizleme görüntüsü - dosya yerine istek anında üretilen SVG"""
+    return format_html(
+        '<img src="{}" width="{}" height="{}" style="border: 1px solid #ddd;" />',
+        reverse('barcodes:barcode_image', args=[barcode_code, 'svg']),
+        width,
+        height
+    )
 
 @admin.register(Campaign)
 class CampaignAdmin(admin.ModelAdmin):
@@ -18,84 +36,188 @@ class CampaignAdmin(admin.ModelAdmin):
             'fields': ('start_date', 'end_date')
         }),
         ('Durum', {
-            'fields': ('is_active',)
+            'fields': ('is_active', 'released_barcode_policy')
+        }),
+        ('Havuz Tüketimi', {
+            'fields': ('pool_telemetry',)
         }),
     )
     
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'pool_telemetry')
+    
+    def get_queryset(self, request):
+        # Sayaçları satır başına COUNT yerine tek sorguda sayaç tablosundan al
+        stats = CampaignBarcodeStats.objects.filter(campaign_code=OuterRef('campaign_code'))
+        return super().get_queryset(request).annotate(
+            stats_total=Subquery(stats.values('total')[:1]),
+            stats_assigned=Subquery(stats.values('assigned')[:1]),
+        )
     
     def barcode_count(self, obj):
-        count = CampaignBarcode.objects.filter(campaign_code=obj.campaign_code).count()
-        return f"{count} adet"
+        return f"{obj.stats_total or 0} adet"
     barcode_count.short_description = 'Toplam Barkod'
+    barcode_count.admin_order_field = 'stats_total'
     
     def assigned_count(self, obj):
-        count = CampaignBarcode.objects.filter(campaign_code=obj.campaign_code, is_assigned=True).count()
-        return f"{count} adet"
+        return f"{obj.stats_assigned or 0} adet"
     assigned_count.short_description = 'Atanan Barkod'
+    assigned_count.admin_order_field = 'stats_assigned'
+    
+    def pool_telemetry(self, obj):
+        if not obj.pk:
+            return "Kampanya kaydedildikten sonra görüntülenir"
+        data = campaign_forecast([obj.campaign_code]).get(obj.campaign_code)
+        if data is None:
+            return "Bu kampanya için henüz barkod yok"
+        if data['minutes_left'] is None:
+            forecast = 'Son pencerede atama yok'
+        elif data['minutes_left'] == 0:
+            forecast = 'Havuz tükendi!'
+        else:
+            forecast = f"~{data['minutes_left']:.0f} dk ({timezone.localtime(data['exhausts_at']):%d.%m.%Y %H:%M})"
+        return format_html(
+            '<table>'
+            '<tr><th>Müsait / Toplam</th><td>{} / {}</td></tr>'
+            '<tr><th>Atama hızı ({} dk)</th><td>{} / dk (son {} dk: {} / dk)</td></tr>'
+            '<tr><th>Atama süresi</th><td>ort. {} ms, en fazla {} ms</td></tr>'
+            '<tr><th>Barkod bulunamayan</th><td>{}</td></tr>'
+            '<tr><th>Tükenme tahmini</th><td><strong>{}</strong></td></tr>'
+            '</table>',
+            data['available'], data['total'],
+            data['window_minutes'], data['rate_per_minute'],
+            telemetry_setting('SHORT_WINDOW_MINUTES'), data['rate_per_minute_short'],
+            data['latency_ms_avg'] if data['latency_ms_avg'] is not None else '-',
+            data['latency_ms_max'] if data['latency_ms_max'] is not None else '-',
+            data['failed'],
+            forecast
+        )
+    pool_telemetry.short_description = 'Tüketim ve Tükenme Tahmini'
 
 @admin.register(CampaignBarcode)
 class CampaignBarcodeAdmin(admin.ModelAdmin):
-    list_display = ('barcode_code', 'barcode_name', 'campaign_code', 'is_assigned', 'is_active', 'barcode_preview', 'created_at')
-    list_filter = ('campaign_code', 'is_assigned', 'is_active', 'created_at')
+    list_display = ('barcode_code', 'barcode_name', 'campaign', 'is_assigned', 'is_active', 'barcode_preview', 'created_at')
+    list_filter = ('campaign', 'is_assigned', 'is_active', 'created_at')
+    list_select_related = ('campaign',)
     search_fields = ('barcode_code', 'barcode_name', 'campaign_code')
     ordering = ('-created_at',)
     
     fieldsets = (
         ('Barkod Bilgileri', {
-            'fields': ('barcode_code', 'barcode_name', 'campaign_code')
+            'fields': ('barcode_code', 'barcode_name', 'campaign')
         }),
         ('Barkod Görüntüsü', {
             'fields': ('barcode_image', 'barcode_preview_large')
         }),
         ('Durum', {
-            'fields': ('is_assigned', 'is_active')
+            'fields': ('is_assigned', 'is_active', 'lease_owner', 'leased_until')
         }),
     )
     
-    readonly_fields = ('barcode_preview_large', 'created_at', 'updated_at')
+    readonly_fields = ('barcode_preview_large', 'lease_owner', 'leased_until', 'created_at', 'updated_at')
     
     def barcode_preview(self, obj):
-        if obj.barcode_image:
-            return format_html(
-                '<img src="{}" width="80" height="30" style="border: 1px solid #ddd;" />',
-                obj.barcode_image.url
-            )
-        return "Görüntü Yok"
+        return barcode_preview_html(obj.barcode_code, 80, 30)
     barcode_preview.short_description = 'Önizleme'
     
     def barcode_preview_large(self, obj):
-        if obj.barcode_image:
-            return format_html(
-                '<img src="{}" width="300" height="100" style="border: 1px solid #ddd;" />',
-                obj.barcode_image.url
-            )
-        return "Görüntü Yok"
+        if not obj.pk:
+            return "Görüntü Yok"
+        return barcode_preview_html(obj.barcode_code, 300, 100)
     barcode_preview_large.short_description = 'Barkod Görüntüsü'
     
-    actions = ['regenerate_barcode_images', 'mark_as_unassigned']
+    actions = ['regenerate_barcode_images', 'mark_as_unassigned', 'deactivate_barcodes', 'activate_barcodes']
+    
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            campaign_codes = set()
+            if change and 'campaign' in form.changed_data:
+                campaign_codes.update(
+                    CampaignBarcode.objects.filter(pk=obj.pk).values_list('campaign_code', flat=True)
+                )
+            super().save_model(request, obj, form, change)
+            campaign_codes.add(obj.campaign_code)
+            for campaign_code in campaign_codes:
+                CampaignBarcodeStats.rebuild(campaign_code)
+    
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            CampaignBarcodeStats.rebuild(obj.campaign_code)
+    
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            campaign_codes = set(queryset.values_list('campaign_code', flat=True))
+            super().delete_queryset(request, queryset)
+            for campaign_code in campaign_codes:
+                CampaignBarcodeStats.rebuild(campaign_code)
     
     def regenerate_barcode_images(self, request, queryset):
-        updated = 0
-        for barcode in queryset:
-            if barcode.generate_barcode_image():
-                barcode.save()
-                updated += 1
+        # Görüntüler istek içinde değil, run_worker tarafından süreç havuzunda üretilir
+        from jobs.models import Job
+        from .jobs import RENDER_BARCODES_JOB, RENDER_JOB_SIZE
+        
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+        with transaction.atomic():
+            for start in range(0, len(ids), RENDER_JOB_SIZE):
+                Job.enqueue(RENDER_BARCODES_JOB, {'ids': ids[start:start + RENDER_JOB_SIZE]})
         
-        self.message_user(request, f'{updated} adet barkod görüntüsü yeniden oluşturuldu.')
-    regenerate_barcode_images.short_description = 'Seçili barkod görüntülerini yeniden oluştur'
+        self.message_user(request, f'{len(ids)} adet barkod görüntüsü üretim kuyruğuna alındı.')
+    regenerate_barcode_images.short_description = 'Seçili barkod görüntülerini yeniden oluştur (arka planda)'
     
     def mark_as_unassigned(self, request, queryset):
         # Sadece atanmamış barkodları işaretleyelim
-        unassigned_barcodes = queryset.filter(assigned_user__isnull=True)
-        updated = unassigned_barcodes.update(is_assigned=False)
+        with transaction.atomic():
+            unassigned_barcodes = queryset.filter(assigned_user__isnull=True)
+            campaign_codes = set(unassigned_barcodes.values_list('campaign_code', flat=True))
+            updated = unassigned_barcodes.update(is_assigned=False, updated_at=timezone.now())
+            for campaign_code in campaign_codes:
+                CampaignBarcodeStats.rebuild(campaign_code)
         self.message_user(request, f'{updated} adet barkod atanmamış olarak işaretlendi.')
     mark_as_unassigned.short_description = 'Seçili barkodları atanmamış olarak işaretle'
+    
+    def deactivate_barcodes(self, request, queryset):
+        updated = self._set_active(queryset, False)
+        self.message_user(request, f'{updated} adet barkod pasifleştirildi.')
+    deactivate_barcodes.short_description = 'Seçili barkodları pasifleştir'
+    
+    def activate_barcodes(self, request, queryset):
+        updated = self._set_active(queryset, True)
+        self.message_user(request, f'{updated} adet barkod aktifleştirildi.')
+    activate_barcodes.short_description = 'Seçili barkodları aktifleştir'
+    
+    def _set_active(self, queryset, is_active):
+        with transaction.atomic():
+            changed = queryset.exclude(is_active=is_active)
+            # Sayaç farklarını kampanya başına tek sorguda hesapla
+            deltas = list(changed.order_by().values('campaign_code').annotate(
+                count=Count('id'),
+                unassigned=Count('id', filter=Q(is_assigned=False)),
+            ))
+            updated = changed.update(is_active=is_active, updated_at=timezone.now())
+            sign = 1 if is_active else -1
+            for delta in deltas:
+                CampaignBarcodeStats.apply(
+                    delta['campaign_code'],
+                    inactive=-sign * delta['count'],
+                    available=sign * delta['unassigned'],
+                )
+        return updated
+
+@admin.register(CampaignBarcodeStats)
+class CampaignBarcodeStatsAdmin(admin.ModelAdmin):
+    list_display = ('campaign_code', 'total', 'assigned', 'available', 'inactive', 'updated_at')
+    search_fields = ('campaign_code',)
+    readonly_fields = ('campaign_code', 'total', 'assigned', 'available', 'inactive', 'updated_at')
+    
+    def has_add_permission(self, request):
+        # Sayaçlar yalnızca atama/içe aktarma ve reconcile_barcode_stats ile güncellenir
+        return False
 
 @admin.register(UserBarcode)
 class UserBarcodeAdmin(admin.ModelAdmin):
     list_display = ('user_phone', 'user_name', 'barcode_code', 'campaign_code', 'barcode_preview', 'assigned_at')
-    list_filter = ('campaign_barcode__campaign_code', 'assigned_at')
+    list_filter = ('campaign_barcode__campaign', 'assigned_at')
+    list_select_related = ('user', 'campaign_barcode__campaign')
     search_fields = ('user__phone_number', 'user__first_name', 'user__last_name', 'campaign_barcode__barcode_code')
     ordering = ('-assigned_at',)
     
@@ -127,12 +249,7 @@ class UserBarcodeAdmin(admin.ModelAdmin):
     campaign_code.short_description = 'Kampanya'
     
     def barcode_preview(self, obj):
-        if obj.campaign_barcode.barcode_image:
-            return format_html(
-                '<img src="{}" width="80" height="30" style="border: 1px solid #ddd;" />',
-                obj.campaign_barcode.barcode_image.url
-            )
-        return "Görüntü Yok"
+        return barcode_preview_html(obj.campaign_barcode.barcode_code, 80, 30)
     barcode_preview.short_description = 'Önizleme'
     
     def user_info(self, obj):
@@ -158,10 +275,45 @@ class UserBarcodeAdmin(admin.ModelAdmin):
     barcode_info.short_description = 'Barkod Detayları'
     
     def barcode_preview_large(self, obj):
-        if obj.campaign_barcode.barcode_image:
-            return format_html(
-                '<img src="{}" width="300" height="100" style="border: 1px solid #ddd;" />',
-                obj.campaign_barcode.barcode_image.url
-            )
-        return "Görüntü Yok"
-    barcode_preview_large.short_description = 'Barkod Görüntüsü'
\ No newline at end of file
+        return barcode_preview_html(obj.campaign_barcode.barcode_code, 300, 100)
+    barcode_preview_large.short_description = 'Barkod Görüntüsü'
+
+@admin.register(BarcodeRedemption)
+class BarcodeRedemptionAdmin(admin.ModelAdmin):
+    list_display = ('transaction_id', 'barcode_code', 'campaign_code', 'store_code', 'amount', 'redeemed_at')
+    list_filter = ('campaign_code', 'store_code', 'redeemed_at')
+    search_fields = ('transaction_id', 'barcode_code', 'store_code')
+    date_hierarchy = 'redeemed_at'
+    raw_id_fields = ('user_barcode',)
+    readonly_fields = ('transaction_id', 'user_barcode', 'barcode_code', 'campaign_code', 'store_code', 'amount', 'redeemed_at', 'created_at')
+    
+    def has_add_permission(self, request):
+        # Defter yalnızca POS partileriyle doldurulur
+        return False
+
+@admin.register(UserBarcodeHistory)
+class UserBarcodeHistoryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'barcode_code', 'campaign_code', 'reason', 'assigned_at', 'released_at')
+    list_filter = ('reason', 'campaign_code')
+    list_select_related = ('user',)
+    search_fields = ('user__phone_number', 'barcode_code')
+    raw_id_fields = ('user', 'campaign_barcode')
+    readonly_fields = ('user', 'campaign_barcode', 'barcode_code', 'campaign_code', 'reason', 'assigned_at', 'released_at')
+    
+    def has_add_permission(self, request):
+        # Geçmiş yalnızca devir gibi toplu işlemlerle yazılır
+        return False
+
+
+@admin.register(PendingUserBarcode)
+class PendingUserBarcodeAdmin(admin.ModelAdmin):
+    list_display = ('user', 'campaign_barcode', 'campaign_code', 'created_at')
+    list_filter = ('campaign_code',)
+    list_select_related = ('user', 'campaign_barcode')
+    search_fields = ('user__phone_number', 'campaign_barcode__barcode_code')
+    raw_id_fields = ('user', 'campaign_barcode')
+    readonly_fields = ('user', 'campaign_barcode', 'campaign_code', 'created_at')
+
+    def has_add_permission(self, request):
+        # Bekleyen atamalar yalnızca rollover_campaign ile yazılır
+        return False
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class BarcodesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'barcodes'
-    verbose_name = 'Barkod Yönetimi'
\ No newline at end of file
+    verbose_name = 'Barkod Yönetimi'
+    
+    def ready(self):
+        import barcodes.signals
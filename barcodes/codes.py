@@ -0,0 +1,41 @@
+"""Barkod kodu biçimi.
+
+Eski kampanyaların kodları kontrol basamağı olmayan 6 haneli sayılardır.
+Daha uzun kodların (7-13 hane) son basamağı EAN kontrol basamağıdır; kasada
+tek basamak hataları ve çoğu yan yana basamak yer değişimi veritabanına
+gitmeden yakalanır.
+"""
+
+LEGACY_LENGTH = 6
+MAX_LENGTH = 13
+
+
+def data_length(length):
+    """Verilen uzunluktaki kodun rastgele üretilen kısmının hane sayısı"""
+    return length if length == LEGACY_LENGTH else length - 1
+
+
+def ean_check_digit(digits):
+    """EAN kontrol basamağı: sağdan itibaren tek sıradaki basamaklar 3 ile çarpılır"""
+    total = sum(int(digit) * (3 if position % 2 == 0 else 1) for position, digit in enumerate(reversed(digits)))
+    return (10 - total % 10) % 10
+
+
+def is_valid_format(code):
+    return (
+        isinstance(code, str)
+        and LEGACY_LENGTH <= len(code) <= MAX_LENGTH
+        and code.isascii()
+        and code.isdigit()
+    )
+
+
+def has_valid_check_digit(code):
+    """6 haneli kodlar kontrol basamağı taşımaz ve her zaman geçerlidir"""
+    if len(code) == LEGACY_LENGTH:
+        return True
+    return ean_check_digit(code[:-1]) == int(code[-1])
+
+
+def is_valid_code(code):
+    return is_valid_format(code) and has_valid_check_digit(code)
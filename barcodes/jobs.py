@@ -0,0 +1,49 @@
+from jobs.registry import register
+from .models import Campaign, CampaignBarcode, UserBarcode
+from .rendering import prerender_barcodes
+
+ASSIGN_BARCODE_JOB = 'assign_barcode'
+RENDER_BARCODES_JOB = 'render_barcodes'
+ACTIVATE_ROLLOVER_JOB = 'activate_rollover'
+
+# Admin eylemi seçimi bu büyüklükte işlere böler
+RENDER_JOB_SIZE = 5000
+
+
+@register(ASSIGN_BARCODE_JOB, batch_size=500, max_attempts=20)
+def assign_barcodes(jobs):
+    """Kayıt sonrası kuyruğa alınan barkod atamalarını tek transaction'da yap"""
+    jobs_by_user = {job.payload['user_id']: job for job in jobs}
+    unassigned = UserBarcode.assign_barcodes_to_users(list(jobs_by_user))
+    return {
+        jobs_by_user[user_id].pk: 'Aktif kampanya ya da müsait barkod yok'
+        for user_id in unassigned
+    }
+
+
+@register(RENDER_BARCODES_JOB, batch_size=1, max_attempts=3)
+def render_barcodes(jobs):
+    """Admin'den kuyruğa alınan barkod görüntülerini süreç havuzunda üret"""
+    failures = {}
+    for job in jobs:
+        stats = prerender_barcodes(CampaignBarcode.objects.filter(pk__in=job.payload['ids']))
+        if stats['failed']:
+            failures[job.pk] = f"{stats['failed']} görüntü üretilemedi: {stats['errors'][0][1]}"
+    return failures
+
+
+@register(ACTIVATE_ROLLOVER_JOB, batch_size=1, max_attempts=10)
+def activate_rollover(jobs):
+    """Kampanya başlangıcında devirde bekletilen atamaları etkinleştir, sonradan kayıt olanları devret"""
+    failures = {}
+    for job in jobs:
+        campaign_code = job.payload['campaign_code']
+        active_campaign = Campaign.get_active_campaign()
+        if active_campaign is None or active_campaign.campaign_code != campaign_code:
+            failures[job.pk] = f'{campaign_code} henüz aktif kampanya değil'
+            continue
+        for step in (UserBarcode.activate_pending_chunk, UserBarcode.rollover_chunk):
+            paired, last_user_id = 1, 0
+            while paired:
+                paired, last_user_id = step(campaign_code, last_user_id)
+    return failures
@@ -0,0 +1,139 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction, DatabaseError
+from django.utils import timezone
+from barcodes.models import Campaign, CampaignBarcode, CampaignBarcodeStats, UserBarcode
+from users.models import normalize_phone
+
+User = get_user_model()
+
+# Benchmark kullanıcıları bu önekle oluşturulur ve sonunda silinir
+PHONE_PREFIX = '+90599'
+
+
+class Command(BaseCommand):
+    help = 'Eşzamanlı kayıt altında barkod atama performansını ölç'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--registrations',
+            type=int,
+            default=200,
+            help='Paralel çalıştırılacak kayıt (atama) sayısı (varsayılan: 200)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=16,
+            help='Eşzamanlı iş parçacığı sayısı (varsayılan: 16)'
+        )
+        parser.add_argument(
+            '--legacy',
+            action='store_true',
+            help='Karşılaştırma için eski first() + save() atama yolunu kullan'
+        )
+
+    def handle(self, *args, **options):
+        count = options['registrations']
+        workers = options['workers']
+
+        # Gerçek kullanıcı oluşturup sildiği için yalnızca geliştirme veritabanında çalışır
+        if not settings.DEBUG:
+            raise CommandError('Benchmark yalnızca DEBUG=True olan (üretim dışı) ortamda çalıştırılabilir.')
+
+        # assign_barcode_to_user her zaman aktif kampanyayı kullanır; eski yol da aynı kampanyayla ölçülür
+        active_campaign = Campaign.get_active_campaign()
+        if not active_campaign:
+            raise CommandError('Aktif kampanya bulunamadı.')
+        campaign_code = active_campaign.campaign_code
+
+        available = CampaignBarcodeStats.for_campaign(campaign_code).available
+        if available < count:
+            raise CommandError(f'Kampanyada yeterli müsait barkod yok: {available} < {count}')
+
+        if User.objects.filter(phone_number__startswith=PHONE_PREFIX).exists():
+            raise CommandError(f'{PHONE_PREFIX} önekli kullanıcılar zaten var, önceki benchmark temizlenmemiş.')
+
+        # bulk_create post_save sinyalini tetiklemez; atamayı biz ölçeceğiz
+        unusable_password = make_password(None)
+        User.objects.bulk_create([
+            User(phone_number=phone, phone_e164=normalize_phone(phone), password=unusable_password)
+            for phone in (f'{PHONE_PREFIX}{i:07d}' for i in range(count))
+        ])
+        user_ids = list(User.objects.filter(phone_number__startswith=PHONE_PREFIX).values_list('id', flat=True))
+        users = list(User.objects.filter(id__in=user_ids))
+
+        mode = 'legacy' if options['legacy'] else 'claim'
+        self.stdout.write(f'🏁 {count} kayıt, {workers} iş parçacığı, kampanya {campaign_code}, mod: {mode}')
+
+        assign = self._assign_legacy if options['legacy'] else self._assign
+        collisions = 0
+        results = []
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for outcome in executor.map(lambda u: assign(u, campaign_code), users):
+                    results.append(outcome)
+            elapsed = time.perf_counter() - started
+
+            collisions = sum(1 for _, collided in results if collided)
+            assigned = [barcode_id for barcode_id, _ in results if barcode_id]
+            duplicates = len(assigned) - len(set(assigned))
+
+            self.stdout.write('\n' + '='*50)
+            self.stdout.write('📊 ATAMA BENCHMARK RAPORU')
+            self.stdout.write('='*50)
+            self.stdout.write(f'✅ Atanan: {len(assigned)} / {count}')
+            self.stdout.write(f'⚡ Atama/sn: {len(assigned) / elapsed:.1f}')
+            self.stdout.write(f'💥 Çakışma (ilk denemede başarısız): {collisions}')
+            self.stdout.write(f'🔁 Aynı barkodu alan kayıt: {duplicates}')
+            self.stdout.write(f'⏱️  Süre: {elapsed:.3f} sn')
+            self.stdout.write('='*50)
+        finally:
+            self._cleanup(user_ids, campaign_code)
+
+    def _assign(self, user, campaign_code):
+        """Yeni atama yolu (aktif kampanya) - (barkod id, çakışma oldu mu)"""
+        try:
+            user_barcode = UserBarcode.assign_barcode_to_user(user)
+            if user_barcode is None:
+                return None, True
+            return user_barcode.campaign_barcode_id, False
+        except DatabaseError:
+            return None, True
+        finally:
+            connection.close()
+
+    def _assign_legacy(self, user, campaign_code):
+        """Eski atama yolu - karşılaştırma için birebir kopya"""
+        try:
+            available_barcode = CampaignBarcode.objects.filter(
+                campaign_code=campaign_code,
+                is_assigned=False,
+                is_active=True
+            ).first()
+            if not available_barcode:
+                return None, True
+            available_barcode.is_assigned = True
+            available_barcode.save()
+            user_barcode = UserBarcode.objects.create(user=user, campaign_barcode=available_barcode)
+            return user_barcode.campaign_barcode_id, False
+        except DatabaseError:
+            return None, True
+        finally:
+            connection.close()
+
+    def _cleanup(self, user_ids, campaign_code):
+        with transaction.atomic():
+            user_barcodes = UserBarcode.objects.filter(user_id__in=user_ids)
+            barcode_ids = list(user_barcodes.values_list('campaign_barcode_id', flat=True))
+            user_barcodes.delete()
+            CampaignBarcode.objects.filter(id__in=barcode_ids).update(is_assigned=False, updated_at=timezone.now())
+            User.objects.filter(id__in=user_ids).delete()
+            CampaignBarcodeStats.rebuild(campaign_code)
+        self.stdout.write('🧹 Benchmark kullanıcıları ve atamaları temizlendi')
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from barcodes.models import Campaign, CampaignBarcode
+from opportunities.models import OpportunityProduct
+
+
+class Command(BaseCommand):
+    help = 'Sık çalışan sorguların EXPLAIN planlarını yazdır (indeks kontrolü için)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-code',
+            type=str,
+            help='Atama sorgusu için kampanya kodu (varsayılan: aktif kampanya)'
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='PostgreSQL\'de EXPLAIN ANALYZE çalıştır (sorguyu gerçekten yürütür)'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        campaign_code = options['campaign_code']
+        if not campaign_code:
+            active_campaign = Campaign.get_active_campaign()
+            campaign_code = active_campaign.campaign_code if active_campaign else ''
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+
+        queries = [
+            (
+                'Barkod atama (müsait ilk barkod)',
+                CampaignBarcode.objects.filter(
+                    CampaignBarcode.available_filter(now), campaign_code=campaign_code
+                ).order_by('id').values('id')[:1],
+            ),
+            (
+                'Aktif kampanya çözümü',
+                Campaign.objects.filter(is_active=True).filter(
+                    Q(end_date__isnull=True) | Q(end_date__gte=now)
+                ),
+            ),
+            (
+                'Aktif fırsat ürünleri (ilk sayfa)',
+                OpportunityProduct.objects.filter(is_active=True)[:20],
+            ),
+        ]
+
+        self.stdout.write(f'🗄️  Veritabanı: {connection.vendor}')
+        for title, queryset in queries:
+            self.stdout.write('\n' + '='*50)
+            self.stdout.write(f'🔍 {title}')
+            self.stdout.write('='*50)
+            self.stdout.write(queryset.explain(**explain_options))
@@ -0,0 +1,164 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from barcodes.codes import LEGACY_LENGTH, MAX_LENGTH, data_length
+from barcodes.models import Campaign, CampaignBarcode, CampaignBarcodeStats
+import numpy as np
+import time
+
+
+# Kod uzayı bu boyuta kadar ve doluluk yarıyı geçecekse boş kodlar listelenip
+# içlerinden seçilir; aksi halde reddetmeli örnekleme neredeyse tek turda biter
+DENSE_SPACE_LIMIT = 10_000_000
+
+
+def ean_check_digits(values, digits):
+    """values dizisindeki her sayı için EAN kontrol basamağını vektörel hesapla"""
+    total = np.zeros_like(values)
+    rest = values.copy()
+    for position in range(digits):
+        total += (rest % 10) * (3 if position % 2 == 0 else 1)
+        rest //= 10
+    return (10 - total % 10) % 10
+
+
+def sample_unique(rng, space, count, taken):
+    """[0, space) aralığından taken dışında count adet farklı sayıyı rastgele sırayla seç.
+
+    taken sıralı ve tekrarsız bir dizi olmalıdır.
+    """
+    if space <= DENSE_SPACE_LIMIT and (len(taken) + count) * 2 > space:
+        free = np.setdiff1d(np.arange(space, dtype=np.int64), taken, assume_unique=True)
+        return rng.choice(free, size=count, replace=False)
+
+    chosen = []
+    remaining = count
+    while remaining:
+        density = len(taken) / space
+        draw = np.unique(rng.integers(0, space, size=int(remaining / (1 - density) * 1.05) + 64, dtype=np.int64))
+        draw = draw[~np.isin(draw, taken, assume_unique=True)]
+        draw = rng.permutation(draw)[:remaining]
+        chosen.append(draw)
+        taken = np.union1d(taken, draw)
+        remaining -= len(draw)
+    return np.concatenate(chosen)
+
+
+class Command(BaseCommand):
+    help = 'Kampanya için kampanya içinde benzersiz rastgele barkod kodları üret ve toplu ekle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-code',
+            type=str,
+            required=True,
+            help='Kampanya kodu'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            required=True,
+            help='Üretilecek kod sayısı'
+        )
+        parser.add_argument(
+            '--length',
+            type=int,
+            default=LEGACY_LENGTH,
+            choices=range(LEGACY_LENGTH, MAX_LENGTH + 1),
+            metavar=f'{{{LEGACY_LENGTH}-{MAX_LENGTH}}}',
+            help=f'Kod uzunluğu; {LEGACY_LENGTH} haneden uzun kodların son basamağı EAN kontrol basamağıdır '
+                 f'(varsayılan: {LEGACY_LENGTH})'
+        )
+        parser.add_argument(
+            '--barcode-name',
+            type=str,
+            default='Kampanya Barkodu',
+            help='Barkod adı (varsayılan: "Kampanya Barkodu")'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Tek transaction içinde eklenecek kod sayısı (varsayılan: 50000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Rastgele sayı üreteci tohumu (tekrarlanabilir üretim için)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sadece üret ve rapor et, veritabanına yazma'
+        )
+
+    def handle(self, *args, **options):
+        campaign_code = options['campaign_code']
+        count = options['count']
+        length = options['length']
+        batch_size = options['batch_size']
+        if count < 1 or batch_size < 1:
+            raise CommandError('--count ve --batch-size en az 1 olmalı')
+
+        campaign = Campaign.objects.filter(campaign_code=campaign_code).first()
+        if campaign is None:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {campaign_code} kodlu kampanya yok; barkodlar kampanya oluşturulunca bağlanacak'
+            ))
+
+        digits = data_length(length)
+        space = 10 ** digits
+        self.stdout.write(f'🎲 Kod üretiliyor: {count} adet, {length} hane, kampanya {campaign_code}')
+        if length != LEGACY_LENGTH:
+            self.stdout.write(f'🔢 {digits} rastgele hane + 1 kontrol basamağı')
+
+        started = time.monotonic()
+        taken = self._existing_values(campaign_code, length, digits)
+        if count > space - len(taken):
+            raise CommandError(
+                f'{length} haneli kod uzayında yer yok: {space - len(taken)} boş kod var, {count} istendi'
+            )
+
+        rng = np.random.default_rng(options['seed'])
+        values = sample_unique(rng, space, count, taken)
+        if length != LEGACY_LENGTH:
+            values = values * 10 + ean_check_digits(values, digits)
+        codes = [f'{value:0{length}d}' for value in values.tolist()]
+        generated_at = time.monotonic()
+        self.stdout.write(
+            f'📊 {len(taken)} mevcut kod okundu, {len(codes)} yeni kod üretildi ({generated_at - started:.2f} sn)'
+        )
+
+        created = 0
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('🔍 DRY RUN - veritabanına yazılmadı'))
+            self.stdout.write(f'🔎 Örnek kodlar: {", ".join(codes[:5])}')
+        else:
+            for start in range(0, len(codes), batch_size):
+                with transaction.atomic():
+                    created += CampaignBarcode.insert_codes(
+                        codes[start:start + batch_size], campaign_code, campaign, options['barcode_name']
+                    )
+                elapsed = time.monotonic() - generated_at
+                self.stdout.write(f'📊 {created} kod eklendi ({created / elapsed if elapsed else 0:,.0f} kod/sn)')
+            CampaignBarcodeStats.rebuild(campaign_code)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 KOD ÜRETİM RAPORU')
+        self.stdout.write('='*50)
+        self.stdout.write(f'✅ {"Eklenecek" if options["dry_run"] else "Eklenen"}: {len(codes) if options["dry_run"] else created}')
+        if not options['dry_run'] and created < len(codes):
+            # Üretim sırasında aynı kampanyaya eşzamanlı eklenen kodlar
+            self.stdout.write(self.style.WARNING(f'⚠️  Çakışıp atlanan: {len(codes) - created}'))
+        self.stdout.write(f'⏱️  Süre: {elapsed:.2f} sn')
+        self.stdout.write('='*50)
+        self.stdout.write(self.style.SUCCESS('\n✨ İşlem tamamlandı!'))
+
+    def _existing_values(self, campaign_code, length, digits):
+        """Kampanyadaki aynı uzunluktaki kodların rastgele kısmını sıralı numpy dizisi olarak döndür"""
+        codes = CampaignBarcode.objects.filter(campaign_code=campaign_code).values_list('barcode_code', flat=True)
+        values = np.fromiter(
+            (int(code[:digits]) for code in codes.iterator(chunk_size=20000) if len(code) == length and code.isdigit()),
+            dtype=np.int64,
+        )
+        return np.unique(values)
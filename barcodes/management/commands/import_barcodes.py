@@ -1,12 +1,18 @@
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
-from barcodes.models import CampaignBarcode
+from django.db import connection, transaction
+from django.utils import timezone
+from barcodes.codes import is_valid_code
+from barcodes.models import Campaign, CampaignBarcode, CampaignBarcodeStats
+import json
 import os
-import re
+import time
+
+# Tek tek yazdırılacak en fazla geçersiz satır; büyük dosyalarda çıktı boğulmasın
+MAX_REPORTED_INVALID = 20
 
 
 class Command(BaseCommand):
-    help = 'Txt dosyasından barkodları içe aktar'
+    help = 'Txt dosyasından barkodları parça parça, kaldığı yerden devam edebilecek şekilde içe aktar'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -27,113 +33,238 @@ class Command(BaseCommand):
             default='Kampanya Barkodu',
             help='Barkod adı (varsayılan: "Kampanya Barkodu")'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Tek transaction içinde doğrulanıp eklenecek satır sayısı (varsayılan: 10000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Kontrol noktası dosyası (varsayılan: <dosya>.checkpoint)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Kontrol noktası varsa kaldığı yerden devam et'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='PostgreSQL\'de bulk_create yerine COPY ile yükle'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sadece doğrula ve rapor et, veritabanına yazma'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
         campaign_code = options['campaign_code']
         barcode_name = options['barcode_name']
+        chunk_size = options['chunk_size']
+        checkpoint_path = options['checkpoint'] or f'{file_path}.checkpoint'
+        dry_run = options['dry_run']
+        use_copy = options['copy']
 
         # Dosya varlığını kontrol et
         if not os.path.exists(file_path):
             raise CommandError(f'Dosya bulunamadı: {file_path}')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size en az 1 olmalı')
+        if use_copy and connection.vendor != 'postgresql':
+            raise CommandError('--copy yalnızca PostgreSQL ile kullanılabilir')
 
         self.stdout.write(f'📁 Dosya okunuyor: {file_path}')
         self.stdout.write(f'🏷️  Kampanya Kodu: {campaign_code}')
         self.stdout.write(f'📝 Barkod Adı: {barcode_name}')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('🔍 DRY RUN - veritabanına yazılmayacak'))
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-
-            # Satırları temizle ve 6 haneli kodları filtrele
-            barcodes = []
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                if not line:
-                    continue
-
-                # 6 haneli sayı kontrolü
-                if re.match(r'^\d{6}$', line):
-                    barcodes.append(line)
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'⚠️  Satır {line_num}: Geçersiz format "{line}" (6 haneli sayı olmalı)'
-                        )
-                    )
-
-            self.stdout.write(f'✅ {len(barcodes)} adet geçerli barkod bulundu')
-
-            if not barcodes:
-                self.stdout.write(self.style.ERROR('❌ Hiç geçerli barkod bulunamadı!'))
-                return
-
-            # Veritabanı işlemleri
-            with transaction.atomic():
-                created_count = 0
-                duplicate_count = 0
-                error_count = 0
-
-                for barcode_code in barcodes:
-                    try:
-                        # Daha önce eklenmiş mi kontrol et
-                        if CampaignBarcode.objects.filter(barcode_code=barcode_code).exists():
-                            duplicate_count += 1
-                            continue
-
-                        # Yeni barkod oluştur
-                        campaign_barcode = CampaignBarcode.objects.create(
-                            barcode_code=barcode_code,
-                            barcode_name=f"{barcode_name} - {barcode_code}",
-                            campaign_code=campaign_code,
-                            is_assigned=False,
-                            is_active=True
-                        )
+        campaign = Campaign.objects.filter(campaign_code=campaign_code).first()
+        if campaign is None:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {campaign_code} kodlu kampanya yok; barkodlar kampanya oluşturulunca bağlanacak'
+            ))
+
+        file_size = os.path.getsize(file_path)
+        state = {'offset': 0, 'line': 0, 'created': 0, 'duplicate': 0, 'invalid': 0}
+        if options['resume']:
+            state = self._load_checkpoint(checkpoint_path, file_path, file_size, campaign_code) or state
+
+        self.barcode_name = barcode_name
+        self.campaign = campaign
+        self.campaign_code = campaign_code
+        self.use_copy = use_copy
+        # Dosya içindeki tekrarlar; devam edilen çalışmada önceki kısım zaten veritabanında
+        seen = set()
+        started = time.monotonic()
+        processed_this_run = 0
 
-                        # Barkod görüntüsünü oluştur
-                        if campaign_barcode.generate_barcode_image():
-                            campaign_barcode.save()
-                            created_count += 1
-                            
-                            # Her 100 kayıtta bir ilerleme göster
-                            if created_count % 100 == 0:
-                                self.stdout.write(f'📊 {created_count} barkod oluşturuldu...')
-                        else:
-                            error_count += 1
+        try:
+            with open(file_path, 'rb') as file:
+                file.seek(state['offset'])
+                chunk = []
+                line_num = state['line']
+                for raw_line in file:
+                    line_num += 1
+                    line = raw_line.decode('utf-8').strip()
+                    if not line:
+                        continue
+                    if not is_valid_code(line):
+                        state['invalid'] += 1
+                        if state['invalid'] <= MAX_REPORTED_INVALID:
                             self.stdout.write(
-                                self.style.WARNING(f'⚠️  {barcode_code}: Barkod görüntüsü oluşturulamadı')
+                                self.style.WARNING(
+                                    f'⚠️  Satır {line_num}: Geçersiz format "{line}" '
+                                    f'(6 haneli sayı ya da kontrol basamaklı 7-13 haneli sayı olmalı)'
+                                )
                             )
+                        continue
+                    if line in seen:
+                        state['duplicate'] += 1
+                        continue
+                    seen.add(line)
+                    chunk.append(line)
 
-                    except Exception as e:
-                        error_count += 1
-                        self.stdout.write(
-                            self.style.ERROR(f'❌ {barcode_code}: Hata - {str(e)}')
-                        )
+                    if len(chunk) >= chunk_size:
+                        processed_this_run += self._flush(chunk, state, dry_run)
+                        state['offset'] = file.tell()
+                        state['line'] = line_num
+                        if not dry_run:
+                            self._save_checkpoint(checkpoint_path, file_path, file_size, campaign_code, state)
+                        self._report_progress(state, processed_this_run, started)
+                        chunk = []
 
-            # Sonuçları göster
-            self.stdout.write('\n' + '='*50)
-            self.stdout.write('📊 İÇE AKTARMA RAPORU')
-            self.stdout.write('='*50)
-            self.stdout.write(f'✅ Başarıyla oluşturulan: {created_count}')
-            self.stdout.write(f'⚠️  Zaten mevcut olanlar: {duplicate_count}')
-            self.stdout.write(f'❌ Hatalı olanlar: {error_count}')
-            self.stdout.write(f'📁 Toplam işlenen: {len(barcodes)}')
-            self.stdout.write('='*50)
-
-            if created_count > 0:
-                self.stdout.write(
-                    self.style.SUCCESS(f'🎉 {created_count} adet barkod başarıyla içe aktarıldı!')
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING('⚠️  Hiç yeni barkod eklenmedi.')
-                )
+                if chunk:
+                    processed_this_run += self._flush(chunk, state, dry_run)
+                state['line'] = line_num
 
-        except FileNotFoundError:
-            raise CommandError(f'Dosya bulunamadı: {file_path}')
+            if not dry_run:
+                # Sayaçlar parça başına ilerler; eşzamanlı içe aktarmalarla çakışmalara karşı son bir uzlaştırma
+                CampaignBarcodeStats.rebuild(campaign_code)
+                if os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+
+        except UnicodeDecodeError as e:
+            raise CommandError(f'Dosya UTF-8 değil (satır {line_num + 1}): {str(e)}')
         except PermissionError:
             raise CommandError(f'Dosya okuma izni yok: {file_path}')
         except Exception as e:
-            raise CommandError(f'Beklenmeyen hata: {str(e)}')
+            raise CommandError(
+                f'Beklenmeyen hata: {str(e)} - --resume ile son kontrol noktasından devam edebilirsiniz'
+            )
+
+        elapsed = time.monotonic() - started
+        rate = processed_this_run / elapsed if elapsed else 0
+
+        # Sonuçları göster
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 İÇE AKTARMA RAPORU')
+        self.stdout.write('='*50)
+        self.stdout.write(f'✅ {"Eklenecek" if dry_run else "Başarıyla oluşturulan"}: {state["created"]}')
+        self.stdout.write(f'⚠️  Zaten mevcut / tekrar eden: {state["duplicate"]}')
+        self.stdout.write(f'❌ Geçersiz satırlar: {state["invalid"]}')
+        self.stdout.write(f'📁 Toplam okunan satır: {state["line"]}')
+        self.stdout.write(f'⏱️  Süre: {elapsed:.2f} sn ({rate:,.0f} satır/sn)')
+        self.stdout.write('='*50)
+
+        if state['created'] > 0:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'🎉 {state["created"]} adet barkod {"eklenebilir" if dry_run else "başarıyla içe aktarıldı"}!'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING('⚠️  Hiç yeni barkod eklenmedi.')
+            )
+
+        self.stdout.write('\n✨ İşlem tamamlandı!')
+
+    def _flush(self, chunk, state, dry_run):
+        """Parçayı veritabanındaki kodlarla karşılaştır; yenileri ve sayaç farkını tek transaction'da yaz"""
+        existing = set(
+            CampaignBarcode.objects.filter(
+                campaign_code=self.campaign_code, barcode_code__in=chunk
+            ).values_list('barcode_code', flat=True)
+        )
+        new_codes = [code for code in chunk if code not in existing]
+        state['duplicate'] += len(chunk) - len(new_codes)
+        if dry_run or not new_codes:
+            state['created'] += len(new_codes)
+            return len(chunk)
+
+        with transaction.atomic():
+            if self.use_copy:
+                inserted = CampaignBarcode.insert_codes(new_codes, self.campaign_code, self.campaign, self.barcode_name)
+            else:
+                # bulk_create save() çağırmaz; campaign alanları burada doldurulur
+                now = timezone.now()
+                CampaignBarcode.objects.bulk_create(
+                    [
+                        CampaignBarcode(
+                            barcode_code=code,
+                            barcode_name=f"{self.barcode_name} - {code}",
+                            campaign_code=self.campaign_code,
+                            campaign=self.campaign,
+                            is_assigned=False,
+                            is_active=True,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                        for code in new_codes
+                    ],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
+                # ignore_conflicts eklenen satır sayısını vermez; kodlar yukarıda yeni olarak süzüldü
+                inserted = CampaignBarcode.objects.filter(
+                    campaign_code=self.campaign_code, barcode_code__in=new_codes
+                ).count()
+            # Commit edilen her parça havuz ve tahmin için hemen görünür
+            if inserted:
+                CampaignBarcodeStats.apply(self.campaign_code, total=inserted, available=inserted)
+        # Arada eşzamanlı bir içe aktarmanın eklediği kodlar tekrar sayılır
+        state['created'] += inserted
+        state['duplicate'] += len(new_codes) - inserted
+        return len(chunk)
+
+    def _report_progress(self, state, processed, started):
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(
+            f'📊 Satır {state["line"]}: {state["created"]} yeni, {state["duplicate"]} mevcut '
+            f'({rate:,.0f} satır/sn)'
+        )
+
+    def _load_checkpoint(self, checkpoint_path, file_path, file_size, campaign_code):
+        if not os.path.exists(checkpoint_path):
+            self.stdout.write('ℹ️  Kontrol noktası yok, baştan başlanıyor')
+            return None
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if (
+            checkpoint.get('file') != os.path.abspath(file_path)
+            or checkpoint.get('file_size') != file_size
+            or checkpoint.get('campaign_code') != campaign_code
+        ):
+            raise CommandError(
+                f'Kontrol noktası bu dosya/kampanya ile eşleşmiyor: {checkpoint_path}'
+            )
+        self.stdout.write(f'⏩ Satır {checkpoint["state"]["line"]} sonrasından devam ediliyor')
+        return checkpoint['state']
 
-        self.stdout.write('\n✨ İşlem tamamlandı!')
\ No newline at end of file
+    def _save_checkpoint(self, checkpoint_path, file_path, file_size, campaign_code, state):
+        """Kontrol noktasını atomik yaz; yarım kalan yazma eski noktayı bozmasın"""
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'file': os.path.abspath(file_path),
+                'file_size': file_size,
+                'campaign_code': campaign_code,
+                'state': state,
+            }, f)
+        os.replace(tmp_path, checkpoint_path)
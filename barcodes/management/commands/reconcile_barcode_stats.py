@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from barcodes.models import CampaignBarcodeStats
+
+
+class Command(BaseCommand):
+    help = 'Kampanya barkod sayaçlarını sıfırdan yeniden hesapla ve kaymaları raporla'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-code',
+            type=str,
+            help='Sadece bu kampanyayı yeniden hesapla (varsayılan: tüm kampanyalar)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sayaçları güncelleme, yalnızca kaymaları raporla'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        with transaction.atomic():
+            drift = CampaignBarcodeStats.rebuild(options['campaign_code'], dry_run=dry_run)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✅ Sayaçlar güncel, kayma yok.'))
+            return
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 SAYAÇ KAYMA RAPORU')
+        self.stdout.write('='*50)
+        for campaign_code in sorted(drift):
+            stored, actual = drift[campaign_code]
+            if stored is None:
+                self.stdout.write(self.style.WARNING(f'⚠️  {campaign_code}: sayaç satırı yoktu'))
+                continue
+            changes = ', '.join(
+                f'{field}: {stored[field]} → {actual[field]}'
+                for field in CampaignBarcodeStats.COUNTER_FIELDS
+                if stored[field] != actual[field]
+            )
+            self.stdout.write(self.style.WARNING(f'⚠️  {campaign_code}: {changes}'))
+        self.stdout.write('='*50)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'🔍 Kuru çalıştırma: {len(drift)} kampanya güncellenmedi.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'🎉 {len(drift)} kampanyanın sayaçları yeniden kuruldu.'))
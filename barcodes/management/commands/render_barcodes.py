@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+from barcodes.models import CampaignBarcode
+from barcodes.rendering import SYMBOLOGIES, normalize_options, prerender_barcodes
+import os
+
+
+class Command(BaseCommand):
+    help = 'Barkod görüntülerini süreç havuzunda toplu olarak üret (güncel olanları atlar)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-code',
+            type=str,
+            help='Sadece bu kampanyanın barkodları'
+        )
+        parser.add_argument(
+            '--ids',
+            type=str,
+            help='Virgülle ayrılmış CampaignBarcode id listesi'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help=f'Süreç sayısı (varsayılan: çekirdek sayısı, {os.cpu_count()})'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Sürece tek seferde verilecek barkod sayısı (varsayılan: 500)'
+        )
+        parser.add_argument(
+            '--symbology',
+            type=str,
+            default='code128',
+            choices=SYMBOLOGIES,
+            help='Barkod türü (varsayılan: code128)'
+        )
+        parser.add_argument(
+            '--dpi',
+            type=int,
+            default=300,
+            help='PNG çözünürlüğü (varsayılan: 300)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Güncel görüntüleri de yeniden üret'
+        )
+
+    def handle(self, *args, **options):
+        queryset = CampaignBarcode.objects.all()
+        if options['campaign_code']:
+            queryset = queryset.filter(campaign_code=options['campaign_code'])
+        if options['ids']:
+            try:
+                ids = [int(pk) for pk in options['ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError('--ids virgülle ayrılmış sayılardan oluşmalı')
+            queryset = queryset.filter(pk__in=ids)
+        if options['workers'] < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers ve --chunk-size en az 1 olmalı')
+        try:
+            render_options = normalize_options('png', {'dpi': options['dpi']})
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'🖼️  Barkod görüntüleri üretiliyor: {options["campaign_code"] or "tüm kampanyalar"} '
+            f'({options["workers"]} süreç, {options["symbology"]})'
+        )
+
+        def progress(stats):
+            rate = stats['rendered'] / stats['elapsed'] if stats['elapsed'] else 0
+            self.stdout.write(
+                f'📊 {stats["rendered"]} üretildi, {stats["skipped"]} güncel, '
+                f'{stats["failed"]} hatalı ({rate:,.0f} görüntü/sn)'
+            )
+
+        stats = prerender_barcodes(
+            queryset,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            force=options['force'],
+            symbology=options['symbology'],
+            options=render_options,
+            progress=progress,
+        )
+
+        for pk, error in stats['errors']:
+            self.stdout.write(self.style.WARNING(f'⚠️  Barkod #{pk}: {error}'))
+
+        rate = stats['rendered'] / stats['elapsed'] if stats['elapsed'] else 0
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 GÖRÜNTÜ ÜRETİM RAPORU')
+        self.stdout.write('='*50)
+        self.stdout.write(f'🔢 İncelenen barkod: {stats["total"]}')
+        self.stdout.write(f'✅ Üretilen: {stats["rendered"]}')
+        self.stdout.write(f'⏭️  Zaten güncel: {stats["skipped"]}')
+        self.stdout.write(f'❌ Hatalı: {stats["failed"]}')
+        self.stdout.write(f'⏱️  Süre: {stats["elapsed"]:.2f} sn ({rate:,.0f} görüntü/sn)')
+        self.stdout.write('='*50)
+        self.stdout.write(self.style.SUCCESS('\n✨ İşlem tamamlandı!'))
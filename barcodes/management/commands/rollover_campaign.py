@@ -0,0 +1,133 @@
+import time
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from barcodes.jobs import ACTIVATE_ROLLOVER_JOB
+from barcodes.models import Campaign, CampaignBarcodeStats, PendingUserBarcode, UserBarcode
+from jobs.models import Job
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Tüm aktif kullanıcılara yeni kampanyadan toplu barkod ata (eski atamalar geçmişe yazılır, eski kodlar '
+        'kampanyalarının politikasına göre bırakılır). Kampanya henüz başlamadıysa atamalar bekletilir ve '
+        'başlangıçta worker tarafından etkinleştirilir.'
+    )
+
+    # Parça bir kilit/benzersizlik çakışmasıyla geri alınırsa yeniden deneme sayısı
+    MAX_RETRIES = 3
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign-code',
+            type=str,
+            required=True,
+            help='Barkodları dağıtılacak yeni kampanyanın kodu'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=UserBarcode.ROLLOVER_CHUNK_SIZE,
+            help=f'Tek transaction\'da eşleştirilecek kullanıcı sayısı (varsayılan: {UserBarcode.ROLLOVER_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sadece devredilecek kullanıcı ve müsait kod sayısını göster'
+        )
+
+    def handle(self, *args, **options):
+        campaign_code = options['campaign_code']
+        self.chunk_size = options['chunk_size']
+        if self.chunk_size < 1:
+            raise CommandError('--chunk-size en az 1 olmalı')
+
+        campaign = Campaign.objects.filter(campaign_code=campaign_code).first()
+        if campaign is None:
+            raise CommandError(f'Kampanya bulunamadı: {campaign_code}')
+        active_campaign = Campaign.get_active_campaign()
+        # Başlamamış kampanyada eşleşmeler bekletilir; kullanıcılar eski kodlarını başlangıca kadar kullanır
+        stage = active_campaign is None or active_campaign.pk != campaign.pk
+        if stage and not (campaign.is_active and campaign.start_date > timezone.now()):
+            raise CommandError(f'{campaign_code} ne aktif kampanya ne de ileride başlayacak bir kampanya')
+
+        eligible = User.objects.filter(is_active=True, deleted_at__isnull=True).exclude(
+            Exists(UserBarcode.objects.filter(user=OuterRef('pk'), campaign_barcode__campaign_code=campaign_code))
+        ).exclude(
+            Exists(PendingUserBarcode.objects.filter(user=OuterRef('pk'), campaign_code=campaign_code))
+        ).count()
+        pending = PendingUserBarcode.objects.filter(campaign_code=campaign_code, user__deleted_at__isnull=True).count()
+        available = CampaignBarcodeStats.for_campaign(campaign_code).available
+        self.stdout.write(f'🔄 Kampanya devri: {campaign_code}')
+        if stage:
+            self.stdout.write(self.style.WARNING(
+                f'⏳ Kampanya {campaign.start_date:%d.%m.%Y %H:%M} tarihinde başlıyor; '
+                f'atamalar bekletilip başlangıçta etkinleşecek'
+            ))
+        self.stdout.write(f'👥 Devredilecek kullanıcı: {eligible}')
+        self.stdout.write(f'📋 Bekleyen atama: {pending}')
+        self.stdout.write(f'🎫 Müsait barkod: {available}')
+        if available < eligible:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Barkod yetersiz: {eligible - available} kullanıcı eski barkoduyla kalacak'
+            ))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('🔍 DRY RUN - değişiklik yapılmadı'))
+            return
+
+        started = time.monotonic()
+        activated = 0
+        if stage:
+            total = self._run(partial(UserBarcode.rollover_chunk, stage=True), campaign_code, 'bekletildi')
+            Job.enqueue(
+                ACTIVATE_ROLLOVER_JOB, {'campaign_code': campaign_code}, key=campaign_code,
+                run_after=campaign.start_date
+            )
+        else:
+            activated = self._run(UserBarcode.activate_pending_chunk, campaign_code, 'etkinleştirildi')
+            total = self._run(UserBarcode.rollover_chunk, campaign_code, 'devredildi')
+
+        elapsed = time.monotonic() - started
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 DEVİR RAPORU')
+        self.stdout.write('='*50)
+        if stage:
+            self.stdout.write(f'⏳ Başlangıçta etkinleşecek: {total + pending}')
+        else:
+            self.stdout.write(f'📋 Etkinleşen bekleyen atama: {activated}')
+            self.stdout.write(f'✅ Devredilen kullanıcı: {total}')
+        self.stdout.write(f'⏳ Barkodsuz kalan: {max(eligible - total, 0)}')
+        self.stdout.write(f'⏱️  Süre: {elapsed:.2f} sn ({(total + activated) / elapsed if elapsed else 0:,.0f} kullanıcı/sn)')
+        self.stdout.write('='*50)
+        self.stdout.write(self.style.SUCCESS('\n✨ İşlem tamamlandı!'))
+
+    def _run(self, step, campaign_code, label):
+        """step(campaign_code, son id, parça boyu) parçalarını bitene kadar çalıştır; toplam kullanıcı sayısını döndür"""
+        started = time.monotonic()
+        total = 0
+        last_user_id = 0
+        while True:
+            for attempt in range(1, self.MAX_RETRIES + 1):
+                try:
+                    paired, last_user_id = step(campaign_code, last_user_id, self.chunk_size)
+                    break
+                except DatabaseError as e:
+                    if attempt == self.MAX_RETRIES:
+                        raise CommandError(
+                            f'Parça {last_user_id} sonrasında başarısız: {str(e)} - '
+                            f'komutu tekrar çalıştırarak kaldığı yerden devam edebilirsiniz'
+                        )
+                    self.stdout.write(self.style.WARNING(f'⚠️  Parça geri alındı, tekrar deneniyor ({attempt}): {str(e)}'))
+            if not paired:
+                return total
+            total += paired
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'📊 {total} kullanıcı {label} (son id {last_user_id}, {total / elapsed:,.0f} kullanıcı/sn)'
+            )
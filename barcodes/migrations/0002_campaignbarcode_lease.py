@@ -0,0 +1,23 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaignbarcode',
+            name='lease_owner',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Kiralayan Süreç'),
+        ),
+        migrations.AddField(
+            model_name='campaignbarcode',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Kira Bitişi'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:54
+
+from django.db import migrations, models
+
+
+def build_stats(apps, schema_editor):
+    CampaignBarcode = apps.get_model('barcodes', 'CampaignBarcode')
+    CampaignBarcodeStats = apps.get_model('barcodes', 'CampaignBarcodeStats')
+    rows = CampaignBarcode.objects.order_by().values('campaign_code').annotate(
+        total=models.Count('id'),
+        assigned=models.Count('id', filter=models.Q(is_assigned=True)),
+        available=models.Count('id', filter=models.Q(is_assigned=False, is_active=True)),
+        inactive=models.Count('id', filter=models.Q(is_active=False)),
+    )
+    CampaignBarcodeStats.objects.bulk_create([CampaignBarcodeStats(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0002_campaignbarcode_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignBarcodeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign_code', models.CharField(max_length=50, unique=True, verbose_name='Kampanya Kodu')),
+                ('total', models.IntegerField(default=0, verbose_name='Toplam Barkod')),
+                ('assigned', models.IntegerField(default=0, verbose_name='Atanan Barkod')),
+                ('available', models.IntegerField(default=0, verbose_name='Müsait Barkod')),
+                ('inactive', models.IntegerField(default=0, verbose_name='Pasif Barkod')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Kampanya Barkod Sayacı',
+                'verbose_name_plural': 'Kampanya Barkod Sayaçları',
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_campaign(apps, schema_editor):
+    Campaign = apps.get_model('barcodes', 'Campaign')
+    CampaignBarcode = apps.get_model('barcodes', 'CampaignBarcode')
+    campaign_id = Campaign.objects.filter(campaign_code=models.OuterRef('campaign_code')).values('id')[:1]
+    CampaignBarcode.objects.filter(campaign__isnull=True).update(campaign=models.Subquery(campaign_id))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0003_campaignbarcodestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaignbarcode',
+            name='campaign',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='barcodes', to='barcodes.campaign', verbose_name='Kampanya'),
+        ),
+        migrations.RunPython(backfill_campaign, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0004_campaignbarcode_campaign'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='campaignbarcode',
+            name='barcodes_ca_is_assi_888155_idx',
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['end_date', 'start_date'], name='campaign_active_window_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaignbarcode',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_assigned', False)), fields=['campaign_code', 'id'], include=('leased_until',), name='barcode_free_by_campaign_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0005_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='campaignbarcode',
+            index=models.Index(fields=['campaign_code', 'updated_at'], name='barcode_changed_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0006_campaignbarcode_changed_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarcodeRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=64, unique=True, verbose_name='İşlem No')),
+                ('barcode_code', models.CharField(max_length=6, verbose_name='Barkod Kodu')),
+                ('campaign_code', models.CharField(max_length=50, verbose_name='Kampanya Kodu')),
+                ('store_code', models.CharField(max_length=50, verbose_name='Mağaza Kodu')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Tutar')),
+                ('redeemed_at', models.DateTimeField(verbose_name='Kullanım Tarihi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Kayıt Tarihi')),
+                ('user_barcode', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='redemptions', to='barcodes.userbarcode', verbose_name='Kullanıcı Barkodu')),
+            ],
+            options={
+                'verbose_name': 'Barkod Kullanımı',
+                'verbose_name_plural': 'Barkod Kullanımları',
+                'ordering': ['-redeemed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='barcoderedemption',
+            index=models.Index(fields=['store_code', 'redeemed_at'], name='barcodes_ba_store_c_922b15_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='barcoderedemption',
+            index=models.Index(fields=['campaign_code', 'redeemed_at'], name='barcodes_ba_campaig_d6e6c3_idx'),
+        ),
+    ]
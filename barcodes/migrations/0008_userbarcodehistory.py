@@ -0,0 +1,38 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('barcodes', '0007_barcoderedemption'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBarcodeHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode_code', models.CharField(max_length=6, verbose_name='Barkod Kodu')),
+                ('campaign_code', models.CharField(max_length=50, verbose_name='Kampanya Kodu')),
+                ('assigned_at', models.DateTimeField(verbose_name='Atanma Tarihi')),
+                ('released_at', models.DateTimeField(verbose_name='Bırakılma Tarihi')),
+                ('reason', models.CharField(choices=[('rollover', 'Kampanya devri')], max_length=20, verbose_name='Sebep')),
+                ('campaign_barcode', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='history', to='barcodes.campaignbarcode', verbose_name='Kampanya Barkodu')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='barcode_history', to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Barkod Atama Geçmişi',
+                'verbose_name_plural': 'Barkod Atama Geçmişi',
+                'ordering': ['-released_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='userbarcodehistory',
+            index=models.Index(fields=['user', 'released_at'], name='barcodes_us_user_id_3b603d_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0008_userbarcodehistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignAssignmentMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign_code', models.CharField(max_length=50, verbose_name='Kampanya Kodu')),
+                ('bucket', models.DateTimeField(verbose_name='Zaman Dilimi')),
+                ('assigned', models.IntegerField(default=0, verbose_name='Atanan')),
+                ('failed', models.IntegerField(default=0, verbose_name='Barkod Bulunamayan')),
+                ('latency_ms_total', models.FloatField(default=0, verbose_name='Toplam Atama Süresi (ms)')),
+                ('latency_ms_max', models.FloatField(default=0, verbose_name='En Uzun Atama Süresi (ms)')),
+            ],
+            options={
+                'verbose_name': 'Atama Ölçümü',
+                'verbose_name_plural': 'Atama Ölçümleri',
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='campaignassignmentmetric',
+            constraint=models.UniqueConstraint(fields=('campaign_code', 'bucket'), name='assignment_metric_bucket_unique'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barcodes', '0009_campaignassignmentmetric'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='barcoderedemption',
+            name='barcode_code',
+            field=models.CharField(max_length=13, verbose_name='Barkod Kodu'),
+        ),
+        migrations.AlterField(
+            model_name='campaignbarcode',
+            name='barcode_code',
+            field=models.CharField(db_index=True, max_length=13, verbose_name='Barkod Kodu'),
+        ),
+        migrations.AlterField(
+            model_name='userbarcodehistory',
+            name='barcode_code',
+            field=models.CharField(max_length=13, verbose_name='Barkod Kodu'),
+        ),
+        migrations.AddConstraint(
+            model_name='campaignbarcode',
+            constraint=models.UniqueConstraint(fields=('campaign_code', 'barcode_code'), name='barcode_code_per_campaign_unique'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('barcodes', '0010_barcode_code_per_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='released_barcode_policy',
+            field=models.CharField(choices=[('reuse', 'Havuza geri dönsün'), ('retire', 'Emekliye ayrılsın')], default='reuse', max_length=10, verbose_name='Silinen Hesabın Barkodu'),
+        ),
+        migrations.AlterField(
+            model_name='userbarcodehistory',
+            name='reason',
+            field=models.CharField(choices=[('rollover', 'Kampanya devri'), ('account_deleted', 'Hesap silindi')], max_length=20, verbose_name='Sebep'),
+        ),
+        migrations.AlterField(
+            model_name='userbarcodehistory',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='barcode_history', to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.8 on 2026-10-18 08:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('barcodes', '0011_released_barcode_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingUserBarcode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campaign_code', models.CharField(max_length=50, verbose_name='Kampanya Kodu')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('campaign_barcode', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pending_assignment', to='barcodes.campaignbarcode', verbose_name='Kampanya Barkodu')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_barcodes', to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Bekleyen Barkod Ataması',
+                'verbose_name_plural': 'Bekleyen Barkod Atamaları',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pendinguserbarcode',
+            constraint=models.UniqueConstraint(fields=('campaign_code', 'user'), name='pending_barcode_per_campaign_unique'),
+        ),
+    ]
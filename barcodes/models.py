@@ -1,22 +1,34 @@
-from django.db import models
+from django.db import models, transaction, connection, IntegrityError
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from datetime import datetime, timedelta
 from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
+from io import BytesIO, StringIO
 import barcode
 from barcode.writer import ImageWriter
 import os
+import threading
+import time
+import uuid
 from django.core.files.base import ContentFile
 
 User = get_user_model()
 
 class CampaignBarcode(models.Model):
     """Kampanya barkodları - her kampanya için mevcut barkodlar"""
-    barcode_code = models.CharField(max_length=6, unique=True, verbose_name='Barkod Kodu')
+    # Kod yalnızca kampanya içinde benzersizdir (bkz. codes.py); kasa kodla kampanyasız da arar
+    barcode_code = models.CharField(max_length=13, db_index=True, verbose_name='Barkod Kodu')
     barcode_name = models.CharField(max_length=100, verbose_name='Barkod İsmi')
     campaign_code = models.CharField(max_length=50, verbose_name='Kampanya Kodu')
+    campaign = models.ForeignKey('Campaign', on_delete=models.SET_NULL, blank=True, null=True, related_name='barcodes', verbose_name='Kampanya')
     barcode_image = models.ImageField(upload_to='barcodes/', blank=True, null=True, verbose_name='Barkod Görüntüsü')
     is_assigned = models.BooleanField(default=False, verbose_name='Atanmış mı?')
     is_active = models.BooleanField(default=True, verbose_name='Aktif mi?')
+    lease_owner = models.CharField(max_length=100, blank=True, default='', verbose_name='Kiralayan Süreç')
+    leased_until = models.DateTimeField(blank=True, null=True, verbose_name='Kira Bitişi')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
 
@@ -24,27 +36,233 @@ class CampaignBarcode(models.Model):
         verbose_name = 'Kampanya Barkodu'
         verbose_name_plural = 'Kampanya Barkodları'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign_code', 'barcode_code'], name='barcode_code_per_campaign_unique'),
+        ]
         indexes = [
             models.Index(fields=['campaign_code', 'is_active']),
-            models.Index(fields=['is_assigned']),
+            # POS indeksinin artımlı yenilemesi: kampanyada son değişen satırlar
+            models.Index(fields=['campaign_code', 'updated_at'], name='barcode_changed_idx'),
+            # Atama sorgusu: kampanyanın müsait barkodları id sırasıyla; kira kontrolü indeksten okunur
+            models.Index(
+                fields=['campaign_code', 'id'],
+                condition=models.Q(is_assigned=False, is_active=True),
+                include=['leased_until'],
+                name='barcode_free_by_campaign_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.barcode_code} - {self.barcode_name} ({self.campaign_code})"
 
     def save(self, *args, **kwargs):
+        # campaign_code ve campaign alanlarını eşitle
+        if self.campaign_id is not None:
+            self.campaign_code = self.campaign.campaign_code
+        elif self.campaign_code:
+            self.campaign = Campaign.objects.filter(campaign_code=self.campaign_code).first()
         # Artık görüntü oluşturmuyoruz - React Native'de dinamik üretilecek
         super().save(*args, **kwargs)
 
+    # UPDATE ... RETURNING desteklenmeyen veritabanlarında compare-and-set deneme sayısı
+    CLAIM_MAX_ATTEMPTS = 10
+
+    @classmethod
+    def insert_codes(cls, codes, campaign_code, campaign=None, barcode_name='Kampanya Barkodu'):
+        """Kodları model örneği kurmadan toplu ekle, eklenen satır sayısını döndür.
+
+        transaction.atomic() bloğu içinde çağrılmalıdır. Kampanyada zaten var
+        olan kodlar benzersizlik kısıtına takılıp atlanır. PostgreSQL'de kodlar
+        COPY ile geçici tabloya yüklenip tek INSERT ... SELECT ile aktarılır;
+        diğer veritabanlarında tek bir executemany kullanılır. save() ve
+        sinyaller çalışmaz; CampaignBarcodeStats çağıran tarafından güncellenir.
+        """
+        if not codes:
+            return 0
+        table = connection.ops.quote_name(cls._meta.db_table)
+        columns = (
+            'barcode_code, barcode_name, campaign_code, campaign_id, barcode_image, '
+            'is_assigned, is_active, lease_owner, created_at, updated_at'
+        )
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        campaign_id = campaign.pk if campaign else None
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                buffer = StringIO()
+                for code in codes:
+                    buffer.write(f'{code}\t{barcode_name} - {code}\n')
+                buffer.seek(0)
+                cursor.execute(
+                    'CREATE TEMP TABLE IF NOT EXISTS barcode_import_stage '
+                    '(barcode_code varchar(13), barcode_name varchar(100)) ON COMMIT DELETE ROWS'
+                )
+                cursor.copy_expert('COPY barcode_import_stage (barcode_code, barcode_name) FROM STDIN', buffer)
+                cursor.execute(
+                    f'INSERT INTO {table} ({columns}) '
+                    "SELECT barcode_code, barcode_name, %s, %s, '', false, true, '', %s, %s "
+                    'FROM barcode_import_stage ON CONFLICT (campaign_code, barcode_code) DO NOTHING',
+                    [campaign_code, campaign_id, now, now],
+                )
+                return cursor.rowcount
+
+            fields = [cls._meta.get_field('campaign_code'), cls._meta.get_field('barcode_code')]
+            insert = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+            suffix = connection.ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+            cursor.executemany(
+                f'{insert} {table} ({columns}) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) {suffix}',
+                [
+                    (code, f'{barcode_name} - {code}', campaign_code, campaign_id, '', False, True, '', now, now)
+                    for code in codes
+                ],
+            )
+            return cursor.rowcount
+
+    @classmethod
+    def available_filter(cls, now=None, include_leased=False):
+        """Müsait barkod koşulu: atanmamış, aktif ve canlı bir kirası olmayan (include_leased: kiralıklar dahil)"""
+        free = models.Q(is_assigned=False, is_active=True)
+        if include_leased:
+            return free
+        now = now or timezone.now()
+        return free & (models.Q(leased_until__isnull=True) | models.Q(leased_until__lt=now))
+
+    @classmethod
+    def claim_available(cls, campaign_code):
+        """Kampanyadan müsait bir barkodu tek adımda sahiplen.
+
+        transaction.atomic() bloğu içinde çağrılmalıdır. PostgreSQL'de tek bir
+        UPDATE ... RETURNING ifadesi, alt sorgudaki FOR UPDATE SKIP LOCKED
+        sayesinde eşzamanlı işlemlere beklemeden farklı satırlar verir. SQLite
+        (3.35+) yazmaları zaten serileştirdiği için aynı ifade kilitsiz çalışır;
+        RETURNING olmayan veritabanlarında koşullu UPDATE ile compare-and-set
+        yapılır.
+        """
+        claimed = cls.claim_many(campaign_code, 1)
+        return claimed[0] if claimed else None
+
+    @classmethod
+    def claim_many(cls, campaign_code, count):
+        """Kampanyadan en fazla count müsait barkodu tek adımda sahiplen (bkz. claim_available).
+
+        Kirasız barkod yetmezse başka süreçlerin havuzlarında kiralı bekleyen barkodlar
+        devralınır; boşta bekleyen bloklar kampanyayı tükenmiş göstermez. Kirayı
+        kaybeden havuz confirm_lease'te bunu görür ve bloğunu bırakır.
+        """
+        if count <= 0:
+            return []
+        claimed = cls._claim(campaign_code, count)
+        if len(claimed) < count:
+            claimed += cls._claim(campaign_code, count - len(claimed), include_leased=True)
+        return claimed
+
+    @classmethod
+    def _claim(cls, campaign_code, count, include_leased=False):
+        now = timezone.now()
+        assignment = {'is_assigned': True, 'lease_owner': '', 'leased_until': None, 'updated_at': now}
+        if cls._supports_update_returning():
+            return cls._update_available_returning(campaign_code, assignment, count, now, include_leased)
+
+        # RETURNING yok: kazanılan satırları geçici bir işaretle ayırt et
+        token = f'claim:{uuid.uuid4().hex}'
+        available = cls.objects.filter(
+            cls.available_filter(now, include_leased),
+            campaign_code=campaign_code
+        ).order_by('id')
+        claimed = []
+        for _ in range(cls.CLAIM_MAX_ATTEMPTS):
+            candidate_ids = list(available.values_list('id', flat=True)[:count - len(claimed)])
+            if not candidate_ids:
+                break
+            cls.objects.filter(cls.available_filter(now, include_leased), pk__in=candidate_ids).update(
+                **{**assignment, 'lease_owner': token}
+            )
+            claimed += list(cls.objects.filter(pk__in=candidate_ids, lease_owner=token))
+            if len(claimed) >= count:
+                break
+        cls.objects.filter(lease_owner=token).update(lease_owner='')
+        for barcode in claimed:
+            barcode.lease_owner = ''
+        return claimed
+
+    @classmethod
+    def lease_block(cls, campaign_code, owner, size, leased_until):
+        """Müsait barkodlardan bir bloğu süreç adına kirala, kiralanan barkodları döndür.
+
+        Kira süresi dolan ya da sahibi çöken bloklar available_filter()
+        koşuluna yeniden girdiği için otomatik olarak geri kazanılır.
+        """
+        now = timezone.now()
+        lease = {'lease_owner': owner, 'leased_until': leased_until, 'updated_at': now}
+        if cls._supports_update_returning():
+            return cls._update_available_returning(campaign_code, lease, size, now)
+
+        candidate_ids = list(
+            cls.objects.filter(cls.available_filter(now), campaign_code=campaign_code)
+            .order_by('id').values_list('id', flat=True)[:size]
+        )
+        cls.objects.filter(cls.available_filter(now), pk__in=candidate_ids).update(**lease)
+        return list(cls.objects.filter(pk__in=candidate_ids, lease_owner=owner, leased_until=leased_until).order_by('id'))
+
+    @classmethod
+    def confirm_lease(cls, pk, owner):
+        """Kiralanmış barkodu atanmış olarak işaretle; kira kaybedildiyse False döner"""
+        now = timezone.now()
+        return bool(cls.objects.filter(
+            pk=pk, lease_owner=owner, leased_until__gte=now, is_assigned=False, is_active=True
+        ).update(is_assigned=True, lease_owner='', leased_until=None, updated_at=now))
+
+    @staticmethod
+    def _supports_update_returning():
+        if connection.vendor == 'postgresql':
+            return True
+        if connection.vendor == 'sqlite':
+            return connection.Database.sqlite_version_info >= (3, 35)
+        return False
+
+    @classmethod
+    def _update_available_returning(cls, campaign_code, values, limit, now, include_leased=False):
+        quote = connection.ops.quote_name
+        table = quote(cls._meta.db_table)
+        assignments = ', '.join(f'{quote(column)} = %s' for column in values)
+        lock = ' FOR UPDATE SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else ''
+        sql = (
+            f'UPDATE {table} SET {assignments} '
+            f'WHERE id IN ('
+            f'SELECT id FROM {table} '
+            # Koşul barcode_free_by_campaign_idx kısmi indeksinin tanımıyla birebir aynı
+            f'WHERE campaign_code = %s AND (is_active AND NOT is_assigned) '
+            f'{"" if include_leased else "AND (leased_until IS NULL OR leased_until < %s) "}'
+            f'ORDER BY id LIMIT %s{lock}'
+            f') RETURNING *'
+        )
+        adapt = connection.ops.adapt_datetimefield_value
+        params = [adapt(v) if isinstance(v, datetime) else v for v in values.values()]
+        params += [campaign_code] + ([] if include_leased else [adapt(now)]) + [limit]
+        # raw() kolonları alanlara eşler ve veritabanı dönüştürücülerini uygular
+        return list(cls.objects.raw(sql, params))
+
 
 class Campaign(models.Model):
     """Kampanya yönetimi"""
+    # Hesabı silinen kullanıcının barkodu: havuza geri döner ya da bir daha atanmaz
+    RELEASED_BARCODE_REUSE = 'reuse'
+    RELEASED_BARCODE_RETIRE = 'retire'
+    RELEASED_BARCODE_POLICY_CHOICES = [
+        (RELEASED_BARCODE_REUSE, 'Havuza geri dönsün'),
+        (RELEASED_BARCODE_RETIRE, 'Emekliye ayrılsın'),
+    ]
+
     campaign_code = models.CharField(max_length=50, unique=True, verbose_name='Kampanya Kodu')
     campaign_name = models.CharField(max_length=200, verbose_name='Kampanya Adı')
     description = models.TextField(blank=True, verbose_name='Açıklama')
     is_active = models.BooleanField(default=True, verbose_name='Aktif mi?')
     start_date = models.DateTimeField(verbose_name='Başlangıç Tarihi')
     end_date = models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Tarihi')
+    released_barcode_policy = models.CharField(
+        max_length=10, choices=RELEASED_BARCODE_POLICY_CHOICES, default=RELEASED_BARCODE_REUSE,
+        verbose_name='Silinen Hesabın Barkodu'
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
 
@@ -52,22 +270,180 @@ class Campaign(models.Model):
         verbose_name = 'Kampanya'
         verbose_name_plural = 'Kampanyalar'
         ordering = ['-created_at']
+        indexes = [
+            # Aktif kampanya çözümü: is_active=True ve tarih penceresi
+            models.Index(
+                fields=['end_date', 'start_date'],
+                condition=models.Q(is_active=True),
+                name='campaign_active_window_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.campaign_name} ({self.campaign_code})"
 
     @classmethod
     def get_active_campaign(cls):
-        """Aktif kampanyayı getir"""
-        from django.utils import timezone
-        now = timezone.now()
-        return cls.objects.filter(
-            is_active=True,
-            start_date__lte=now
-        ).filter(
+        """Aktif kampanyayı getir - bir sonraki başlangıç/bitiş sınırına kadar süreç içinde önbelleklenir"""
+        return _active_campaign_cache.get(cls._resolve_active_campaign)
+
+    @classmethod
+    def invalidate_active_campaign(cls):
+        """Aktif kampanya önbelleğini tüm süreçlerde geçersiz kıl"""
+        _active_campaign_cache.invalidate()
+
+    @classmethod
+    def _resolve_active_campaign(cls, now):
+        """(aktif kampanya, çözümün değişebileceği ilk an) döndür"""
+        # Şu an aktif olanlar ve ileride başlayacaklar tek sorguda
+        candidates = list(cls.objects.filter(is_active=True).filter(
             models.Q(end_date__isnull=True) | models.Q(end_date__gte=now)
-        ).first()
+        ))
+        active_campaign = next((c for c in candidates if c.start_date <= now), None)
+        boundaries = [c.start_date for c in candidates if c.start_date > now]
+        boundaries += [c.end_date for c in candidates if c.end_date is not None]
+        return active_campaign, min(boundaries, default=None)
+
+
+class ActiveCampaignCache:
+    """Campaign.get_active_campaign() sonucunun süreç içi önbelleği.
 
+    Kayıt bir sonraki kampanya başlangıç/bitiş anına kadar geçerlidir.
+    Kampanya kaydedildiğinde ya da silindiğinde paylaşılan önbellekteki
+    nesil anahtarı değişir; her süreç bir sonraki okumada kendi kaydını
+    bırakır. ACTIVE_CAMPAIGN_CACHE_MAX_SECONDS, sinyal tetiklemeyen
+    toplu güncellemelere karşı üst sınırdır.
+    """
+    GENERATION_KEY = 'barcodes:active-campaign:generation'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entry = None
+
+    def get(self, resolve):
+        now = timezone.now()
+        generation = cache.get(self.GENERATION_KEY)
+        with self._lock:
+            entry = self._entry
+        if entry is not None:
+            campaign, expires_at, cached_generation = entry
+            if now < expires_at and cached_generation == generation:
+                return campaign
+
+        campaign, boundary = resolve(now)
+        max_age = timedelta(seconds=getattr(settings, 'ACTIVE_CAMPAIGN_CACHE_MAX_SECONDS', 3600))
+        expires_at = min(boundary, now + max_age) if boundary is not None else now + max_age
+        with self._lock:
+            self._entry = (campaign, expires_at, generation)
+        return campaign
+
+    def invalidate(self):
+        with self._lock:
+            self._entry = None
+        cache.set(self.GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+_active_campaign_cache = ActiveCampaignCache()
+
+
+class CampaignBarcodeStats(models.Model):
+    """Kampanya başına barkod sayaçları - COUNT(*) taramaları yerine okunur"""
+    COUNTER_FIELDS = ('total', 'assigned', 'available', 'inactive')
+
+    campaign_code = models.CharField(max_length=50, unique=True, verbose_name='Kampanya Kodu')
+    total = models.IntegerField(default=0, verbose_name='Toplam Barkod')
+    assigned = models.IntegerField(default=0, verbose_name='Atanan Barkod')
+    available = models.IntegerField(default=0, verbose_name='Müsait Barkod')
+    inactive = models.IntegerField(default=0, verbose_name='Pasif Barkod')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
+
+    class Meta:
+        verbose_name = 'Kampanya Barkod Sayacı'
+        verbose_name_plural = 'Kampanya Barkod Sayaçları'
+
+    def __str__(self):
+        return f"{self.campaign_code} - Toplam: {self.total}, Atanan: {self.assigned}, Müsait: {self.available}"
+
+    @classmethod
+    def for_campaign(cls, campaign_code):
+        """Kampanyanın sayaçlarını getir; henüz satır yoksa sıfırlarla döner"""
+        return cls.objects.filter(campaign_code=campaign_code).first() or cls(campaign_code=campaign_code)
+
+    @classmethod
+    def apply(cls, campaign_code, **deltas):
+        """Sayaçları artır/azalt - barkod değişikliğiyle aynı transaction içinde çağrılmalı"""
+        updated = cls.objects.filter(campaign_code=campaign_code).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()},
+            updated_at=timezone.now()
+        )
+        if not updated:
+            # İlk kez görülen kampanya: sayaçları güncel satırlardan kur (değişiklik zaten görünür)
+            cls.rebuild(campaign_code)
+
+    @classmethod
+    def compute(cls, campaign_code=None):
+        """Sayaçları CampaignBarcode tablosundan tek bir GROUP BY ile hesapla"""
+        barcodes = CampaignBarcode.objects.order_by()
+        if campaign_code is not None:
+            barcodes = barcodes.filter(campaign_code=campaign_code)
+        rows = barcodes.values('campaign_code').annotate(
+            total=models.Count('id'),
+            assigned=models.Count('id', filter=models.Q(is_assigned=True)),
+            available=models.Count('id', filter=models.Q(is_assigned=False, is_active=True)),
+            inactive=models.Count('id', filter=models.Q(is_active=False)),
+        )
+        return {row.pop('campaign_code'): row for row in rows}
+
+    @classmethod
+    def rebuild(cls, campaign_code=None, dry_run=False):
+        """Sayaçları sıfırdan yeniden kur; kayma olan kampanyaları {kod: (eski, yeni)} olarak döndür"""
+        actual = cls.compute(campaign_code)
+        existing = cls.objects.all()
+        if campaign_code is not None:
+            existing = existing.filter(campaign_code=campaign_code)
+            actual.setdefault(campaign_code, dict.fromkeys(cls.COUNTER_FIELDS, 0))
+        stored = {
+            stats.campaign_code: {field: getattr(stats, field) for field in cls.COUNTER_FIELDS}
+            for stats in existing
+        }
+
+        drift = {}
+        zeros = dict.fromkeys(cls.COUNTER_FIELDS, 0)
+        for code in set(actual) | set(stored):
+            counts = actual.setdefault(code, zeros)
+            if stored.get(code) != counts:
+                drift[code] = (stored.get(code), counts)
+
+        if drift and not dry_run:
+            cls.objects.bulk_create(
+                [cls(campaign_code=code, **actual[code]) for code in drift],
+                update_conflicts=True,
+                unique_fields=['campaign_code'],
+                update_fields=list(cls.COUNTER_FIELDS) + ['updated_at'],
+            )
+        return drift
+
+
+
+class CampaignAssignmentMetric(models.Model):
+    """Kampanya başına dakikalık atama sayaçları - tüketim hızı ve tükenme tahmini için"""
+    campaign_code = models.CharField(max_length=50, verbose_name='Kampanya Kodu')
+    bucket = models.DateTimeField(verbose_name='Zaman Dilimi')
+    assigned = models.IntegerField(default=0, verbose_name='Atanan')
+    failed = models.IntegerField(default=0, verbose_name='Barkod Bulunamayan')
+    latency_ms_total = models.FloatField(default=0, verbose_name='Toplam Atama Süresi (ms)')
+    latency_ms_max = models.FloatField(default=0, verbose_name='En Uzun Atama Süresi (ms)')
+
+    class Meta:
+        verbose_name = 'Atama Ölçümü'
+        verbose_name_plural = 'Atama Ölçümleri'
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign_code', 'bucket'], name='assignment_metric_bucket_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.campaign_code} @ {self.bucket:%Y-%m-%d %H:%M} - {self.assigned} atama"
 
 class UserBarcode(models.Model):
     """Kullanıcıya atanan barkodlar"""
@@ -83,16 +459,85 @@ class UserBarcode(models.Model):
     def __str__(self):
         return f"{self.user.phone_number} - {self.campaign_barcode.barcode_code}"
 
+    # Kuyruktaki atama en fazla bu kadar "hazırlanıyor" gösterilir; sonra istekte atanır
+    PENDING_ASSIGNMENT_MAX_SECONDS = 30
+
+    @classmethod
+    def has_pending_assignment(cls, user):
+        """Kullanıcı için kuyrukta yakında çalışacak bir barkod atama işi var mı?
+
+        Denemesi başarısız olup geri çekilmede bekleyen ya da PENDING_ASSIGNMENT_MAX_SECONDS'tan
+        eski işler sayılmaz; çağıran barkodu hemen atar, iş çalışınca barkodu olan kullanıcıyı atlar.
+        """
+        from jobs.models import Job
+        from .jobs import ASSIGN_BARCODE_JOB
+        return Job.objects.filter(
+            kind=ASSIGN_BARCODE_JOB,
+            key=str(user.pk),
+            status__in=Job.ACTIVE_STATUSES,
+            last_error='',
+            created_at__gte=timezone.now() - timedelta(seconds=cls.PENDING_ASSIGNMENT_MAX_SECONDS),
+        ).exists()
+
     @classmethod
-    def assign_barcode_to_user(cls, user):
-        """Kullanıcıya barkod ata"""
+    def assign_barcodes_to_users(cls, user_ids):
+        """Birden fazla kullanıcıya tek transaction içinde barkod ata; atanamayan kullanıcı id'lerini döndür"""
+        import logging
+        logger = logging.getLogger(__name__)
+
+        active_campaign = Campaign.get_active_campaign()
+        if not active_campaign:
+            logger.warning(f"ASSIGN: Aktif kampanya bulunamadı, {len(user_ids)} kullanıcı bekletiliyor")
+            return set(user_ids)
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            # Silinmiş ya da bu arada barkod almış kullanıcıları ele
+            pending_ids = list(
+                User.objects.filter(id__in=user_ids, user_barcode__isnull=True, deleted_at__isnull=True)
+                .order_by('id').values_list('id', flat=True)
+            )
+            barcodes = CampaignBarcode.claim_many(active_campaign.campaign_code, len(pending_ids))
+            cls.objects.bulk_create([
+                cls(user_id=user_id, campaign_barcode=barcode)
+                for user_id, barcode in zip(pending_ids, barcodes)
+            ])
+            if barcodes:
+                CampaignBarcodeStats.apply(
+                    active_campaign.campaign_code, assigned=len(barcodes), available=-len(barcodes)
+                )
+
+        logger.info(f"ASSIGN: {len(barcodes)} kullanıcıya toplu barkod atandı - Kampanya: {active_campaign.campaign_code}")
+        unassigned = set(pending_ids[len(barcodes):])
+        from .telemetry import get_telemetry
+        # Partinin toplam süresi yazılır; ortalama atanan sayısına bölünerek kullanıcı başına çıkar
+        get_telemetry().record(
+            active_campaign.campaign_code,
+            assigned=len(barcodes),
+            failed=len(unassigned),
+            latency_ms=(time.perf_counter() - started) * 1000 if barcodes else None,
+        )
+        if unassigned:
+            logger.warning(f"ASSIGN: Müsait barkod kalmadı, {len(unassigned)} kullanıcı bekletiliyor - Kampanya: {active_campaign.campaign_code}")
+        return unassigned
+
+    @classmethod
+    def assign_barcode_to_user(cls, user, is_new=False):
+        """Kullanıcıya barkod ata.
+
+        is_new: kullanıcı bu transaction içinde oluşturuldu; mevcut barkod
+        kontrolü atlanır ve atama savepoint açmadan çağıranın transaction'ına
+        katılır (hata olursa kayıt da geri alınır).
+        """
         import logging
         logger = logging.getLogger(__name__)
         
-        # Zaten barkodu varsa atama
-        if hasattr(user, 'user_barcode'):
-            logger.info(f"ASSIGN: Kullanıcının zaten barkodu var: {user.phone_number}")
-            return user.user_barcode
+        # Zaten barkodu varsa atama (kampanyasıyla birlikte tek sorguda)
+        if not is_new:
+            existing_barcode = cls.objects.select_related('campaign_barcode__campaign').filter(user=user).first()
+            if existing_barcode:
+                logger.info(f"ASSIGN: Kullanıcının zaten barkodu var: {user.phone_number}")
+                return existing_barcode
 
         # Aktif kampanyayı bul
         active_campaign = Campaign.get_active_campaign()
@@ -102,39 +547,510 @@ class UserBarcode(models.Model):
             logger.warning(f"ASSIGN: Aktif kampanya bulunamadı")
             return None
 
-        # Tüm kampanyaları listele (debug için)
-        all_campaigns = Campaign.objects.all()
-        logger.info(f"ASSIGN: Tüm kampanyalar: {[c.campaign_code for c in all_campaigns]}")
-        
-        # Aktif kampanyadan atanmamış bir barkod bul
-        available_barcode = CampaignBarcode.objects.filter(
-            campaign_code=active_campaign.campaign_code,
-            is_assigned=False,
-            is_active=True
-        ).first()
-        
-        # Debug: Bu kampanya kodunda kaç barkod var?
-        total_barcodes = CampaignBarcode.objects.filter(campaign_code=active_campaign.campaign_code).count()
-        available_count = CampaignBarcode.objects.filter(
-            campaign_code=active_campaign.campaign_code,
-            is_assigned=False,
-            is_active=True
-        ).count()
+
+        # Barkodu sahiplen ve kullanıcıya ata - tek transaction
+        from .pool import get_barcode_pool
+        from .telemetry import get_telemetry
+        pool = get_barcode_pool()
+        telemetry = get_telemetry()
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(savepoint=not is_new):
+                # Önce süreç havuzundaki kiralık bloktan, yoksa doğrudan veritabanından
+                available_barcode = pool.take(active_campaign.campaign_code) if pool else None
+                if available_barcode is None:
+                    available_barcode = CampaignBarcode.claim_available(active_campaign.campaign_code)
+                if not available_barcode:
+                    logger.warning(f"ASSIGN: Müsait barkod bulunamadı - Kampanya: {active_campaign.campaign_code}")
+                    telemetry.record(active_campaign.campaign_code, failed=1)
+                    return None
+                # Kampanya zaten bellekte; serializer için tekrar sorgulanmasın
+                if available_barcode.campaign_id == active_campaign.pk:
+                    available_barcode.campaign = active_campaign
+
+                user_barcode = cls.objects.create(
+                    user=user,
+                    campaign_barcode=available_barcode
+                )
+                CampaignBarcodeStats.apply(active_campaign.campaign_code, assigned=1, available=-1)
+        except IntegrityError:
+            if is_new:
+                raise
+            # Aynı kullanıcı için paralel bir istek önce davrandı; sahiplenilen barkod rollback ile serbest kaldı
+            logger.info(f"ASSIGN: Paralel atama tespit edildi, mevcut barkod döndürülüyor: {user.phone_number}")
+            return cls.objects.select_related('campaign_barcode__campaign').filter(user=user).first()
         
-        logger.info(f"ASSIGN: Kampanya {active_campaign.campaign_code} - Toplam: {total_barcodes}, Müsait: {available_count}")
+        telemetry.record(
+            active_campaign.campaign_code, assigned=1, latency_ms=(time.perf_counter() - started) * 1000
+        )
+        logger.info(f"ASSIGN: Barkod atandı: {user.phone_number} -> {available_barcode.barcode_code}")
+        return user_barcode
 
-        if not available_barcode:
-            logger.warning(f"ASSIGN: Müsait barkod bulunamadı - Kampanya: {active_campaign.campaign_code}")
-            return None
 
-        # Barkodu kullanıcıya ata
-        available_barcode.is_assigned = True
-        available_barcode.save()
+    @classmethod
+    def release_for_deleted_users(cls, user_ids):
+        """Silinen kullanıcıların barkodlarını kampanya politikasına göre bırak; {'reused', 'retired'} döndür.
+
+        purge_deleted'in transaction'ı içinde çağrılır. Atamalar geçmişe yazılır,
+        UserBarcode satırları sinyalsiz tek DELETE ile silinir ve kodlar kampanya
+        başına bir UPDATE ile havuza döner ya da pasifleşir; nesne başına sorgu yoktur.
+        Başlamamış kampanyalardaki bekleyen atamaların kodları her zaman havuza döner.
+        """
+        PendingUserBarcode.release_for_deleted_users(user_ids)
+        rows = list(cls.objects.filter(user_id__in=user_ids).values_list(
+            'id', 'user_id', 'campaign_barcode_id', 'assigned_at',
+            'campaign_barcode__barcode_code', 'campaign_barcode__campaign_code',
+            'campaign_barcode__is_active', 'campaign_barcode__campaign__released_barcode_policy',
+        ))
+        # Kullanıcının önceki atamaları ve kasa kayıtları kullanıcısız kalır
+        UserBarcodeHistory.objects.filter(user_id__in=user_ids).update(user=None)
+        if not rows:
+            return {'reused': 0, 'retired': 0}
+        BarcodeRedemption.objects.filter(user_barcode_id__in=[row[0] for row in rows]).update(user_barcode=None)
+
+        now = timezone.now()
+        UserBarcodeHistory.objects.bulk_create([
+            UserBarcodeHistory(
+                user=None, campaign_barcode_id=barcode_id, barcode_code=code, campaign_code=campaign_code,
+                assigned_at=assigned_at, released_at=now, reason=UserBarcodeHistory.REASON_ACCOUNT_DELETED,
+            )
+            for _, _, barcode_id, assigned_at, code, campaign_code, _, _ in rows
+        ])
+        # post_delete sinyali (touch_released_barcode) satır başına UPDATE atardı; updated_at aşağıda toplu ilerler
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {connection.ops.quote_name(cls._meta.db_table)} '
+                f'WHERE id IN ({", ".join(["%s"] * len(rows))})',
+                [row[0] for row in rows]
+            )
+
+        retire, reuse = [], []
+        deltas = {}
+        for _, _, barcode_id, _, _, campaign_code, is_active, policy in rows:
+            retired = policy == Campaign.RELEASED_BARCODE_RETIRE
+            (retire if retired else reuse).append(barcode_id)
+            counters = deltas.setdefault(campaign_code, {'assigned': 0, 'available': 0, 'inactive': 0})
+            counters['assigned'] -= 1
+            if is_active:
+                counters['inactive' if retired else 'available'] += 1
+
+        released = {'is_assigned': False, 'lease_owner': '', 'leased_until': None, 'updated_at': now}
+        if reuse:
+            CampaignBarcode.objects.filter(id__in=reuse).update(**released)
+        if retire:
+            CampaignBarcode.objects.filter(id__in=retire).update(is_active=False, **released)
+        for campaign_code, counters in deltas.items():
+            CampaignBarcodeStats.apply(campaign_code, **counters)
+        return {'reused': len(reuse), 'retired': len(retire)}
+
+    # Devirde tek transaction'da eşleştirilecek en fazla kullanıcı
+    ROLLOVER_CHUNK_SIZE = 10000
+
+    @classmethod
+    def rollover_chunk(cls, campaign_code, after_user_id=0, size=ROLLOVER_CHUNK_SIZE, stage=False):
+        """Kampanya devrinin bir parçası: (eşleşen kullanıcı, son kullanıcı id) döndürür.
+
+        after_user_id'den sonraki, hedef kampanyadan barkodu ya da bekleyen ataması
+        olmayan aktif kullanıcılar ile kampanyanın müsait kodları id sıralarındaki
+        ROW_NUMBER() değerleriyle SQL içinde eşleştirilir. Eşleşmeler geçici
+        tablolarda tutulur ve yeni kodlar atanmış işaretlenir. stage ile eşleşmeler
+        PendingUserBarcode'a yazılır, kullanıcılar eski kodlarını kampanya başlayana
+        kadar (activate_pending_chunk) kullanır; yoksa atamalar hemen değiştirilir
+        (_swap_rollover_pairs). Hepsi tek transaction'dır; yarıda kalan devir aynı
+        komutla kaldığı yerden sürer çünkü hedef kampanyadan barkodu olanlar zaten elenir.
+        """
+        quote = connection.ops.quote_name
+        users = quote(User._meta.db_table)
+        user_barcodes = quote(cls._meta.db_table)
+        barcodes = quote(CampaignBarcode._meta.db_table)
+        pending = quote(PendingUserBarcode._meta.db_table)
+        ranked_users = quote('barcode_rollover_users')
+        ranked_codes = quote('barcode_rollover_codes')
+        pairs = quote('barcode_rollover_pairs')
+        lock = ' FOR UPDATE SKIP LOCKED' if connection.features.has_select_for_update_skip_locked else ''
+        now = timezone.now()
+        adapt = connection.ops.adapt_datetimefield_value
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Sıra numaraları birincil anahtar olan geçici tablolara yazılır; eşleştirme
+            # alt sorgular arası iç içe döngü yerine indeksli birleştirme olur
+            for table, column in ((ranked_users, 'user_id'), (ranked_codes, 'barcode_id')):
+                cursor.execute(f'CREATE TEMPORARY TABLE IF NOT EXISTS {table} (rn bigint PRIMARY KEY, {column} bigint NOT NULL)')
+                cursor.execute(f'DELETE FROM {table}')
+            cls._reset_rollover_pairs(cursor)
+
+            cursor.execute(
+                f'INSERT INTO {ranked_users} (rn, user_id) '
+                f'SELECT ROW_NUMBER() OVER (ORDER BY id), id FROM ('
+                f'SELECT usr.id FROM {users} usr '
+                f'WHERE usr.id > %s AND usr.is_active AND usr.deleted_at IS NULL AND NOT EXISTS ('
+                f'SELECT 1 FROM {user_barcodes} ub JOIN {barcodes} cb ON cb.id = ub.campaign_barcode_id '
+                f'WHERE ub.user_id = usr.id AND cb.campaign_code = %s'
+                f') AND NOT EXISTS ('
+                f'SELECT 1 FROM {pending} pb WHERE pb.user_id = usr.id AND pb.campaign_code = %s'
+                f') ORDER BY usr.id LIMIT %s'
+                f') eligible',
+                [after_user_id, campaign_code, campaign_code, size]
+            )
+            cursor.execute(
+                f'INSERT INTO {ranked_codes} (rn, barcode_id) '
+                f'SELECT ROW_NUMBER() OVER (ORDER BY id), id FROM ('
+                f'SELECT id FROM {barcodes} '
+                # Koşul barcode_free_by_campaign_idx kısmi indeksinin tanımıyla birebir aynı
+                f'WHERE campaign_code = %s AND (is_active AND NOT is_assigned) '
+                f'AND (leased_until IS NULL OR leased_until < %s) '
+                f'ORDER BY id LIMIT %s{lock}'
+                f') free',
+                [campaign_code, adapt(now), size]
+            )
+            cursor.execute(
+                f'INSERT INTO {pairs} (user_id, barcode_id) '
+                f'SELECT u.user_id, c.barcode_id FROM {ranked_users} u JOIN {ranked_codes} c ON c.rn = u.rn'
+            )
+            cursor.execute(f'SELECT COUNT(*), MAX(user_id) FROM {pairs}')
+            paired, last_user_id = cursor.fetchone()
+            if not paired:
+                return 0, after_user_id
+
+            if stage:
+                cursor.execute(
+                    f'INSERT INTO {pending} (user_id, campaign_barcode_id, campaign_code, created_at) '
+                    f'SELECT user_id, barcode_id, %s, %s FROM {pairs}',
+                    [campaign_code, adapt(now)]
+                )
+            else:
+                cls._swap_rollover_pairs(cursor, now)
+            cursor.execute(
+                f"UPDATE {barcodes} SET is_assigned = %s, lease_owner = '', leased_until = NULL, updated_at = %s "
+                f'WHERE id IN (SELECT barcode_id FROM {pairs})',
+                [True, adapt(now)]
+            )
+            CampaignBarcodeStats.apply(campaign_code, assigned=paired, available=-paired)
+        return paired, last_user_id
+
+    @classmethod
+    def activate_pending_chunk(cls, campaign_code, after_user_id=0, size=ROLLOVER_CHUNK_SIZE):
+        """Kampanya başlarken bekleyen atamaların bir parçasını etkinleştir; (etkinleşen, son kullanıcı id) döndürür.
+
+        Kodlar devirde zaten atanmış işaretlendiği için yalnızca kullanıcıların
+        atamaları değiştirilir ve eski kodlar bırakılır. Silinmiş işaretli
+        kullanıcıların bekleyen atamaları purge_deleted'e kalır.
+        """
+        quote = connection.ops.quote_name
+        users = quote(User._meta.db_table)
+        pending = quote(PendingUserBarcode._meta.db_table)
+        pairs = quote('barcode_rollover_pairs')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cls._reset_rollover_pairs(cursor)
+            cursor.execute(
+                f'INSERT INTO {pairs} (user_id, barcode_id) '
+                f'SELECT pb.user_id, pb.campaign_barcode_id FROM {pending} pb JOIN {users} usr ON usr.id = pb.user_id '
+                f'WHERE pb.campaign_code = %s AND pb.user_id > %s AND usr.deleted_at IS NULL '
+                f'ORDER BY pb.user_id LIMIT %s',
+                [campaign_code, after_user_id, size]
+            )
+            cursor.execute(f'SELECT COUNT(*), MAX(user_id) FROM {pairs}')
+            activated, last_user_id = cursor.fetchone()
+            if not activated:
+                return 0, after_user_id
+
+            cls._swap_rollover_pairs(cursor, timezone.now())
+            cursor.execute(
+                f'DELETE FROM {pending} WHERE campaign_code = %s AND user_id IN (SELECT user_id FROM {pairs})',
+                [campaign_code]
+            )
+        return activated, last_user_id
+
+    @staticmethod
+    def _reset_rollover_pairs(cursor):
+        pairs = connection.ops.quote_name('barcode_rollover_pairs')
+        cursor.execute(f'CREATE TEMPORARY TABLE IF NOT EXISTS {pairs} (user_id bigint PRIMARY KEY, barcode_id bigint NOT NULL)')
+        cursor.execute(f'DELETE FROM {pairs}')
 
-        user_barcode = cls.objects.create(
-            user=user,
-            campaign_barcode=available_barcode
+    @classmethod
+    def _swap_rollover_pairs(cls, cursor, now):
+        """Geçici eşleşme tablosundaki kullanıcıların atamalarını yeni kodlara geçir.
+
+        Eski atamalar geçmişe yazılır, eski kodlar kampanyalarının politikasına göre
+        havuza döner ya da pasifleşir ve o kampanyaların sayaçları düzeltilir;
+        UserBarcode satırları güncellenir ya da eklenir.
+        """
+        quote = connection.ops.quote_name
+        user_barcodes = quote(cls._meta.db_table)
+        barcodes = quote(CampaignBarcode._meta.db_table)
+        campaigns = quote(Campaign._meta.db_table)
+        history = quote(UserBarcodeHistory._meta.db_table)
+        pairs = quote('barcode_rollover_pairs')
+        adapt = connection.ops.adapt_datetimefield_value
+        old_barcodes = (
+            f'SELECT campaign_barcode_id FROM {user_barcodes} WHERE user_id IN (SELECT user_id FROM {pairs})'
         )
-        
-        logger.info(f"ASSIGN: Barkod atandı: {user.phone_number} -> {available_barcode.barcode_code}")
-        return user_barcode
\ No newline at end of file
+
+        # Eski atamalar geçmişe
+        cursor.execute(
+            f'INSERT INTO {history} (user_id, campaign_barcode_id, barcode_code, campaign_code, assigned_at, released_at, reason) '
+            f'SELECT ub.user_id, ub.campaign_barcode_id, cb.barcode_code, cb.campaign_code, ub.assigned_at, %s, %s '
+            f'FROM {user_barcodes} ub JOIN {barcodes} cb ON cb.id = ub.campaign_barcode_id '
+            f'WHERE ub.user_id IN (SELECT user_id FROM {pairs})',
+            [adapt(now), UserBarcodeHistory.REASON_ROLLOVER]
+        )
+        # Eski kodlar release_for_deleted_users'taki politikayla bırakılır
+        cursor.execute(
+            f'SELECT cb.campaign_code, cb.is_active, c.released_barcode_policy, COUNT(*) '
+            f'FROM {barcodes} cb LEFT JOIN {campaigns} c ON c.id = cb.campaign_id '
+            f'WHERE cb.id IN ({old_barcodes}) '
+            f'GROUP BY cb.campaign_code, cb.is_active, c.released_barcode_policy'
+        )
+        deltas = {}
+        for campaign_code, is_active, policy, count in cursor.fetchall():
+            retired = policy == Campaign.RELEASED_BARCODE_RETIRE
+            counters = deltas.setdefault(campaign_code, {'assigned': 0, 'available': 0, 'inactive': 0})
+            counters['assigned'] -= count
+            if is_active:
+                counters['inactive' if retired else 'available'] += count
+        cursor.execute(
+            f"UPDATE {barcodes} SET is_assigned = %s, lease_owner = '', leased_until = NULL, updated_at = %s, "
+            f'is_active = CASE WHEN campaign_id IN (SELECT id FROM {campaigns} WHERE released_barcode_policy = %s) '
+            f'THEN %s ELSE is_active END '
+            f'WHERE id IN ({old_barcodes})',
+            [False, adapt(now), Campaign.RELEASED_BARCODE_RETIRE, False]
+        )
+        cursor.execute(
+            f'UPDATE {user_barcodes} SET '
+            f'campaign_barcode_id = (SELECT barcode_id FROM {pairs} p WHERE p.user_id = {user_barcodes}.user_id), '
+            f'assigned_at = %s '
+            f'WHERE user_id IN (SELECT user_id FROM {pairs})',
+            [adapt(now)]
+        )
+        cursor.execute(
+            f'INSERT INTO {user_barcodes} (user_id, campaign_barcode_id, assigned_at) '
+            f'SELECT user_id, barcode_id, %s FROM {pairs} '
+            f'WHERE user_id NOT IN (SELECT user_id FROM {user_barcodes})',
+            [adapt(now)]
+        )
+        for campaign_code, counters in deltas.items():
+            CampaignBarcodeStats.apply(campaign_code, **counters)
+
+
+class UserBarcodeHistory(models.Model):
+    """Kullanıcının önceki barkod atamaları (kampanya devri vb.)"""
+    REASON_ROLLOVER = 'rollover'
+    REASON_ACCOUNT_DELETED = 'account_deleted'
+    REASON_CHOICES = [
+        (REASON_ROLLOVER, 'Kampanya devri'),
+        (REASON_ACCOUNT_DELETED, 'Hesap silindi'),
+    ]
+
+    # Hesap silinse de kodun kimde olduğu geçmişi kalsın (kasa itirazları için)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='barcode_history', verbose_name='Kullanıcı')
+    campaign_barcode = models.ForeignKey(CampaignBarcode, on_delete=models.SET_NULL, blank=True, null=True, related_name='history', verbose_name='Kampanya Barkodu')
+    barcode_code = models.CharField(max_length=13, verbose_name='Barkod Kodu')
+    campaign_code = models.CharField(max_length=50, verbose_name='Kampanya Kodu')
+    assigned_at = models.DateTimeField(verbose_name='Atanma Tarihi')
+    released_at = models.DateTimeField(verbose_name='Bırakılma Tarihi')
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, verbose_name='Sebep')
+
+    class Meta:
+        verbose_name = 'Barkod Atama Geçmişi'
+        verbose_name_plural = 'Barkod Atama Geçmişi'
+        ordering = ['-released_at']
+        indexes = [
+            models.Index(fields=['user', 'released_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.barcode_code} ({self.campaign_code})"
+
+class PendingUserBarcode(models.Model):
+    """Henüz başlamamış kampanyaya devirde ayrılan barkod; kampanya başlayınca kullanıcıya geçer"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_barcodes', verbose_name='Kullanıcı')
+    campaign_barcode = models.OneToOneField(CampaignBarcode, on_delete=models.CASCADE, related_name='pending_assignment', verbose_name='Kampanya Barkodu')
+    campaign_code = models.CharField(max_length=50, verbose_name='Kampanya Kodu')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+
+    class Meta:
+        verbose_name = 'Bekleyen Barkod Ataması'
+        verbose_name_plural = 'Bekleyen Barkod Atamaları'
+        constraints = [
+            models.UniqueConstraint(fields=['campaign_code', 'user'], name='pending_barcode_per_campaign_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.campaign_barcode_id} ({self.campaign_code})"
+
+    @classmethod
+    def release_for_deleted_users(cls, user_ids):
+        """Silinen kullanıcılara ayrılmış kodları havuza döndür; kullanıcı kodu hiç görmediği için emekliye ayrılmaz"""
+        rows = list(cls.objects.filter(user_id__in=user_ids).values_list(
+            'id', 'campaign_barcode_id', 'campaign_code', 'campaign_barcode__is_active'
+        ))
+        if not rows:
+            return 0
+        cls.objects.filter(id__in=[row[0] for row in rows]).delete()
+        CampaignBarcode.objects.filter(id__in=[row[1] for row in rows]).update(
+            is_assigned=False, lease_owner='', leased_until=None, updated_at=timezone.now()
+        )
+        deltas = {}
+        for _, _, campaign_code, is_active in rows:
+            counters = deltas.setdefault(campaign_code, {'assigned': 0, 'available': 0})
+            counters['assigned'] -= 1
+            if is_active:
+                counters['available'] += 1
+        for campaign_code, counters in deltas.items():
+            CampaignBarcodeStats.apply(campaign_code, **counters)
+        return len(rows)
+
+
+class BarcodeRedemption(models.Model):
+    """Kasada kullanılan barkodların defteri - her satır bir POS işlemi"""
+    transaction_id = models.CharField(max_length=64, unique=True, verbose_name='İşlem No')
+    user_barcode = models.ForeignKey(UserBarcode, on_delete=models.SET_NULL, blank=True, null=True, related_name='redemptions', verbose_name='Kullanıcı Barkodu')
+    # Kullanıcı silinse de defter okunabilir kalsın
+    barcode_code = models.CharField(max_length=13, verbose_name='Barkod Kodu')
+    campaign_code = models.CharField(max_length=50, verbose_name='Kampanya Kodu')
+    store_code = models.CharField(max_length=50, verbose_name='Mağaza Kodu')
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Tutar')
+    redeemed_at = models.DateTimeField(verbose_name='Kullanım Tarihi')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Kayıt Tarihi')
+
+    # Tek istekte kabul edilen en fazla satır
+    BATCH_LIMIT = 5000
+
+    class Meta:
+        verbose_name = 'Barkod Kullanımı'
+        verbose_name_plural = 'Barkod Kullanımları'
+        ordering = ['-redeemed_at']
+        indexes = [
+            models.Index(fields=['store_code', 'redeemed_at']),
+            models.Index(fields=['campaign_code', 'redeemed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_id} - {self.barcode_code} ({self.store_code})"
+
+    @classmethod
+    def parse_record(cls, record):
+        """NDJSON satırını doğrula; (alanlar, None) ya da (None, hata mesajı) döndür"""
+        from decimal import Decimal, InvalidOperation
+        from django.utils.dateparse import parse_datetime
+
+        if not isinstance(record, dict):
+            return None, 'Satır bir JSON nesnesi olmalı'
+        # 0 tutarı geçerli; yalnızca hiç gelmeyen ya da boş alanlar eksik sayılır
+        missing = [
+            name for name in ('transaction_id', 'barcode_code', 'store_code', 'amount')
+            if record.get(name) is None or record.get(name) == ''
+        ]
+        if missing:
+            return None, f"Eksik alan: {', '.join(missing)}"
+
+        transaction_id = str(record['transaction_id'])
+        store_code = str(record['store_code'])
+        campaign_code = str(record.get('campaign_code') or '')
+        if len(transaction_id) > 64 or len(store_code) > 50 or len(campaign_code) > 50:
+            return None, 'transaction_id en fazla 64, store_code ve campaign_code en fazla 50 karakter olabilir'
+        try:
+            amount = Decimal(str(record['amount'])).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return None, f"Geçersiz tutar: {record['amount']}"
+        if amount < 0 or amount >= Decimal('100000000'):
+            return None, f"Geçersiz tutar: {record['amount']}"
+
+        redeemed_at = timezone.now()
+        if record.get('redeemed_at'):
+            redeemed_at = parse_datetime(str(record['redeemed_at']))
+            if redeemed_at is None:
+                return None, f"Geçersiz tarih: {record['redeemed_at']}"
+            if timezone.is_naive(redeemed_at):
+                redeemed_at = timezone.make_aware(redeemed_at)
+
+        return {
+            'transaction_id': transaction_id,
+            'barcode_code': str(record['barcode_code']),
+            'campaign_code': campaign_code,
+            'store_code': store_code,
+            'amount': amount,
+            'redeemed_at': redeemed_at,
+        }, None
+
+    @classmethod
+    def ingest(cls, lines):
+        """Bir partiyi toplu yaz; satır sırasıyla sonuç listesi döndür.
+
+        lines: [(satır no, alanlar ya da None, hata mesajı ya da None)].
+        İşlem numarası ve barkodlar tek sorguda kontrol edilir, yeni satırlar
+        tek transaction içinde bulk_create ile yazılır. Aynı işlem numarası
+        (partide ya da defterde) tekrar gelirse 'duplicate' döner; istemci
+        partiyi güvenle yeniden gönderebilir.
+        """
+        valid = [fields for _, fields, _ in lines if fields]
+        transaction_ids = {fields['transaction_id'] for fields in valid}
+        existing = set(
+            cls.objects.filter(transaction_id__in=transaction_ids).values_list('transaction_id', flat=True)
+        )
+        # Kodlar kampanya içinde benzersiz; aynı kod birden çok kampanyada atanmış olabilir
+        user_barcodes = {}
+        for user_barcode in UserBarcode.objects.select_related('campaign_barcode').filter(
+            campaign_barcode__barcode_code__in={fields['barcode_code'] for fields in valid}
+        ):
+            user_barcodes.setdefault(user_barcode.campaign_barcode.barcode_code, []).append(user_barcode)
+        active_campaign = Campaign.get_active_campaign() if valid else None
+        active_code = active_campaign.campaign_code if active_campaign else None
+
+        results = []
+        redemptions = []
+        seen = set()
+        for line, fields, error in lines:
+            if error:
+                results.append({'line': line, 'status': 'error', 'message': error})
+                continue
+            transaction_id = fields['transaction_id']
+            result = {'line': line, 'transaction_id': transaction_id}
+            if transaction_id in existing or transaction_id in seen:
+                results.append({**result, 'status': 'duplicate'})
+                continue
+            user_barcode = cls._resolve_user_barcode(
+                user_barcodes.get(fields['barcode_code'], []), fields['campaign_code'], active_code
+            )
+            if user_barcode is None:
+                results.append({**result, 'status': 'rejected', 'message': 'Barkod bir kullanıcıya atanmamış'})
+                continue
+            seen.add(transaction_id)
+            redemptions.append(cls(
+                user_barcode=user_barcode,
+                **{**fields, 'campaign_code': user_barcode.campaign_barcode.campaign_code}
+            ))
+            results.append({**result, 'status': 'created'})
+
+        if redemptions:
+            # Eşzamanlı gönderilen aynı işlem numarası benzersizlik kısıtına takılır ve atlanır
+            with transaction.atomic():
+                cls.objects.bulk_create(redemptions, batch_size=1000, ignore_conflicts=True)
+                # bulk_create her nesneye kendi created_at'ini yazar; defterdeki değer farklıysa
+                # satırı başka bir istek eklemiştir
+                stored = dict(
+                    cls.objects.filter(transaction_id__in=seen).values_list('transaction_id', 'created_at')
+                )
+            dropped = {
+                redemption.transaction_id for redemption in redemptions
+                if stored.get(redemption.transaction_id) != redemption.created_at
+            }
+            if dropped:
+                import logging
+                logging.getLogger(__name__).info(f"Eşzamanlı gönderilen {len(dropped)} işlem numarası atlandı")
+                for result in results:
+                    if result['status'] == 'created' and result['transaction_id'] in dropped:
+                        result['status'] = 'duplicate'
+        return results
+
+    @staticmethod
+    def _resolve_user_barcode(candidates, campaign_code, active_code):
+        """Kasa kampanya kodu gönderdiyse onu, göndermediyse aktif kampanyayı ya da tek adayı seç"""
+        wanted = campaign_code or active_code
+        for user_barcode in candidates:
+            if user_barcode.campaign_barcode.campaign_code == wanted:
+                return user_barcode
+        if not campaign_code and len(candidates) == 1:
+            return candidates[0]
+        return None
@@ -0,0 +1,171 @@
+"""Süreç başına önceden kiralanmış barkod blokları.
+
+Her süreç müsait barkodlardan bir blok kiralar (lease_owner/leased_until) ve
+atamaları bellekten karşılar; atama başına yalnızca kirayı onaylayan tek bir
+koşullu UPDATE çalışır. Blok alt eşiğin altına düştüğünde arka planda yeniden
+doldurulur ve mevcut kira uzatılır. Çöken ya da süresi dolan kiralar
+CampaignBarcode.available_filter() koşuluna geri döndüğü için ayrıca
+temizlenmesi gerekmez.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BLOCK_SIZE': 200,
+    'LOW_WATER_MARK': 50,
+    'LEASE_SECONDS': 600,
+}
+
+
+class BarcodePool:
+    """Kampanya başına kiralık barkod kuyruğu"""
+
+    # Kira onayı başarısız olursa blok yenilenip en fazla bu kadar denenir
+    MAX_ATTEMPTS = 3
+    # Tek süreç kampanyada kalan müsait barkodların en fazla 1/FAIR_SHARE kadarını kiralar
+    FAIR_SHARE = 10
+
+    def __init__(self, block_size, low_water_mark, lease_seconds):
+        self.block_size = block_size
+        self.low_water_mark = low_water_mark
+        self.lease_duration = timedelta(seconds=lease_seconds)
+        self.pid = os.getpid()
+        self.owner = f'{socket.gethostname()}:{self.pid}:{uuid.uuid4().hex[:8]}'
+        self._queues = {}
+        self._lease_expiry = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+    def take(self, campaign_code):
+        """Kiralık bloktan bir barkod al ve atanmış olarak işaretle; yoksa None"""
+        from .models import CampaignBarcode
+
+        for _ in range(self.MAX_ATTEMPTS):
+            with self._lock:
+                queue = self._queues.get(campaign_code)
+                expiry = self._lease_expiry.get(campaign_code)
+                if not queue or expiry is None or expiry <= timezone.now():
+                    queue = None
+                else:
+                    barcode = queue.popleft()
+                    remaining = len(queue)
+
+            if queue is None:
+                # Blok boş ya da kira dolmuş: senkron olarak yeni blok kirala
+                if not self._refill(campaign_code):
+                    return None
+                continue
+
+            if remaining < self.low_water_mark:
+                self._refill_in_background(campaign_code)
+
+            if CampaignBarcode.confirm_lease(barcode.pk, self.owner):
+                barcode.is_assigned = True
+                barcode.lease_owner = ''
+                barcode.leased_until = None
+                return barcode
+            # Kira başka bir sürece geçmiş (ör. rollback ya da süre aşımı); bloğun geri kalanı da güvenilmez
+            logger.warning(f"POOL: Kira kaybedildi, blok yenileniyor: {campaign_code} - {barcode.barcode_code}")
+            with self._lock:
+                self._queues.pop(campaign_code, None)
+                self._lease_expiry.pop(campaign_code, None)
+        return None
+
+    def release(self):
+        """Süreç kapanırken kalan kiraları serbest bırak"""
+        from .models import CampaignBarcode
+
+        with self._lock:
+            self._queues.clear()
+            self._lease_expiry.clear()
+        try:
+            released = CampaignBarcode.objects.filter(lease_owner=self.owner, is_assigned=False).update(
+                lease_owner='', leased_until=None
+            )
+        except Exception as e:
+            # Kiralar süre aşımıyla zaten geri kazanılacak
+            logger.warning(f"POOL: Kiralar serbest bırakılamadı ({self.owner}): {str(e)}")
+            return
+        logger.info(f"POOL: {released} kiralık barkod serbest bırakıldı ({self.owner})")
+
+    def _refill(self, campaign_code):
+        """Kirayı uzat ve bloğu block_size'a tamamla; kirada barkod kaldıysa True"""
+        from .models import CampaignBarcode, CampaignBarcodeStats
+
+        leased_until = timezone.now() + self.lease_duration
+        with self._lock:
+            held = len(self._queues.get(campaign_code) or ())
+        # Eldeki kiraları uzat; uzatılamayanlar (başkasına geçmiş) onayda elenir
+        CampaignBarcode.objects.filter(
+            campaign_code=campaign_code, lease_owner=self.owner, is_assigned=False
+        ).update(leased_until=leased_until)
+
+        leased = []
+        if held < self.block_size:
+            # Azalan kampanyada bloklar küçülür; kalan barkodlar boşta bekleyen tek bir süreçte toplanmaz
+            remaining = CampaignBarcodeStats.for_campaign(campaign_code).available
+            size = min(self.block_size - held, max(1, remaining // self.FAIR_SHARE))
+            leased = CampaignBarcode.lease_block(campaign_code, self.owner, size, leased_until)
+
+        with self._lock:
+            queue = self._queues.setdefault(campaign_code, deque())
+            queue.extend(leased)
+            self._lease_expiry[campaign_code] = leased_until
+            available = len(queue)
+        if leased:
+            logger.info(f"POOL: {campaign_code} için {len(leased)} barkod kiralandı ({self.owner})")
+        return available > 0
+
+    def _refill_in_background(self, campaign_code):
+        with self._lock:
+            if campaign_code in self._refilling:
+                return
+            self._refilling.add(campaign_code)
+
+        def run():
+            try:
+                self._refill(campaign_code)
+            except Exception as e:
+                logger.error(f"POOL: Arka plan doldurma hatası: {campaign_code} - {str(e)}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(campaign_code)
+                connection.close()
+
+        threading.Thread(target=run, name=f'barcode-pool-{campaign_code}', daemon=True).start()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_barcode_pool():
+    """Süreç düzeyindeki havuzu döndür; BARCODE_POOL['ENABLED'] kapalıysa None"""
+    global _pool
+    config = {**DEFAULTS, **getattr(settings, 'BARCODE_POOL', {})}
+    if not config['ENABLED']:
+        return None
+
+    with _pool_lock:
+        # fork sonrası çocuk süreç ebeveynin kiralarını kullanmamalı
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = BarcodePool(
+                block_size=config['BLOCK_SIZE'],
+                low_water_mark=config['LOW_WATER_MARK'],
+                lease_seconds=config['LEASE_SECONDS'],
+            )
+            atexit.register(_pool.release)
+        return _pool
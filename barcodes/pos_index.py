@@ -0,0 +1,210 @@
+"""Kasa (POS) doğrulaması için süreç içi barkod indeksi.
+
+Barkod kodları 6 haneli sayılar olduğundan aktif kampanyanın bütün kod uzayı
+1.000.000 baytlık tek bir bytearray'e sığar: indeks kodun sayısal değeri,
+değer kodun durumudur. Kontrol basamaklı uzun kodlar (bkz. codes.py) ayrı bir
+sözlükte tutulur; kontrol basamağı tutmayan kodlar sözlüğe bakılmadan
+reddedilir. Okumalar veritabanına hiç gitmez.
+
+İndeks aktif kampanyanın CampaignBarcode satırlarından kurulur ve
+REFRESH_SECONDS'ta bir, updated_at üzerinden yalnızca değişen satırlar
+okunarak güncellenir (OVERLAP_SECONDS, geç commit edilen satırlar için
+geriye dönük pay). Satır silmeleri updated_at ile görülemediğinden indeks
+FULL_REBUILD_SECONDS'ta bir baştan kurulur; aktif kampanya değişince de
+baştan kurulur.
+"""
+import logging
+import sys
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .codes import LEGACY_LENGTH, has_valid_check_digit, is_valid_format
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'REFRESH_SECONDS': 2,
+    'OVERLAP_SECONDS': 60,
+    'FULL_REBUILD_SECONDS': 3600,
+}
+
+CODE_SPACE = 10 ** LEGACY_LENGTH
+
+# Bayt değerleri
+UNKNOWN = 0
+AVAILABLE = 1
+ASSIGNED = 2
+INACTIVE = 3
+ORPHANED = 4
+
+STATUS_NAMES = {
+    UNKNOWN: 'unknown',
+    AVAILABLE: 'available',
+    ASSIGNED: 'assigned',
+    INACTIVE: 'inactive',
+    ORPHANED: 'orphaned',
+}
+
+
+def index_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'POS_INDEX', {})}[name]
+
+
+def _state(is_active, is_assigned, has_user):
+    if not is_active:
+        return INACTIVE
+    # Kullanıcısı silinmiş ama serbest bırakılmamış barkod kasada geçerli sayılmaz
+    if is_assigned and has_user:
+        return ASSIGNED
+    if is_assigned:
+        return ORPHANED
+    return AVAILABLE
+
+
+class BarcodeIndex:
+    """Aktif kampanyanın kod -> durum tablosu"""
+
+    def __init__(self):
+        self.states = bytearray(CODE_SPACE)
+        self.long_states = {}
+        self.campaign_code = None
+        self.watermark = None
+        self.refreshed_at = 0.0
+        self.rebuilt_at = 0.0
+        self.last_refresh_ms = 0.0
+        self.last_rebuild_ms = 0.0
+        self.lookup_count = 0
+        self.lookup_ns = 0
+        self._refresh_lock = threading.Lock()
+
+    def validate(self, codes):
+        """Kod listesi için [(kod, durum adı)] döndür; geçersiz biçim 'invalid_format'"""
+        self._maybe_refresh()
+        states, long_states = self.states, self.long_states
+        started = time.perf_counter_ns()
+        results = []
+        for code in codes:
+            if not is_valid_format(code):
+                results.append((code, 'invalid_format'))
+            elif len(code) == LEGACY_LENGTH:
+                results.append((code, STATUS_NAMES[states[int(code)]]))
+            elif not has_valid_check_digit(code):
+                results.append((code, 'invalid_check_digit'))
+            else:
+                results.append((code, STATUS_NAMES[long_states.get(code, UNKNOWN)]))
+        # Sayaçlar kilitsiz; istatistik amaçlı, yarışta birkaç örnek kaybolabilir
+        self.lookup_count += len(codes)
+        self.lookup_ns += time.perf_counter_ns() - started
+        return results
+
+    def stats(self):
+        long_values = list(self.long_states.values())
+        counts = {
+            name: self.states.count(state) + long_values.count(state) for state, name in STATUS_NAMES.items()
+        }
+        return {
+            'campaign_code': self.campaign_code,
+            'memory_bytes': sys.getsizeof(self.states) + sys.getsizeof(self.long_states),
+            'entries': counts,
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'seconds_since_refresh': round(time.monotonic() - self.refreshed_at, 3) if self.refreshed_at else None,
+            'last_refresh_ms': round(self.last_refresh_ms, 3),
+            'last_rebuild_ms': round(self.last_rebuild_ms, 3),
+            'lookup_count': self.lookup_count,
+            'avg_lookup_ns': round(self.lookup_ns / self.lookup_count) if self.lookup_count else None,
+        }
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if now - self.refreshed_at < index_setting('REFRESH_SECONDS'):
+            return
+        # Tek süreçte aynı anda tek yenileme; diğer istekler mevcut indeksten cevaplanır
+        if not self._refresh_lock.acquire(blocking=self.refreshed_at == 0.0):
+            return
+        try:
+            if time.monotonic() - self.refreshed_at < index_setting('REFRESH_SECONDS'):
+                return
+            self.refresh()
+        except Exception as e:
+            logger.error(f"POS INDEX: Yenileme hatası: {str(e)}")
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self):
+        """Aktif kampanya değiştiyse ya da süre dolduysa baştan kur, yoksa değişenleri uygula"""
+        from .models import Campaign
+
+        campaign = Campaign.get_active_campaign()
+        campaign_code = campaign.campaign_code if campaign else None
+        needs_rebuild = (
+            campaign_code != self.campaign_code
+            or self.watermark is None
+            or time.monotonic() - self.rebuilt_at >= index_setting('FULL_REBUILD_SECONDS')
+        )
+        if needs_rebuild:
+            self._rebuild(campaign_code)
+        else:
+            self._apply_changes()
+        self.refreshed_at = time.monotonic()
+
+    def _rows(self, campaign_code, since=None):
+        from .models import CampaignBarcode, UserBarcode
+
+        queryset = CampaignBarcode.objects.filter(campaign_code=campaign_code)
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        return queryset.order_by().annotate(
+            has_user=Exists(UserBarcode.objects.filter(campaign_barcode=OuterRef('pk')))
+        ).values_list('barcode_code', 'is_active', 'is_assigned', 'has_user')
+
+    @staticmethod
+    def _set(states, long_states, code, is_active, is_assigned, has_user):
+        if not is_valid_format(code):
+            return
+        if len(code) == LEGACY_LENGTH:
+            states[int(code)] = _state(is_active, is_assigned, has_user)
+        else:
+            long_states[code] = _state(is_active, is_assigned, has_user)
+
+    def _rebuild(self, campaign_code):
+        started = time.perf_counter()
+        watermark = timezone.now()
+        states = bytearray(CODE_SPACE)
+        long_states = {}
+        if campaign_code:
+            for row in self._rows(campaign_code).iterator(chunk_size=20000):
+                self._set(states, long_states, *row)
+        # Okuyucular yarım kurulmuş tabloyu görmesin diye referans tek adımda değişir
+        self.states, self.long_states = states, long_states
+        self.campaign_code = campaign_code
+        self.watermark = watermark
+        self.rebuilt_at = time.monotonic()
+        self.last_rebuild_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"POS INDEX: {campaign_code or 'aktif kampanya yok'} için indeks kuruldu ({self.last_rebuild_ms:.0f} ms)")
+
+    def _apply_changes(self):
+        started = time.perf_counter()
+        watermark = timezone.now()
+        since = self.watermark - timedelta(seconds=index_setting('OVERLAP_SECONDS'))
+        for row in self._rows(self.campaign_code, since):
+            self._set(self.states, self.long_states, *row)
+        self.watermark = watermark
+        self.last_refresh_ms = (time.perf_counter() - started) * 1000
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_barcode_index():
+    """Süreç düzeyindeki indeksi döndür; ilk çağrıda kurulur"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = BarcodeIndex()
+        return _index
@@ -0,0 +1,395 @@
+"""Barkod görüntülerinin istek anında üretilmesi.
+
+Çıktı (kod, simgeleme, format, seçenekler) üçlüsünün içerik özetiyle
+adreslenir: aynı girdi her zaman aynı baytları ve aynı ETag'i verir. Üretilen
+görüntü önce süreç içi LRU'da, sonra diskte aranır; ikisinde de yoksa
+python-barcode ile üretilip ikisine de yazılır. Diskteki dosyalar kodun
+kampanyasından bağımsız olduğu için veritabanına yazılmaz.
+
+Seçenekler birkaç sabit kademeye yuvarlanır; bir kod için üretilebilecek
+farklı görüntü sayısı sınırlıdır. Disk önbelleği DISK_CACHE_BYTES ile
+sınırlıdır: sınır aşılınca en eski kullanılan (mtime) dosyalar silinir.
+
+prerender_barcodes() aynı çizimi toplu olarak süreç havuzunda çalıştırıp
+CampaignBarcode.barcode_image dosyalarını MEDIA_ROOT altına yazar.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import barcode
+from barcode.errors import BarcodeError
+from barcode.writer import ImageWriter, SVGWriter
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_DIR': None,
+    'MEMORY_CACHE_BYTES': 16 * 1024 * 1024,
+    'DISK_CACHE_BYTES': 256 * 1024 * 1024,
+}
+
+# Budama disk önbelleğini sınırın bu oranına indirir; her yazımda yeniden taranmasın
+DISK_PRUNE_TARGET = 0.8
+
+# Çizim mantığı değişirse artırılmalı; eski özetler (ve ETag'ler) geçersiz olur
+RENDER_VERSION = 1
+
+SYMBOLOGIES = ('code128', 'code39', 'ean8', 'ean13', 'itf')
+
+CONTENT_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
+}
+
+# Seçenek adı: (tip, varsayılan, izin verilen kademeler); değer en yakın kademeye yuvarlanır
+OPTIONS = {
+    'module_width': (float, 0.2, (0.1, 0.2, 0.25, 0.33, 0.5, 0.75, 1.0)),
+    'module_height': (float, 15.0, (5.0, 10.0, 15.0, 20.0, 30.0, 50.0)),
+    'quiet_zone': (float, 6.5, (0.0, 2.5, 6.5, 10.0, 20.0)),
+    'font_size': (int, 10, (0, 8, 10, 12, 16, 20, 30)),
+    'dpi': (int, 300, (72, 150, 300, 600)),
+}
+
+MAX_CODE_LENGTH = 32
+
+
+def render_setting(name):
+    config = {**DEFAULTS, **getattr(settings, 'BARCODE_RENDER', {})}
+    if name == 'CACHE_DIR' and config[name] is None:
+        return os.path.join(settings.BASE_DIR, '.cache', 'barcode-images')
+    return config[name]
+
+
+def normalize_options(fmt, params):
+    """İstek parametrelerini doğrula ve varsayılanlarla tamamla; hatada ValueError"""
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f'Geçersiz format: {fmt} (svg veya png olmalı)')
+    options = {}
+    for name, (kind, default, steps) in OPTIONS.items():
+        # dpi yalnızca PNG çıktısını etkiler; SVG özetine girmesin
+        if name == 'dpi' and fmt != 'png':
+            continue
+        raw = params.get(name)
+        if raw in (None, ''):
+            options[name] = default
+            continue
+        try:
+            value = kind(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f'Geçersiz {name}: {raw}')
+        if not steps[0] <= value <= steps[-1]:
+            raise ValueError(f'{name} {steps[0]} ile {steps[-1]} arasında olmalı')
+        options[name] = min(steps, key=lambda step: abs(step - value))
+    # PNG'de bir modül en az bir piksel olmalı, yoksa çizgiler kaybolur
+    if fmt == 'png' and options['module_width'] * options['dpi'] / 25.4 < 1:
+        raise ValueError('module_width bu dpi için çok küçük (bir modül en az 1 piksel olmalı)')
+    options['write_text'] = str(params.get('text', '1')).lower() not in ('0', 'false', 'no')
+    return options
+
+
+def content_hash(code, symbology, fmt, options):
+    payload = json.dumps(
+        {
+            'code': code,
+            'symbology': symbology,
+            'format': fmt,
+            'options': options,
+            'version': RENDER_VERSION,
+            'library': barcode.version,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _MemoryCache:
+    """Toplam bayt sınırlı LRU"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            content = self._items.get(key)
+            if content is not None:
+                self._items.move_to_end(key)
+            return content
+
+    def set(self, key, content):
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                return
+            self._items[key] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_memory_cache = None
+_memory_cache_lock = threading.Lock()
+
+
+def get_memory_cache():
+    global _memory_cache
+    with _memory_cache_lock:
+        if _memory_cache is None:
+            _memory_cache = _MemoryCache(render_setting('MEMORY_CACHE_BYTES'))
+        return _memory_cache
+
+
+class _DiskCache:
+    """Bayt sınırlı disk önbelleği; dosyaların mtime'ı son kullanım zamanıdır.
+
+    Boyut süreç içinde yazılanlarla tahmin edilir; sınır aşılınca dizin taranıp
+    en eski dosyalar silinir ve boyut diğer süreçlerin yazdıklarıyla birlikte
+    yeniden hesaplanır.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+        self._lock = threading.Lock()
+
+    def path(self, digest, fmt):
+        return os.path.join(self.directory, digest[:2], f'{digest}.{fmt}')
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return content
+
+    def write(self, path, content):
+        write_atomic(path, content)
+        with self._lock:
+            if self.size is not None:
+                self.size += len(content)
+            if self.size is None or self.size > self.max_bytes:
+                self.prune()
+
+    def prune(self):
+        """Dizini tara, sınır aşıldıysa en eski dosyaları DISK_PRUNE_TARGET'a inene kadar sil"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        size = sum(file_size for _, file_size, _ in files)
+        if size > self.max_bytes:
+            target = self.max_bytes * DISK_PRUNE_TARGET
+            removed = 0
+            for _, file_size, path in sorted(files):
+                if size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= file_size
+                removed += 1
+            logger.info(f"RENDER: Disk önbelleğinden {removed} dosya silindi ({size // 1024} KB kaldı)")
+        self.size = size
+
+
+_disk_cache = None
+
+
+def get_disk_cache():
+    global _disk_cache
+    directory = str(render_setting('CACHE_DIR'))
+    with _memory_cache_lock:
+        if _disk_cache is None or _disk_cache.directory != directory:
+            _disk_cache = _DiskCache(directory, render_setting('DISK_CACHE_BYTES'))
+        return _disk_cache
+
+
+def write_atomic(path, content):
+    """Geçici dosyaya yazıp yerine taşı; okuyucular yarım dosya görmesin"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        # mkstemp 0600 açar; medya dosyaları web sunucusu tarafından okunabilmeli
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def draw_barcode(code, symbology, fmt, options):
+    writer = ImageWriter() if fmt == 'png' else SVGWriter()
+    writer_options = dict(options)
+    if fmt == 'png':
+        writer_options['format'] = 'PNG'
+    buffer = io.BytesIO()
+    try:
+        barcode.get(symbology, code, writer=writer).write(buffer, writer_options)
+    except (BarcodeError, ValueError) as e:
+        raise ValueError(f'{symbology} için geçersiz kod: {code} ({str(e)})')
+    return buffer.getvalue()
+
+
+def render_barcode(code, symbology='code128', fmt='svg', options=None):
+    """Barkodu üret ya da önbellekten getir; (içerik, content type, özet) döndürür.
+
+    Geçersiz kod, simgeleme ya da seçeneklerde ValueError fırlatır.
+    """
+    if not code or len(code) > MAX_CODE_LENGTH or not code.isascii() or not code.isalnum():
+        raise ValueError('Barkod kodu en fazla 32 karakterlik harf/rakam olmalı')
+    if symbology not in SYMBOLOGIES:
+        raise ValueError(f'Geçersiz simgeleme: {symbology} ({", ".join(SYMBOLOGIES)})')
+    if options is None:
+        options = normalize_options(fmt, {})
+
+    digest = content_hash(code, symbology, fmt, options)
+    memory = get_memory_cache()
+    content = memory.get(digest)
+    if content is not None:
+        return content, CONTENT_TYPES[fmt], digest
+
+    disk = get_disk_cache()
+    path = disk.path(digest, fmt)
+    try:
+        content = disk.read(path)
+    except FileNotFoundError:
+        content = draw_barcode(code, symbology, fmt, options)
+        try:
+            disk.write(path, content)
+        except OSError as e:
+            # Disk önbelleği yazılamasa da görüntü servis edilebilir
+            logger.warning(f"RENDER: Disk önbelleğine yazılamadı: {path} - {str(e)}")
+
+    memory.set(digest, content)
+    return content, CONTENT_TYPES[fmt], digest
+
+
+IMAGE_UPLOAD_TO = 'barcodes'
+
+
+def image_name(code, symbology, fmt, options):
+    """Özet içeren dosya adı; ad değişmediyse görüntü günceldir"""
+    digest = content_hash(code, symbology, fmt, options)
+    return f'{IMAGE_UPLOAD_TO}/barcode_{code}_{digest[:12]}.{fmt}'
+
+
+def _render_files(items, media_root, symbology, fmt, options):
+    """Süreç havuzunda çalışır: veritabanına dokunmadan dosyaları yaz.
+
+    [(pk, kod, dosya adı)] alır; [(pk, dosya adı)] ve [(pk, hata)] döndürür.
+    """
+    rendered, errors = [], []
+    for pk, code, name in items:
+        try:
+            write_atomic(os.path.join(media_root, name), draw_barcode(code, symbology, fmt, options))
+        except (ValueError, OSError) as e:
+            errors.append((pk, str(e)))
+            continue
+        rendered.append((pk, name))
+    return rendered, errors
+
+
+def prerender_barcodes(queryset, workers=None, chunk_size=500, force=False,
+                       symbology='code128', fmt='png', options=None, progress=None):
+    """Kuyruktaki barkodların görüntülerini süreç havuzunda üret ve toplu kaydet.
+
+    Güncel görüntüsü olanlar (özetli ad aynı ve dosya mevcut) atlanır.
+    Her biten parça bulk_update ile yazılır; progress(stats) her parçada çağrılır.
+    """
+    from .models import CampaignBarcode
+
+    if options is None:
+        options = normalize_options(fmt, {})
+    media_root = str(settings.MEDIA_ROOT)
+    workers = workers or os.cpu_count() or 1
+    stats = {'total': 0, 'rendered': 0, 'skipped': 0, 'failed': 0, 'errors': [], 'elapsed': 0.0}
+    started = time.monotonic()
+
+    def pending_chunks():
+        chunk = []
+        rows = queryset.order_by('pk').values_list('pk', 'barcode_code', 'barcode_image')
+        for pk, code, current in rows.iterator(chunk_size=chunk_size * 4):
+            stats['total'] += 1
+            name = image_name(code, symbology, fmt, options)
+            if not force and current == name and os.path.exists(os.path.join(media_root, name)):
+                stats['skipped'] += 1
+                continue
+            chunk.append((pk, code, name))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def save(rendered, errors):
+        if rendered:
+            now = timezone.now()
+            previous = dict(
+                CampaignBarcode.objects.filter(pk__in=[pk for pk, _ in rendered]).values_list('pk', 'barcode_image')
+            )
+            CampaignBarcode.objects.bulk_update(
+                [CampaignBarcode(pk=pk, barcode_image=name, updated_at=now) for pk, name in rendered],
+                ['barcode_image', 'updated_at'],
+                batch_size=1000,
+            )
+            # Yerine yenisi yazılan eski dosyaları (ör. Django'nun ekli kopyaları) temizle
+            for pk, name in rendered:
+                old = previous.get(pk)
+                if old and old != name:
+                    try:
+                        os.remove(os.path.join(media_root, old))
+                    except OSError:
+                        pass
+        stats['rendered'] += len(rendered)
+        stats['failed'] += len(errors)
+        stats['errors'].extend(errors[:max(0, 20 - len(stats['errors']))])
+        stats['elapsed'] = time.monotonic() - started
+        if progress:
+            progress(stats)
+
+    chunks = pending_chunks()
+    if workers == 1:
+        for chunk in chunks:
+            save(*_render_files(chunk, media_root, symbology, fmt, options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(executor.submit(_render_files, chunk, media_root, symbology, fmt, options))
+                # Bellekte en fazla iki tur parça beklesin
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        save(*future.result())
+            for future in in_flight:
+                save(*future.result())
+
+    stats['elapsed'] = time.monotonic() - started
+    return stats
@@ -25,12 +25,12 @@ class UserBarcodeSerializer(serializers.ModelSerializer):
         )
     
     def get_campaign_info(self, obj):
-        try:
-            campaign = Campaign.objects.get(campaign_code=obj.campaign_barcode.campaign_code)
-            return {
-                'name': campaign.campaign_name,
-                'description': campaign.description,
-                'is_active': campaign.is_active
-            }
-        except Campaign.DoesNotExist:
-            return None
\ No newline at end of file
+        # Kampanya select_related('campaign_barcode__campaign') ile birlikte yüklenmeli
+        campaign = obj.campaign_barcode.campaign
+        if campaign is None:
+            return None
+        return {
+            'name': campaign.campaign_name,
+            'description': campaign.description,
+            'is_active': campaign.is_active
+        }
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Campaign, CampaignBarcode, UserBarcode
+import logging
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+def invalidate_active_campaign(sender, instance, **kwargs):
+    """Kampanya değiştiğinde aktif kampanya önbelleğini tüm süreçlerde geçersiz kıl"""
+    logger.info(f"SIGNAL: Kampanya değişti, aktif kampanya önbelleği temizleniyor: {instance.campaign_code}")
+    Campaign.invalidate_active_campaign()
+    # Diğer süreçler commit öncesi eski durumu önbelleğe almış olabilir
+    transaction.on_commit(Campaign.invalidate_active_campaign)
+
+@receiver(post_save, sender=Campaign)
+def link_campaign_barcodes(sender, instance, created, **kwargs):
+    """Kampanyadan önce içe aktarılmış barkodları yeni kampanyaya bağla"""
+    if created:
+        CampaignBarcode.objects.filter(
+            campaign__isnull=True,
+            campaign_code=instance.campaign_code
+        ).update(campaign=instance, updated_at=timezone.now())
+
+@receiver(post_delete, sender=UserBarcode)
+def touch_released_barcode(sender, instance, **kwargs):
+    """Atama silinince barkodun updated_at'ini ilerlet; POS indeksi değişikliği görsün"""
+    CampaignBarcode.objects.filter(pk=instance.campaign_barcode_id).update(updated_at=timezone.now())
@@ -0,0 +1,216 @@
+"""Barkod havuzu tüketim ölçümleri ve tükenme tahmini.
+
+Atamalar süreç içinde (kampanya, dakika) anahtarıyla biriktirilir ve
+FLUSH_SECONDS'ta bir CampaignAssignmentMetric satırlarına F() artışlarıyla
+yazılır; atama başına ek bir yazma yapılmaz. Havuz derinliği zaten
+CampaignBarcodeStats'ta tutulduğu için tahmin tablo taraması gerektirmez:
+kalan müsait barkod / son pencere içindeki dakikalık atama hızı.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_SECONDS': 10,
+    'FORECAST_WINDOW_MINUTES': 60,
+    'SHORT_WINDOW_MINUTES': 5,
+    'RETENTION_DAYS': 7,
+}
+
+
+def telemetry_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'BARCODE_TELEMETRY', {})}[name]
+
+
+def _bucket(now):
+    return now.replace(second=0, microsecond=0)
+
+
+class AssignmentTelemetry:
+    """Süreç içi ölçüm tamponu"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._buffer = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_prune = 0.0
+        # on_commit'e bırakılan flush; transaction geri alınırsa hiç çalışmaz, bu yüzden süreli
+        self._flush_scheduled_at = None
+
+    def record(self, campaign_code, assigned=0, failed=0, latency_ms=None):
+        """latency_ms çağrıdaki tüm atamaların toplam süresidir; en uzun süre de çağrı başına tutulur.
+
+        Toplu atamada en uzun süre partinin tamamının süresidir: partideki her
+        kullanıcı barkodunu transaction commit edilince alır.
+        """
+        key = (campaign_code, _bucket(timezone.now()))
+        with self._lock:
+            counters = self._buffer.setdefault(key, [0, 0, 0.0, 0.0])
+            counters[0] += assigned
+            counters[1] += failed
+            if latency_ms is not None:
+                counters[2] += latency_ms
+                counters[3] = max(counters[3], latency_ms)
+            now = time.monotonic()
+            interval = telemetry_setting('FLUSH_SECONDS')
+            due = now - self._last_flush >= interval
+            scheduled = self._flush_scheduled_at is not None and now - self._flush_scheduled_at < interval
+            if due and not scheduled and connection.in_atomic_block:
+                self._flush_scheduled_at = now
+        if not due or scheduled:
+            return
+        # Çağıranın transaction'ı içinde yazılırsa ölçüm satırı commit'e kadar kilitli kalır; commit sonrasına bırak
+        if connection.in_atomic_block:
+            transaction.on_commit(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        """Tamponu veritabanına yaz; hata olursa ölçümler düşürülür, atama etkilenmez"""
+        from .models import CampaignAssignmentMetric
+
+        with self._lock:
+            buffer, self._buffer = self._buffer, {}
+            self._last_flush = time.monotonic()
+            self._flush_scheduled_at = None
+        try:
+            for (campaign_code, bucket), (assigned, failed, latency_total, latency_max) in buffer.items():
+                self._write(CampaignAssignmentMetric, campaign_code, bucket, assigned, failed, latency_total, latency_max)
+            self._prune(CampaignAssignmentMetric)
+        except Exception as e:
+            logger.warning(f"TELEMETRY: Ölçümler yazılamadı: {str(e)}")
+
+    @staticmethod
+    def _write(model, campaign_code, bucket, assigned, failed, latency_total, latency_max):
+        for _ in range(2):
+            updated = model.objects.filter(campaign_code=campaign_code, bucket=bucket).update(
+                assigned=F('assigned') + assigned,
+                failed=F('failed') + failed,
+                latency_ms_total=F('latency_ms_total') + latency_total,
+                latency_ms_max=Greatest('latency_ms_max', Value(latency_max)),
+            )
+            if updated:
+                return
+            try:
+                with transaction.atomic():
+                    model.objects.create(
+                        campaign_code=campaign_code, bucket=bucket, assigned=assigned, failed=failed,
+                        latency_ms_total=latency_total, latency_ms_max=latency_max,
+                    )
+                return
+            except IntegrityError:
+                # Başka bir süreç aynı dakikanın satırını az önce oluşturdu; artırmayı tekrar dene
+                continue
+
+    def _prune(self, model):
+        if time.monotonic() - self._last_prune < 3600:
+            return
+        self._last_prune = time.monotonic()
+        cutoff = timezone.now() - timedelta(days=telemetry_setting('RETENTION_DAYS'))
+        model.objects.filter(bucket__lt=cutoff).delete()
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Süreç düzeyindeki tamponu döndür; fork sonrası yeniden oluşturulur"""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None or _telemetry.pid != os.getpid():
+            _telemetry = AssignmentTelemetry()
+            atexit.register(_telemetry.flush)
+        return _telemetry
+
+
+def campaign_forecast(campaign_codes=None, now=None):
+    """Kampanya başına derinlik, hız, gecikme ve tükenme tahmini sözlüğü döndür"""
+    from .models import CampaignAssignmentMetric, CampaignBarcodeStats
+
+    # Bu sürecin henüz yazılmamış ölçümleri de görünsün
+    get_telemetry().flush()
+    now = now or timezone.now()
+    window = telemetry_setting('FORECAST_WINDOW_MINUTES')
+    short_window = telemetry_setting('SHORT_WINDOW_MINUTES')
+
+    stats = CampaignBarcodeStats.objects.all()
+    metrics = CampaignAssignmentMetric.objects.filter(bucket__gte=_bucket(now) - timedelta(minutes=window - 1))
+    if campaign_codes is not None:
+        stats = stats.filter(campaign_code__in=campaign_codes)
+        metrics = metrics.filter(campaign_code__in=campaign_codes)
+
+    def totals(queryset):
+        return {
+            row.pop('campaign_code'): row
+            for row in queryset.order_by().values('campaign_code').annotate(
+                assigned_sum=Sum('assigned'),
+                failed_sum=Sum('failed'),
+                latency_sum=Sum('latency_ms_total'),
+                latency_max=Max('latency_ms_max'),
+            )
+        }
+
+    long_totals = totals(metrics)
+    short_totals = totals(metrics.filter(bucket__gte=_bucket(now) - timedelta(minutes=short_window - 1)))
+
+    result = {}
+    for row in stats:
+        long_row = long_totals.get(row.campaign_code, {})
+        short_row = short_totals.get(row.campaign_code, {})
+        assigned = long_row.get('assigned_sum') or 0
+        rate = assigned / window
+        exhausts_at = None
+        minutes_left = None
+        if row.available <= 0:
+            minutes_left = 0
+            exhausts_at = now
+        elif rate > 0:
+            minutes_left = row.available / rate
+            exhausts_at = now + timedelta(minutes=minutes_left)
+        result[row.campaign_code] = {
+            'total': row.total,
+            'assigned': row.assigned,
+            'available': row.available,
+            'rate_per_minute': round(rate, 3),
+            'rate_per_minute_short': round((short_row.get('assigned_sum') or 0) / short_window, 3),
+            'failed': long_row.get('failed_sum') or 0,
+            'latency_ms_avg': round(long_row['latency_sum'] / assigned, 2) if assigned and long_row.get('latency_sum') else None,
+            'latency_ms_max': round(long_row['latency_max'], 2) if long_row.get('latency_max') else None,
+            'minutes_left': round(minutes_left, 1) if minutes_left is not None else None,
+            'exhausts_at': exhausts_at,
+            'window_minutes': window,
+        }
+    return result
+
+
+def prometheus_lines(forecast):
+    """Tahmin sözlüğünü Prometheus metin biçimine çevir"""
+    metrics = (
+        ('barcode_pool_available', 'gauge', 'available', 'Müsait barkod sayısı'),
+        ('barcode_pool_assigned', 'gauge', 'assigned', 'Atanmış barkod sayısı'),
+        ('barcode_assignment_rate_per_minute', 'gauge', 'rate_per_minute', 'Pencere içindeki dakikalık atama hızı'),
+        ('barcode_assignment_failed', 'gauge', 'failed', 'Pencere içinde barkod bulunamayan atama'),
+        ('barcode_assignment_latency_ms_avg', 'gauge', 'latency_ms_avg', 'Ortalama atama süresi'),
+        ('barcode_pool_minutes_left', 'gauge', 'minutes_left', 'Tahmini tükenme süresi (dakika)'),
+    )
+    lines = []
+    for name, kind, field, help_text in metrics:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for campaign_code, values in sorted(forecast.items()):
+            if values[field] is not None:
+                lines.append(f'{name}{{campaign="{campaign_code}"}} {values[field]}')
+    return '\n'.join(lines) + '\n'
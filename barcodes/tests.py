@@ -0,0 +1,551 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import CustomUser
+from jobs.models import Job
+from . import pos_index, telemetry
+from .codes import ean_check_digit, has_valid_check_digit, is_valid_code
+from .jobs import ACTIVATE_ROLLOVER_JOB, ASSIGN_BARCODE_JOB, activate_rollover, assign_barcodes
+from .pool import BarcodePool
+from .models import (
+    BarcodeRedemption, Campaign, CampaignAssignmentMetric, CampaignBarcode, CampaignBarcodeStats, PendingUserBarcode,
+    UserBarcode, UserBarcodeHistory,
+)
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class UserBarcodeQueryCountTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=self.campaign
+            )
+            for i in range(3)
+        ])
+        # post_save sinyali barkodu atar
+        self.user = CustomUser.objects.create_user(phone_number='05551234567', password='Gizli.Sifre123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_user_barcode_is_a_single_query(self):
+        self.assertTrue(UserBarcode.objects.filter(user=self.user).exists())
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('barcodes:get_user_barcode'))
+
+        self.assertEqual(response.status_code, 200)
+        barcode = response.data['barcode']
+        self.assertEqual(barcode['campaign_code'], 'TEST2025')
+        self.assertEqual(barcode['campaign_info']['name'], 'Test Kampanyası')
+
+
+class BarcodeLeaseTests(TestCase):
+    def setUp(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign)
+            for i in range(30)
+        ])
+        CampaignBarcodeStats.rebuild('TEST2025')
+
+    def test_idle_leases_do_not_exhaust_campaign(self):
+        leased = CampaignBarcode.lease_block('TEST2025', 'idle', 30, timezone.now() + timedelta(minutes=10))
+        self.assertEqual(len(leased), 30)
+
+        with transaction.atomic():
+            barcode = CampaignBarcode.claim_available('TEST2025')
+        self.assertIsNotNone(barcode)
+        # Kirası devralınan havuz onayda kaybeder
+        self.assertFalse(CampaignBarcode.confirm_lease(barcode.pk, 'idle'))
+
+    def test_blocks_shrink_with_remaining_codes(self):
+        pool = BarcodePool(block_size=200, low_water_mark=0, lease_seconds=600)
+        self.assertIsNotNone(pool.take('TEST2025'))
+        # 30 müsait barkodun 1/10'u kiralanır, biri atanır
+        self.assertEqual(CampaignBarcode.objects.filter(lease_owner=pool.owner).count(), 2)
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=True)
+class AsyncBarcodeAssignmentTests(TestCase):
+    def setUp(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(3)
+        ])
+        self.user = CustomUser.objects.create_user(phone_number='05551234567', password='Gizli.Sifre123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_registration_enqueues_assignment(self):
+        self.assertFalse(UserBarcode.objects.filter(user=self.user).exists())
+        self.assertTrue(Job.is_active(ASSIGN_BARCODE_JOB, str(self.user.pk)))
+
+        response = self.client.get(reverse('barcodes:get_user_barcode'))
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data['pending'])
+
+    def test_retrying_job_falls_back_to_inline_assignment(self):
+        Job.objects.filter(kind=ASSIGN_BARCODE_JOB).update(attempts=1, last_error='Müsait barkod yok')
+
+        response = self.client.get(reverse('barcodes:get_user_barcode'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['barcode']['campaign_code'], 'TEST2025')
+
+        # Sonradan çalışan iş barkodu olan kullanıcıyı atlar
+        jobs = Job.claim_batch(ASSIGN_BARCODE_JOB, 10, 'test')
+        self.assertEqual(assign_barcodes(jobs), {})
+        self.assertEqual(UserBarcode.objects.filter(user=self.user).count(), 1)
+
+    def test_worker_assigns_queued_users(self):
+        jobs = Job.claim_batch(ASSIGN_BARCODE_JOB, 10, 'test')
+        self.assertEqual(assign_barcodes(jobs), {})
+        Job.complete(jobs, {})
+
+        self.assertFalse(Job.objects.exists())
+        response = self.client.get(reverse('barcodes:get_user_barcode'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['barcode']['campaign_code'], 'TEST2025')
+
+
+class BarcodeImageTests(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        override = override_settings(BARCODE_RENDER={'CACHE_DIR': self.cache_dir.name, 'DISK_CACHE_BYTES': 4096})
+        override.enable()
+        self.addCleanup(override.disable)
+        user = CustomUser.objects.create_user(phone_number='05551234567', password='Gizli.Sifre123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_svg_is_cached_with_etag(self):
+        url = reverse('barcodes:barcode_image', args=['000720', 'svg'])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_png_options_change_the_etag(self):
+        url = reverse('barcodes:barcode_image', args=['000720', 'png'])
+        small = self.client.get(url, {'dpi': 150})
+        large = self.client.get(url, {'dpi': 300})
+        self.assertEqual(small['Content-Type'], 'image/png')
+        self.assertNotEqual(small['ETag'], large['ETag'])
+
+    def test_invalid_request_is_rejected(self):
+        url = reverse('barcodes:barcode_image', args=['000720', 'svg'])
+        self.assertEqual(self.client.get(reverse('barcodes:barcode_image', args=['000720', 'gif'])).status_code, 400)
+        self.assertEqual(self.client.get(url, {'symbology': 'qr'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'symbology': 'ean13'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'module_height': 500}).status_code, 400)
+        png_url = reverse('barcodes:barcode_image', args=['000720', 'png'])
+        self.assertEqual(self.client.get(png_url, {'dpi': 100}).status_code, 400)
+
+    def test_options_are_quantized_and_disk_cache_is_capped(self):
+        url = reverse('barcodes:barcode_image', args=['000720', 'svg'])
+        self.assertEqual(self.client.get(url, {'module_height': 14.9})['ETag'], self.client.get(url)['ETag'])
+
+        for i in range(20):
+            self.client.get(reverse('barcodes:barcode_image', args=[f'{i:06d}', 'svg']))
+        cached = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(self.cache_dir.name) for name in names
+        )
+        self.assertLessEqual(cached, 4096)
+
+    def test_users_can_only_render_their_own_code(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025', campaign_name='Test Kampanyası', start_date=timezone.now() - timedelta(days=1),
+        )
+        barcode = CampaignBarcode.objects.create(barcode_code='000720', barcode_name='Test', campaign_code='TEST2025', campaign=campaign)
+        user = CustomUser.objects.create_user(phone_number='05559876543', password='Gizli.Sifre123')
+        UserBarcode.objects.create(user=user, campaign_barcode=barcode)
+        self.client.force_authenticate(user)
+
+        self.assertEqual(self.client.get(reverse('barcodes:barcode_image', args=['000720', 'svg'])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('barcodes:barcode_image', args=['000721', 'svg'])).status_code, 404)
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False, POS_INDEX={'REFRESH_SECONDS': 0})
+class PosValidationTests(TestCase):
+    def setUp(self):
+        pos_index._index = None
+        self.addCleanup(setattr, pos_index, '_index', None)
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(3)
+        ])
+        self.user = CustomUser.objects.create_user(phone_number='05551234567', password='Gizli.Sifre123')
+        self.assigned_code = self.user.user_barcode.campaign_barcode.barcode_code
+        cashier = CustomUser.objects.create_user(phone_number='05550000000', password='Gizli.Sifre123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(cashier)
+
+    def test_single_and_batch_lookup(self):
+        url = reverse('barcodes:pos_validate')
+        response = self.client.post(url, {'code': self.assigned_code}, format='json')
+        self.assertTrue(response.data['valid'])
+        self.assertEqual(response.data['campaign_code'], 'TEST2025')
+
+        CampaignBarcode.objects.create(barcode_code='4006381333931', barcode_name='Test', campaign_code='TEST2025')
+        pos_index.get_barcode_index()._rebuild('TEST2025')
+        codes = [self.assigned_code, '999999', 'abc', '4006381333931', '4006381333913']
+        response = self.client.post(url, {'codes': codes}, format='json')
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['assigned', 'unknown', 'invalid_format', 'available', 'invalid_check_digit'])
+
+    def test_changes_are_picked_up_incrementally(self):
+        url = reverse('barcodes:pos_validate')
+        self.client.post(url, {'code': self.assigned_code}, format='json')
+
+        self.user.delete()
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {'code': self.assigned_code}, format='json')
+        self.assertFalse(response.data['valid'])
+        self.assertEqual(response.data['status'], 'orphaned')
+
+    def test_requires_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('barcodes:pos_validate'), {'code': self.assigned_code}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class RedemptionIngestTests(TestCase):
+    def setUp(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(3)
+        ])
+        user = CustomUser.objects.create_user(phone_number='05551234567', password='Gizli.Sifre123')
+        self.code = user.user_barcode.campaign_barcode.barcode_code
+        cashier = CustomUser.objects.create_user(phone_number='05550000000', password='Gizli.Sifre123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(cashier)
+
+    def post_batch(self, records):
+        body = '\n'.join(record if isinstance(record, str) else json.dumps(record) for record in records)
+        return self.client.generic(
+            'POST', reverse('barcodes:ingest_redemptions'), body, content_type='application/x-ndjson'
+        )
+
+    def test_batch_results_per_line(self):
+        line = {'transaction_id': 'T1', 'barcode_code': self.code, 'store_code': 'S01', 'amount': '125.50'}
+        response = self.post_batch([
+            line,
+            line,
+            {**line, 'transaction_id': 'T2', 'barcode_code': '999999'},
+            {**line, 'transaction_id': 'T3', 'amount': 'abc'},
+            '{bozuk',
+        ])
+        self.assertEqual(response.status_code, 200)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'duplicate', 'rejected', 'error', 'error'])
+        self.assertEqual(BarcodeRedemption.objects.count(), 1)
+
+        # Aynı parti yeniden gönderilirse tekrar yazılmaz
+        response = self.post_batch([line])
+        self.assertEqual(response.data['results'][0]['status'], 'duplicate')
+        self.assertEqual(BarcodeRedemption.objects.count(), 1)
+
+    def test_batch_uses_constant_queries(self):
+        records = [
+            {'transaction_id': f'T{i}', 'barcode_code': self.code, 'store_code': 'S01', 'amount': 10}
+            for i in range(50)
+        ]
+        # İşlem no kontrolü + barkod sorgusu + savepoint/insert/kontrol/release
+        with self.assertNumQueries(6):
+            response = self.post_batch(records)
+        self.assertEqual(response.data['summary']['created'], 50)
+
+    def test_zero_amount_is_accepted(self):
+        response = self.post_batch([
+            {'transaction_id': 'T0', 'barcode_code': self.code, 'store_code': 'S01', 'amount': 0},
+            {'transaction_id': 'T00', 'barcode_code': self.code, 'store_code': 'S01', 'amount': '0'},
+            {'transaction_id': 'T000', 'barcode_code': self.code, 'store_code': 'S01', 'amount': ''},
+        ])
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'created', 'error'])
+
+    def test_concurrently_inserted_line_reported_as_duplicate(self):
+        line = {'transaction_id': 'T1', 'barcode_code': self.code, 'store_code': 'S01', 'amount': '10'}
+        resolve = BarcodeRedemption._resolve_user_barcode
+
+        def resolve_and_race(candidates, campaign_code, active_code):
+            # Ön kontrolden sonra başka bir istek aynı işlem numarasını yazar
+            user_barcode = resolve(candidates, campaign_code, active_code)
+            BarcodeRedemption.objects.create(
+                transaction_id='T1', user_barcode=user_barcode, barcode_code=self.code,
+                campaign_code='TEST2025', store_code='S02', amount=10, redeemed_at=timezone.now(),
+            )
+            return user_barcode
+
+        with mock.patch.object(BarcodeRedemption, '_resolve_user_barcode', side_effect=resolve_and_race):
+            response = self.post_batch([line])
+        self.assertEqual(response.data['results'][0]['status'], 'duplicate')
+        self.assertEqual(BarcodeRedemption.objects.get().store_code, 'S02')
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class CampaignRolloverTests(TestCase):
+    def setUp(self):
+        old = Campaign.objects.create(
+            campaign_code='ESKI', campaign_name='Eski', start_date=timezone.now() - timedelta(days=30)
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'1{i:05d}', barcode_name='Eski', campaign_code='ESKI', campaign=old)
+            for i in range(2)
+        ])
+        self.users = [
+            CustomUser.objects.create_user(phone_number=f'0555000000{i}', password='Gizli.Sifre123')
+            for i in range(3)
+        ]
+        new = Campaign.objects.create(
+            campaign_code='YENI', campaign_name='Yeni', start_date=timezone.now() - timedelta(days=1)
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'2{i:05d}', barcode_name='Yeni', campaign_code='YENI', campaign=new)
+            for i in range(5)
+        ])
+        CampaignBarcodeStats.rebuild()
+
+    def test_rollover_pairs_all_users_and_keeps_history(self):
+        self.assertEqual(UserBarcode.objects.count(), 2)
+
+        # Parça boyutu 2: üç kullanıcı iki parçada, üçüncü çağrı boş döner
+        paired, last_user_id = UserBarcode.rollover_chunk('YENI', 0, 2)
+        self.assertEqual(paired, 2)
+        paired, last_user_id = UserBarcode.rollover_chunk('YENI', last_user_id, 2)
+        self.assertEqual(paired, 1)
+        self.assertEqual(UserBarcode.rollover_chunk('YENI', last_user_id, 2)[0], 0)
+
+        self.assertEqual(
+            UserBarcode.objects.filter(campaign_barcode__campaign_code='YENI').count(), 3
+        )
+        self.assertEqual(
+            set(UserBarcodeHistory.objects.values_list('campaign_code', flat=True)), {'ESKI'}
+        )
+        self.assertEqual(UserBarcodeHistory.objects.count(), 2)
+        stats = CampaignBarcodeStats.for_campaign('YENI')
+        self.assertEqual((stats.assigned, stats.available), (3, 2))
+        self.assertEqual(CampaignBarcodeStats.rebuild('YENI', dry_run=True), {})
+
+        # Eski kodlar kampanyanın politikasıyla (varsayılan: yeniden kullan) havuza döner
+        self.assertFalse(CampaignBarcode.objects.filter(campaign_code='ESKI', is_assigned=True).exists())
+        stats = CampaignBarcodeStats.for_campaign('ESKI')
+        self.assertEqual((stats.assigned, stats.available), (0, 2))
+        self.assertEqual(CampaignBarcodeStats.rebuild(dry_run=True), {})
+
+        # Yeniden çalıştırmak kimseyi ikinci kez devretmez
+        self.assertEqual(UserBarcode.rollover_chunk('YENI')[0], 0)
+
+    def test_rollover_retires_old_codes_by_policy(self):
+        Campaign.objects.filter(campaign_code='ESKI').update(released_barcode_policy=Campaign.RELEASED_BARCODE_RETIRE)
+        UserBarcode.rollover_chunk('YENI')
+
+        self.assertEqual(CampaignBarcode.objects.filter(campaign_code='ESKI', is_active=False).count(), 2)
+        stats = CampaignBarcodeStats.for_campaign('ESKI')
+        self.assertEqual((stats.assigned, stats.available, stats.inactive), (0, 0, 2))
+        self.assertEqual(CampaignBarcodeStats.rebuild(dry_run=True), {})
+
+    def test_rollover_before_launch_is_staged_until_start(self):
+        upcoming = Campaign.objects.create(
+            campaign_code='GELECEK', campaign_name='Gelecek', start_date=timezone.now() + timedelta(days=1)
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'3{i:05d}', barcode_name='Gelecek', campaign_code='GELECEK', campaign=upcoming)
+            for i in range(5)
+        ])
+        CampaignBarcodeStats.rebuild()
+        # Silinmiş işaretli kullanıcı devredilecekler arasında sayılmaz
+        self.users[2].soft_delete()
+        current = dict(UserBarcode.objects.values_list('user_id', 'campaign_barcode_id'))
+
+        out = StringIO()
+        call_command('rollover_campaign', campaign_code='GELECEK', stdout=out)
+        self.assertIn('Devredilecek kullanıcı: 2', out.getvalue())
+        # Kullanıcılar başlangıca kadar eski kodlarını kullanır
+        self.assertEqual(dict(UserBarcode.objects.values_list('user_id', 'campaign_barcode_id')), current)
+        self.assertEqual(PendingUserBarcode.objects.filter(campaign_code='GELECEK').count(), 2)
+        stats = CampaignBarcodeStats.for_campaign('GELECEK')
+        self.assertEqual((stats.assigned, stats.available), (2, 3))
+
+        # Kampanya başlayınca worker atamaları etkinleştirir
+        Campaign.objects.filter(campaign_code='YENI').update(is_active=False)
+        Campaign.objects.filter(pk=upcoming.pk).update(start_date=timezone.now() - timedelta(minutes=1))
+        Campaign.invalidate_active_campaign()
+        Job.objects.update(run_after=timezone.now())
+        jobs = Job.claim_batch(ACTIVATE_ROLLOVER_JOB, 10, 'test')
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(activate_rollover(jobs), {})
+
+        self.assertFalse(PendingUserBarcode.objects.exists())
+        self.assertEqual(
+            set(UserBarcode.objects.values_list('campaign_barcode__campaign_code', flat=True)), {'GELECEK'}
+        )
+        self.assertFalse(CampaignBarcode.objects.filter(campaign_code='ESKI', is_assigned=True).exists())
+        self.assertEqual(CampaignBarcodeStats.rebuild(dry_run=True), {})
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class PoolTelemetryTests(TestCase):
+    def setUp(self):
+        telemetry._telemetry = None
+        self.addCleanup(setattr, telemetry, '_telemetry', None)
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(4)
+        ])
+        for i in range(3):
+            CustomUser.objects.create_user(phone_number=f'0555000000{i}', password='Gizli.Sifre123')
+        admin = CustomUser.objects.create_user(phone_number='05559999999', password='Gizli.Sifre123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def test_forecast_from_buffered_counters(self):
+        response = self.client.get(reverse('barcodes:pool_metrics'), {'campaign_code': 'TEST2025'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['campaigns']['TEST2025']
+        # 4 barkoddan 4 kullanıcıya atandı (admin dahil); sıradaki kayıt başarısız sayılır
+        self.assertEqual(data['available'], 0)
+        self.assertEqual(data['minutes_left'], 0)
+        self.assertGreater(data['rate_per_minute'], 0)
+
+        CustomUser.objects.create_user(phone_number='05558888888', password='Gizli.Sifre123')
+        telemetry.get_telemetry().flush()
+        metric = CampaignAssignmentMetric.objects.get(campaign_code='TEST2025')
+        self.assertEqual((metric.assigned, metric.failed), (4, 1))
+
+        response = self.client.get(reverse('barcodes:pool_metrics_prometheus'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('barcode_pool_available{campaign="TEST2025"} 0', response.content.decode())
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class BatchTelemetryTests(TestCase):
+    def setUp(self):
+        telemetry._telemetry = None
+        self.addCleanup(setattr, telemetry, '_telemetry', None)
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(4)
+        ])
+        # Sinyalsiz oluşturulur; atamalar yalnızca testin saatiyle ölçülsün
+        self.users = CustomUser.objects.bulk_create([
+            CustomUser(phone_number=f'0555000000{i}') for i in range(4)
+        ])
+
+    def test_batch_latency_matches_single_assignment(self):
+        # 3 kullanıcılık parti 300 ms, tek atama 100 ms: kullanıcı başına ikisi de 100 ms
+        with mock.patch('barcodes.models.time.perf_counter', side_effect=[0.0, 0.3]):
+            unassigned = UserBarcode.assign_barcodes_to_users([user.id for user in self.users[:3]])
+        self.assertEqual(unassigned, set())
+        telemetry.get_telemetry().flush()
+        batch = telemetry.campaign_forecast()['TEST2025']
+        self.assertAlmostEqual(batch['latency_ms_avg'], 100)
+        self.assertAlmostEqual(batch['latency_ms_max'], 300)
+
+        with mock.patch('barcodes.models.time.perf_counter', side_effect=[1.0, 1.1]):
+            self.assertIsNotNone(UserBarcode.assign_barcode_to_user(self.users[3]))
+        telemetry.get_telemetry().flush()
+        self.assertAlmostEqual(telemetry.campaign_forecast()['TEST2025']['latency_ms_avg'], batch['latency_ms_avg'])
+
+
+class GenerateBarcodesTests(TestCase):
+    def test_codes_are_unique_per_campaign_and_carry_check_digits(self):
+        CampaignBarcode.objects.create(barcode_code='000001', barcode_name='Eski', campaign_code='ESKI')
+        call_command('generate_barcodes', campaign_code='ESKI', count=99_999, seed=1, stdout=StringIO())
+        call_command('generate_barcodes', campaign_code='YENI', count=100, length=13, seed=1, stdout=StringIO())
+
+        old_codes = set(CampaignBarcode.objects.filter(campaign_code='ESKI').values_list('barcode_code', flat=True))
+        self.assertEqual(len(old_codes), 100_000)
+        new_codes = list(CampaignBarcode.objects.filter(campaign_code='YENI').values_list('barcode_code', flat=True))
+        self.assertEqual(len(new_codes), 100)
+        self.assertTrue(all(len(code) == 13 and has_valid_check_digit(code) for code in new_codes))
+        self.assertEqual(CampaignBarcodeStats.for_campaign('YENI').available, 100)
+
+        # Aynı 6 haneli kod başka bir kampanyada da bulunabilir
+        CampaignBarcode.objects.create(barcode_code='000001', barcode_name='Yeni', campaign_code='YENI')
+
+    def test_check_digit_catches_typos(self):
+        self.assertEqual(ean_check_digit('400638133393'), 1)
+        self.assertTrue(is_valid_code('4006381333931'))
+        self.assertFalse(is_valid_code('4006381333913'))
+        self.assertFalse(is_valid_code('4006381333932'))
+
+
+class ImportBarcodesTests(TestCase):
+    def test_counters_advance_with_each_committed_chunk(self):
+        CampaignBarcode.objects.create(barcode_code='000001', barcode_name='Eski', campaign_code='IMPORT')
+        CampaignBarcodeStats.rebuild('IMPORT')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'codes.txt')
+            with open(path, 'w') as handle:
+                handle.write('\n'.join(f'{i:06d}' for i in range(1, 6)))
+            # Son uzlaştırma olmadan da sayaçlar parça parça güncel kalmalı
+            with mock.patch.object(CampaignBarcodeStats, 'rebuild') as rebuild:
+                call_command('import_barcodes', file=path, campaign_code='IMPORT', chunk_size=2, stdout=StringIO())
+        rebuild.assert_called_once_with('IMPORT')
+
+        stats = CampaignBarcodeStats.for_campaign('IMPORT')
+        self.assertEqual((stats.total, stats.available), (5, 5))
+        self.assertEqual(CampaignBarcodeStats.rebuild('IMPORT', dry_run=True), {})
@@ -8,4 +8,10 @@ urlpatterns = [
     path('user-barcode/', views.get_user_barcode, name='get_user_barcode'),
     path('active-campaign/', views.get_active_campaign, name='get_active_campaign'),
     path('assign-barcode/', views.assign_barcode_manual, name='assign_barcode_manual'),
+    path('image/<str:code>.<str:fmt>', views.barcode_image, name='barcode_image'),
+    path('pos/validate/', views.pos_validate, name='pos_validate'),
+    path('pos/index-stats/', views.pos_index_stats, name='pos_index_stats'),
+    path('pos/redemptions/', views.ingest_redemptions, name='ingest_redemptions'),
+    path('metrics/', views.pool_metrics, name='pool_metrics'),
+    path('metrics/prometheus/', views.pool_metrics_prometheus, name='pool_metrics_prometheus'),
 ]
\ No newline at end of file
@@ -1,9 +1,17 @@
+from django.http import HttpResponse
+from django.utils.http import parse_etags
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.response import Response
-from .models import UserBarcode, Campaign
+from users.authentication import CachedJWTAuthentication
+from .models import BarcodeRedemption, UserBarcode, Campaign
+from .pos_index import get_barcode_index
+from .rendering import normalize_options, render_barcode
+from .telemetry import campaign_forecast, prometheus_lines
 from .serializers import UserBarcodeSerializer, CampaignSerializer
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,12 +20,14 @@ logger = logging.getLogger(__name__)
 @permission_classes([AllowAny])
 def test_view(request):
     """Test endpoint - barcodes app'inin çalışıp çalışmadığını kontrol et"""
-    from .models import CampaignBarcode
+    from django.db.models import Sum
+    from .models import CampaignBarcodeStats
     
-    # Kampanya ve barkod durumunu kontrol et
+    # Kampanya ve barkod durumunu kontrol et (sayaç tablosundan)
     active_campaign = Campaign.get_active_campaign()
-    total_barcodes = CampaignBarcode.objects.count()
-    available_barcodes = CampaignBarcode.objects.filter(is_assigned=False, is_active=True).count()
+    totals = CampaignBarcodeStats.objects.aggregate(total=Sum('total'), available=Sum('available'))
+    total_barcodes = totals['total'] or 0
+    available_barcodes = totals['available'] or 0
     
     return Response({
         'success': True,
@@ -37,7 +47,16 @@ def get_user_barcode(request):
     """Kullanıcının barkodunu getir - yoksa otomatik ata"""
     try:
         # Önce mevcut barkodu kontrol et
-        user_barcode = UserBarcode.objects.select_related('campaign_barcode').filter(user=request.user).first()
+        user_barcode = UserBarcode.objects.select_related('campaign_barcode__campaign').filter(user_id=request.user.pk).first()
+        
+        # Atama kuyrukta bekliyorsa worker'ı bekle, ikinci kez atama yapma
+        if not user_barcode and UserBarcode.has_pending_assignment(request.user):
+            return Response({
+                'success': False,
+                'pending': True,
+                'message': 'Barkodunuz hazırlanıyor. Lütfen birazdan tekrar deneyin.',
+                'barcode': None
+            }, status=status.HTTP_202_ACCEPTED)
         
         # Barkod yoksa otomatik ata
         if not user_barcode:
@@ -104,7 +123,7 @@ def assign_barcode_manual(request):
     """Kullanıcıya manuel barkod atama (admin için - force assign)"""
     try:
         # Mevcut barkodu kontrol et
-        existing_barcode = UserBarcode.objects.filter(user=request.user).first()
+        existing_barcode = UserBarcode.objects.select_related('campaign_barcode__campaign').filter(user_id=request.user.pk).first()
         
         if existing_barcode:
             return Response({
@@ -135,4 +154,149 @@ def assign_barcode_manual(request):
         return Response({
             'success': False,
             'message': 'Barkod atanırken bir hata oluştu.'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication, SessionAuthentication])
+@permission_classes([IsAuthenticated])
+def barcode_image(request, code, fmt):
+    """Barkod görüntüsünü SVG/PNG olarak üret - içerik özetiyle önbelleklenir"""
+    # Personel dışındaki kullanıcılar yalnızca kendi barkodlarını çizdirebilir
+    if not request.user.is_staff and not UserBarcode.objects.filter(
+        user_id=request.user.pk, campaign_barcode__barcode_code=code
+    ).exists():
+        return Response({
+            'success': False,
+            'message': 'Barkod bulunamadı.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    fmt = fmt.lower()
+    symbology = request.GET.get('symbology', 'code128').lower()
+    try:
+        options = normalize_options(fmt, request.GET)
+        content, content_type, digest = render_barcode(code, symbology, fmt, options)
+    except ValueError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    etag = f'"{digest}"'
+    # Aynı URL her zaman aynı baytları verir; istemci önbelleği hiç yeniden doğrulamasın
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+# Tek istekte doğrulanabilecek en fazla kod
+POS_BATCH_LIMIT = 1000
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def pos_validate(request):
+    """Kasada okutulan barkod(lar)ı bellekteki indeksten doğrula - veritabanına gitmez"""
+    if 'codes' in request.data:
+        codes = request.data.get('codes')
+        if not isinstance(codes, list) or not codes:
+            return Response({
+                'success': False,
+                'message': 'codes boş olmayan bir liste olmalı'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(codes) > POS_BATCH_LIMIT:
+            return Response({
+                'success': False,
+                'message': f'Tek istekte en fazla {POS_BATCH_LIMIT} kod doğrulanabilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    elif request.data.get('code'):
+        codes = [request.data.get('code')]
+    else:
+        return Response({
+            'success': False,
+            'message': 'code ya da codes gerekli'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    index = get_barcode_index()
+    results = [
+        {'code': code, 'valid': state == 'assigned', 'status': state}
+        for code, state in index.validate(codes)
+    ]
+    response = {
+        'success': True,
+        'campaign_code': index.campaign_code,
+    }
+    if 'codes' in request.data:
+        response['results'] = results
+    else:
+        response.update(results[0])
+    return Response(response, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pos_index_stats(request):
+    """POS indeksinin bellek kullanımı, tazeliği ve ortalama sorgu süresi"""
+    return Response({
+        'success': True,
+        'index': get_barcode_index().stats()
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def ingest_redemptions(request):
+    """POS'tan gelen NDJSON kullanım partisini toplu kaydet - satır başına sonuç döner"""
+    lines = []
+    # Gövde satır satır okunur; parti tek seferde belleğe JSON olarak açılmaz
+    for line_number, raw_line in enumerate(request.stream or (), 1):
+        if not raw_line.strip():
+            continue
+        if len(lines) >= BarcodeRedemption.BATCH_LIMIT:
+            return Response({
+                'success': False,
+                'message': f'Tek partide en fazla {BarcodeRedemption.BATCH_LIMIT} satır gönderilebilir'
+            }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            record = json.loads(raw_line)
+        except (ValueError, UnicodeDecodeError):
+            lines.append((line_number, None, 'Geçersiz JSON'))
+            continue
+        fields, error = BarcodeRedemption.parse_record(record)
+        lines.append((line_number, fields, error))
+
+    if not lines:
+        return Response({
+            'success': False,
+            'message': 'Boş parti'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    results = BarcodeRedemption.ingest(lines)
+    summary = {name: 0 for name in ('created', 'duplicate', 'rejected', 'error')}
+    for result in results:
+        summary[result['status']] += 1
+    logger.info(f"REDEMPTION: {request.user.phone_number} partisi: {summary}")
+
+    return Response({
+        'success': True,
+        'message': f"{summary['created']} kullanım kaydedildi",
+        'summary': summary,
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pool_metrics(request):
+    """Kampanya başına havuz derinliği, atama hızı, gecikme ve tükenme tahmini"""
+    campaign_code = request.GET.get('campaign_code')
+    return Response({
+        'success': True,
+        'campaigns': campaign_forecast([campaign_code] if campaign_code else None)
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pool_metrics_prometheus(request):
+    """Aynı ölçümler Prometheus metin biçiminde"""
+    return HttpResponse(
+        prometheus_lines(campaign_forecast()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
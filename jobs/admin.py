@@ -0,0 +1,20 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'key', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'created_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key', 'last_error')
+    ordering = ('run_after', 'id')
+    readonly_fields = ('locked_by', 'locked_at', 'last_error', 'created_at', 'updated_at')
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.filter(status__in=[Job.STATUS_PENDING, Job.STATUS_FAILED]).update(
+            status=Job.STATUS_PENDING, run_after=timezone.now(), attempts=0, last_error=''
+        )
+        self.message_user(request, f'{updated} adet iş hemen çalışacak şekilde kuyruğa alındı.')
+    retry_now.short_description = 'Seçili işleri hemen yeniden dene'
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Arka Plan İşleri'
+    
+    def ready(self):
+        # Her uygulamanın jobs.py modülündeki işleyicileri kaydet
+        autodiscover_modules('jobs')
@@ -0,0 +1,81 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from jobs.models import Job
+from jobs.registry import get_handler, registered_kinds
+
+
+class Command(BaseCommand):
+    help = 'Veritabanı kuyruğundaki arka plan işlerini toplu olarak işle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Sadece bu iş türlerini işle (tekrarlanabilir, varsayılan: hepsi)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Parti başına iş sayısı (varsayılan: işleyicinin batch_size değeri)'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=1.0,
+            help='Kuyruk boşken bekleme süresi, saniye (varsayılan: 1)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Kuyruk boşalınca çık'
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or registered_kinds()
+        unknown = [kind for kind in kinds if get_handler(kind) is None]
+        if unknown:
+            raise CommandError(f'Kayıtlı olmayan iş türü: {", ".join(unknown)}')
+
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f'👷 Worker başladı: {self.worker_id} - iş türleri: {", ".join(kinds)}')
+        while not self.stopping:
+            close_old_connections()
+            processed = sum(self._run_batch(kind, options['batch_size']) for kind in kinds)
+            if processed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+        self.stdout.write('👋 Worker durdu')
+
+    def _run_batch(self, kind, batch_size):
+        handler = get_handler(kind)
+        jobs = Job.claim_batch(kind, batch_size or handler.batch_size, self.worker_id)
+        if not jobs:
+            return 0
+
+        started = time.perf_counter()
+        try:
+            failures = handler.func(jobs) or {}
+        except Exception as e:
+            failures = {job.pk: f'{type(e).__name__}: {e}' for job in jobs}
+        done, retried = Job.complete(jobs, failures)
+        elapsed = time.perf_counter() - started
+
+        message = f'📦 {kind}: {done} tamamlandı, {retried} yeniden denenecek ({elapsed:.2f} sn)'
+        self.stdout.write(self.style.WARNING(message) if retried else message)
+        return len(jobs)
+
+    def _stop(self, signum, frame):
+        self.stdout.write('⏹️  Durdurma sinyali alındı, mevcut parti bitince çıkılacak')
+        self.stopping = True
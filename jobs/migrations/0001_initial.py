@@ -0,0 +1,46 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='İş Türü')),
+                ('key', models.CharField(blank=True, default='', max_length=100, verbose_name='Anahtar')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Veri')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('running', 'Çalışıyor'), ('failed', 'Başarısız')], default='pending', max_length=10, verbose_name='Durum')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='En Fazla Deneme')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Çalışma Zamanı')),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100, verbose_name='İşleyen')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Kilit Zamanı')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Son Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Arka Plan İşi',
+                'verbose_name_plural': 'Arka Plan İşleri',
+                'ordering': ['run_after', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['kind', 'run_after', 'id'], name='job_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running']), models.Q(('key', ''), _negated=True)), fields=('kind', 'key'), name='job_unique_active_key'),
+        ),
+    ]
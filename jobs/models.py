@@ -0,0 +1,158 @@
+from datetime import timedelta
+import random
+
+from django.conf import settings
+from django.db import models, transaction, connection, IntegrityError
+from django.utils import timezone
+
+DEFAULTS = {
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
+    'VISIBILITY_TIMEOUT_SECONDS': 300,
+}
+
+
+def queue_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'JOB_QUEUE', {})}[name]
+
+
+class Job(models.Model):
+    """Veritabanı tabanlı arka plan işi - run_worker komutu tarafından toplu işlenir"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Bekliyor'),
+        (STATUS_RUNNING, 'Çalışıyor'),
+        (STATUS_FAILED, 'Başarısız'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    kind = models.CharField(max_length=50, verbose_name='İş Türü')
+    key = models.CharField(max_length=100, blank=True, default='', verbose_name='Anahtar')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Veri')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='Durum')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='En Fazla Deneme')
+    run_after = models.DateTimeField(default=timezone.now, verbose_name='Çalışma Zamanı')
+    locked_by = models.CharField(max_length=100, blank=True, default='', verbose_name='İşleyen')
+    locked_at = models.DateTimeField(blank=True, null=True, verbose_name='Kilit Zamanı')
+    last_error = models.TextField(blank=True, default='', verbose_name='Son Hata')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
+
+    class Meta:
+        verbose_name = 'Arka Plan İşi'
+        verbose_name_plural = 'Arka Plan İşleri'
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Kuyruktan alma sorgusu: bekleyen işler zamanına göre
+            models.Index(
+                fields=['kind', 'run_after', 'id'],
+                condition=models.Q(status='pending'),
+                name='job_pending_idx',
+            ),
+        ]
+        constraints = [
+            # Aynı anahtar için kuyrukta en fazla bir aktif iş
+            models.UniqueConstraint(
+                fields=['kind', 'key'],
+                condition=models.Q(status__in=['pending', 'running']) & ~models.Q(key=''),
+                name='job_unique_active_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} [{self.key or self.pk}] - {self.get_status_display()}"
+
+    @classmethod
+    def enqueue(cls, kind, payload=None, key='', run_after=None, max_attempts=None):
+        """Kuyruğa iş ekle; aynı anahtarla aktif bir iş varsa onu döndür.
+
+        Çağıranın transaction'ına katılır; iş ancak commit sonrası görünür olur.
+        """
+        from .registry import get_handler
+        handler = get_handler(kind)
+        if max_attempts is None:
+            max_attempts = handler.max_attempts if handler else 5
+        try:
+            with transaction.atomic():
+                return cls.objects.create(
+                    kind=kind,
+                    key=key,
+                    payload=payload or {},
+                    run_after=run_after or timezone.now(),
+                    max_attempts=max_attempts,
+                )
+        except IntegrityError:
+            return cls.objects.filter(kind=kind, key=key, status__in=cls.ACTIVE_STATUSES).first()
+
+    @classmethod
+    def is_active(cls, kind, key):
+        """Bu anahtar için bekleyen ya da çalışan iş var mı?"""
+        return cls.objects.filter(kind=kind, key=key, status__in=cls.ACTIVE_STATUSES).exists()
+
+    @classmethod
+    def claim_batch(cls, kind, size, worker_id):
+        """Çalışmaya hazır en fazla size işi sahiplen.
+
+        PostgreSQL'de FOR UPDATE SKIP LOCKED ile birden fazla worker aynı
+        işleri beklemeden paylaşır. Süresi dolan kilitler (çöken worker)
+        yeniden alınır.
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=queue_setting('VISIBILITY_TIMEOUT_SECONDS'))
+        ready = cls.objects.filter(kind=kind).filter(
+            models.Q(status=cls.STATUS_PENDING, run_after__lte=now)
+            | models.Q(status=cls.STATUS_RUNNING, locked_at__lt=stale)
+        ).order_by('run_after', 'id')
+
+        with transaction.atomic():
+            if connection.features.has_select_for_update_skip_locked:
+                ready = ready.select_for_update(skip_locked=True)
+            job_ids = list(ready.values_list('id', flat=True)[:size])
+            if not job_ids:
+                return []
+            cls.objects.filter(id__in=job_ids).update(
+                status=cls.STATUS_RUNNING,
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=models.F('attempts') + 1,
+                updated_at=now,
+            )
+        return list(cls.objects.filter(id__in=job_ids, locked_by=worker_id, locked_at=now))
+
+    @classmethod
+    def complete(cls, jobs, failures=None):
+        """Başarılı işleri sil; başarısızları geri çekilmeyle yeniden kuyruğa al"""
+        failures = failures or {}
+        now = timezone.now()
+        base = queue_setting('RETRY_BASE_SECONDS')
+        ceiling = queue_setting('RETRY_MAX_SECONDS')
+
+        done_ids = [job.pk for job in jobs if job.pk not in failures]
+        retried = []
+        for job in jobs:
+            if job.pk not in failures:
+                continue
+            job.last_error = str(failures[job.pk])[:2000]
+            job.locked_by = ''
+            job.locked_at = None
+            job.updated_at = now
+            if job.attempts >= job.max_attempts:
+                job.status = cls.STATUS_FAILED
+            else:
+                # Üstel geri çekilme + rastgele sapma (aynı anda tekrar denemeleri dağıtmak için)
+                delay = min(ceiling, base * 2 ** (job.attempts - 1))
+                job.status = cls.STATUS_PENDING
+                job.run_after = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            retried.append(job)
+
+        with transaction.atomic():
+            if done_ids:
+                cls.objects.filter(id__in=done_ids).delete()
+            if retried:
+                cls.objects.bulk_update(
+                    retried, ['status', 'run_after', 'last_error', 'locked_by', 'locked_at', 'updated_at']
+                )
+        return len(done_ids), len(retried)
@@ -0,0 +1,32 @@
+"""İş türü -> toplu işleyici kaydı.
+
+İşleyiciler uygulamaların jobs.py modüllerinde @register ile tanımlanır ve
+bir Job listesi alır. Başarısız olan işler için {job_id: hata mesajı}
+sözlüğü döndürebilir; istisna fırlatırsa tüm parti başarısız sayılır.
+"""
+
+_handlers = {}
+
+
+class JobHandler:
+    def __init__(self, kind, func, batch_size, max_attempts):
+        self.kind = kind
+        self.func = func
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+
+
+def register(kind, batch_size=100, max_attempts=5):
+    """İş türü için toplu işleyici kaydet"""
+    def decorator(func):
+        _handlers[kind] = JobHandler(kind, func, batch_size, max_attempts)
+        return func
+    return decorator
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def registered_kinds():
+    return sorted(_handlers)
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.8 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunities', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opportunityproduct',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='opportunity_active_recent_idx'),
+        ),
+    ]
@@ -29,6 +29,14 @@ class OpportunityProduct(models.Model):
         verbose_name = "Fırsat Ürünü"
         verbose_name_plural = "Fırsat Ürünleri"
         ordering = ['-created_at']
+        indexes = [
+            # Aktif ürün listesi varsayılan sıralamayla (-created_at) doğrudan indeksten okunur
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(is_active=True),
+                name='opportunity_active_recent_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.name
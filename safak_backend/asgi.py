@@ -14,3 +14,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'safak_backend.settings')
 
 application = get_asgi_application()
+
+# ASYNC_AUTH_VIEWS açıkken login/register şifre işini users.hashing havuzuna verir;
+# süreçler ilk istekte değil, sunucu açılırken başlatılsın.
+# Örnek: gunicorn safak_backend.asgi:application -k uvicorn.workers.UvicornWorker
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'ASYNC_AUTH_VIEWS', False):
+    from users.hashing import get_hashing_pool  # noqa: E402
+    get_hashing_pool().warm_up()
@@ -89,6 +89,8 @@ INSTALLED_APPS = [
     # Local apps
     'users',
     'opportunities',
+    'barcodes',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -156,6 +158,20 @@ DATABASES = {
 }
 
 
+# Cache
+# Aktif kampanya önbelleğinin nesil anahtarı gibi süreçler arası paylaşılan değerler.
+# Birden fazla sunucuda çalışırken Redis/Memcached gibi ortak bir backend kullanılmalı.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
+# Aktif kampanya önbelleğinin en uzun geçerlilik süresi (saniye)
+ACTIVE_CAMPAIGN_CACHE_MAX_SECONDS = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -204,10 +220,105 @@ AUTH_USER_MODEL = 'users.CustomUser'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Kapsayan (INCLUDE) indeks kolonları yalnızca PostgreSQL'de oluşturulur;
+# SQLite'ta aynı kısmi indeks INCLUDE olmadan kurulur.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
+# Barkod havuzu - her süreç müsait barkodlardan bir blok kiralar
+BARCODE_POOL = {
+    'ENABLED': True,
+    'BLOCK_SIZE': 200,
+    'LOW_WATER_MARK': 50,
+    'LEASE_SECONDS': 600,
+}
+
+# İstek anında üretilen barkod görüntüleri (içerik özetiyle disk + bellek önbelleği)
+BARCODE_RENDER = {
+    'CACHE_DIR': BASE_DIR / '.cache' / 'barcode-images',
+    'MEMORY_CACHE_BYTES': 16 * 1024 * 1024,
+    'DISK_CACHE_BYTES': 256 * 1024 * 1024,
+}
+
+# Barkod havuzu tüketim ölçümleri ve tükenme tahmini penceresi
+BARCODE_TELEMETRY = {
+    'FLUSH_SECONDS': 10,
+    'FORECAST_WINDOW_MINUTES': 60,
+    'SHORT_WINDOW_MINUTES': 5,
+    'RETENTION_DAYS': 7,
+}
+
+# Kasa (POS) doğrulama indeksi yenileme aralıkları
+POS_INDEX = {
+    'REFRESH_SECONDS': 2,
+    'OVERLAP_SECONDS': 60,
+    'FULL_REBUILD_SECONDS': 3600,
+}
+
+# Kayıt sonrası barkod ataması kuyruğa alınır ve run_worker tarafından yapılır
+ASYNC_BARCODE_ASSIGNMENT = True
+
+# /api/login/ ve /api/register/ async görünümlerle (users.async_views) sunulsun mu?
+# ASGI sunucusuyla (safak_backend/asgi.py) birlikte açılmalı
+ASYNC_AUTH_VIEWS = False
+
+# Async görünümlerin şifre hash'leme süreç havuzu; bekleyen iş sınırı dolunca 503 döner
+PASSWORD_HASHING = {
+    'WORKERS': None,  # None: çekirdek sayısı
+    'MAX_PENDING': None,  # None: WORKERS * 2
+    'RETRY_AFTER_SECONDS': 2,
+}
+
+# JWT ile gelen isteklerde kullanıcı özeti süreç içi LRU'dan okunur (users.authentication);
+# kullanıcı kaydedilince/silinince düşer, diğer süreçler yalnızca o kullanıcıyı CHANGE_CHECK_SECONDS içinde düşürür
+USER_SNAPSHOT_CACHE = {
+    'MAX_ENTRIES': 10000,
+    'MAX_AGE_SECONDS': 300,
+    'CHANGE_CHECK_SECONDS': 1,
+    'MAX_CHANGES': 1000,
+}
+
+# last_login her girişte değil, FLUSH_SECONDS'ta bir toplu yazılır
+LAST_LOGIN_BUFFER = {
+    'FLUSH_SECONDS': 30,
+    'MAX_PENDING': 5000,
+}
+
+# Geçersiz refresh token kontrolünün önündeki Bloom filtresi (users.revocation);
+# süresi dolan kayıtlar purge_revoked_tokens ile gün gün silinir
+TOKEN_REVOCATION = {
+    'BLOOM_CAPACITY': 1000000,
+    'BLOOM_ERROR_RATE': 0.001,
+    'OVERLAP_SECONDS': 60,
+    'FULL_REBUILD_SECONDS': 3600,
+}
+
+# Telefon doğrulama kodları (users.verification); kodlar run_worker tarafından SMS ile gönderilir
+PHONE_VERIFICATION = {
+    'TTL_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    'RESEND_SECONDS': 60,
+    'MAX_SENDS_PER_WINDOW': 5,
+    'WINDOW_SECONDS': 3600,
+}
+
+# SMS ağ geçidi (users.sms); yerelde ConsoleBackend ya da FileBackend, canlıda sağlayıcı backend'i.
+# ConsoleBackend/FileBackend kodları düz metin yazar ve DEBUG kapalıyken reddedilir
+SMS_GATEWAY = {
+    'BACKEND': 'users.sms.ConsoleBackend',
+    'FILE_PATH': BASE_DIR / '.cache' / 'sms.log',
+}
+
+# Arka plan iş kuyruğu (jobs uygulaması)
+JOB_QUEUE = {
+    'RETRY_BASE_SECONDS': 5,
+    'RETRY_MAX_SECONDS': 3600,
+    'VISIBILITY_TIMEOUT_SECONDS': 300,
+}
+
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -222,7 +333,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login users.last_login tamponu üzerinden toplu yazılır (bkz. TOKEN_OBTAIN_SERIALIZER)
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -238,6 +350,9 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.BufferedTokenObtainPairSerializer',
+    # Rotasyonda eski refresh token users.RevokedToken'a yazılır (simplejwt token_blacklist uygulaması kullanılmaz)
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.RevocableTokenRefreshSerializer',
     'JTI_CLAIM': 'jti',
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
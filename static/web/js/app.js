@@ -178,43 +178,6 @@ function createMessagesContainer() {
     return container;
 }
 
-// Barkod görüntü oluşturma (Pure JavaScript)
-function generateBarcode(value, container) {
-    if (!value || !container) return;
-
-    // Pattern algoritması
-    const patterns = [];
-    const seed = value.split('').reduce((acc, char) => acc + char.charCodeAt(0), 0);
-    
-    for (let i = 0; i < 40; i++) {
-        const width = ((seed + i) % 4) + 1;
-        patterns.push(width);
-    }
-
-    // HTML oluştur
-    const barcodeHTML = `
-        <div class="barcode-stripes">
-            ${patterns.map((width, index) => 
-                `<div class="barcode-line" style="width: ${width}px; background-color: ${index % 2 === 0 ? '#000' : 'transparent'};"></div>`
-            ).join('')}
-        </div>
-        <div class="barcode-code">${value}</div>
-    `;
-
-    container.innerHTML = barcodeHTML;
-}
-
-// Sayfa yüklendiğinde barkod oluştur
-document.addEventListener('DOMContentLoaded', function() {
-    const barcodeContainer = document.querySelector('.barcode-display');
-    const barcodeCode = document.querySelector('[data-barcode-code]');
-    
-    if (barcodeContainer && barcodeCode) {
-        const code = barcodeCode.getAttribute('data-barcode-code');
-        generateBarcode(code, barcodeContainer);
-    }
-});
-
 // PWA Support
 if ('serviceWorker' in navigator) {
     window.addEventListener('load', function() {
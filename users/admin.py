@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Child
+from .models import CustomUser, Child, normalize_phone
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -15,7 +15,7 @@ class CustomUserAdmin(UserAdmin):
         ('Çocuk Bilgileri', {'fields': ('has_children', 'children_count')}),
         ('Doğrulama', {'fields': ('is_phone_verified',)}),
         ('İzinler', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
-        ('Önemli Tarihler', {'fields': ('last_login', 'date_joined')}),
+        ('Önemli Tarihler', {'fields': ('last_login', 'date_joined', 'deleted_at')}),
     )
     
     add_fieldsets = (
@@ -25,6 +25,13 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Numara aramaları her yazımda phone_e164 indeksinden tam eşleşmeyle yapılır
+        phone_e164 = normalize_phone(search_term.strip())
+        if phone_e164 is not None:
+            return queryset.filter(phone_e164=phone_e164), False
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Child)
 class ChildAdmin(admin.ModelAdmin):
     list_display = ('user', 'grade', 'get_grade_display', 'created_at')
@@ -0,0 +1,149 @@
+"""Login ve register görünümlerinin async sürümleri (ASGI, bkz. safak_backend/asgi.py).
+
+Yanıt biçimi views.login/views.register ile aynıdır. Şifre doğrulama ve
+hash'leme users.hashing havuzunda yapılır; havuz doluysa 503 + Retry-After
+döner. Django 4.1 dekoratörleri async görünümleri desteklemediği için CSRF
+muafiyeti ve metod kontrolü elle yapılır (DRF görünümleri gibi token tabanlı).
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework import status
+from rest_framework.serializers import ValidationError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .hashing import HashingPoolBusy, get_hashing_pool, hashing_setting
+from .last_login import get_last_login_buffer
+from .models import CustomUser
+from .serializers import AsyncUserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def _tokens(user):
+    refresh = RefreshToken.for_user(user)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+def _busy_response():
+    response = JsonResponse({
+        'message': 'Sunucu şu an yoğun, lütfen birkaç saniye sonra tekrar deneyin.'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(hashing_setting('RETRY_AFTER_SECONDS'))
+    return response
+
+
+def _parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def register(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    data = _parse_body(request)
+    if data is None:
+        return JsonResponse({'message': 'Geçersiz JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = AsyncUserRegistrationSerializer(data=data)
+    if not serializer.is_valid():
+        logger.error(f"❌ Register validasyonu başarısız: {serializer.errors}")
+        return JsonResponse({
+            'message': 'Kayıt işlemi başarısız.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        errors, password_hash = await get_hashing_pool().validate_and_hash(
+            serializer.validated_data['password'], serializer.user_fields()
+        )
+    except HashingPoolBusy:
+        logger.warning("⏳ Register reddedildi: şifre havuzu dolu")
+        return _busy_response()
+    if errors:
+        return JsonResponse({
+            'message': 'Kayıt işlemi başarısız.',
+            'errors': {'password': errors}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        payload = await sync_to_async(_create_user)(serializer, password_hash)
+    except ValidationError as e:
+        # Telefon numarası INSERT sırasında benzersizlik kısıtına takıldı
+        logger.error(f"❌ Register validasyonu başarısız: {e.detail}")
+        return JsonResponse({
+            'message': 'Kayıt işlemi başarısız.',
+            'errors': e.detail
+        }, status=status.HTTP_400_BAD_REQUEST)
+    logger.info(f"✅ Kullanıcı oluşturuldu: {payload['user']['phone_number']}")
+    return JsonResponse({'message': 'Kullanıcı başarıyla oluşturuldu.', **payload}, status=status.HTTP_201_CREATED)
+
+
+def _create_user(serializer, password_hash):
+    # Kayıt, sinyal ve yanıt verisi aynı iş parçacığında; çocuklar yeniden okunmaz
+    user = serializer.save(password_hash=password_hash)
+    return {
+        'user': UserProfileSerializer(user, context={'children': serializer.saved_children}).data,
+        'tokens': _tokens(user),
+    }
+
+
+async def login(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    data = _parse_body(request)
+    if data is None:
+        return JsonResponse({'message': 'Geçersiz JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserLoginSerializer(data=data)
+    if not serializer.is_valid():
+        logger.error(f"❌ Login validasyonu başarısız: {serializer.errors}")
+        return JsonResponse({
+            'message': 'Giriş işlemi başarısız.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    # Havuz doluyken veritabanına hiç gitmeden reddet
+    pool = get_hashing_pool()
+    if pool.saturated:
+        return _busy_response()
+
+    phone_number = serializer.validated_data['phone_number']
+    password = serializer.validated_data['password']
+    user = await CustomUser.objects.filter(phone_e164=phone_number).afirst()
+    try:
+        valid, upgraded_hash = await pool.verify(password, user.password if user else None)
+    except HashingPoolBusy:
+        logger.warning(f"⏳ Login reddedildi: şifre havuzu dolu ({phone_number})")
+        return _busy_response()
+
+    # ModelBackend.user_can_authenticate ile aynı kural
+    if not valid or not user.is_active:
+        logger.warning(f"❌ Login başarısız: {phone_number}")
+        return JsonResponse({
+            'message': 'Telefon numarası veya şifre hatalı.'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    logger.info(f"✅ Login başarılı: {user.phone_number}")
+    payload = await sync_to_async(_login_payload)(user, upgraded_hash)
+    return JsonResponse({'message': 'Giriş başarılı.', **payload}, status=status.HTTP_200_OK)
+
+
+def _login_payload(user, upgraded_hash):
+    get_last_login_buffer().record(user.pk)
+    if upgraded_hash:
+        # Hasher ayarları değişmiş; check_password'ün setter'ı gibi yeni hash'i kaydet
+        user.password = upgraded_hash
+        user.save(update_fields=['password'])
+    return {'user': UserProfileSerializer(user).data, 'tokens': _tokens(user)}
+
+
+register.csrf_exempt = True
+login.csrf_exempt = True
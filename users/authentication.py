@@ -0,0 +1,211 @@
+"""Her istekte kullanıcı tablosuna gitmeyen JWT kimlik doğrulaması.
+
+Token yalnızca kimliği (user_id) taşır; is_active gibi alanlar 24 saat
+geçerli bir token'a gömülürse pasifleştirilen hesap token süresince açık
+kalırdı. Bu yüzden alanlar süreç içi bir LRU'daki kullanıcı özetinden
+(snapshot) okunur. Özet kullanıcı kaydedildiğinde ya da silindiğinde bu
+süreçte hemen düşer. Değişen kullanıcı id'leri paylaşılan önbellekte sıra
+numaralı kısa bir günlüğe yazılır; diğer süreçler en geç CHANGE_CHECK_SECONDS
+içinde günlüğün yeni kısmını okuyup yalnızca o kullanıcıları düşürür. Günlük
+okunamazsa (anahtar düşmüş ya da MAX_CHANGES'tan fazla değişiklik birikmiş)
+süreç tüm LRU'yu bırakır. MAX_AGE_SECONDS her kaydın üst sınırıdır.
+
+request.user bir LazyUser'dır: özetteki alanlar (id, phone_number,
+is_active, ...) sorgusuz cevaplanır; görünüm başka bir alana, ilişkiye ya
+da metoda dokunduğunda kullanıcı veritabanından bir kez yüklenir.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'MAX_AGE_SECONDS': 300,
+    'CHANGE_CHECK_SECONDS': 1,
+    'MAX_CHANGES': 1000,
+}
+
+SNAPSHOT_FIELDS = (
+    'id', 'phone_number', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser',
+    'is_phone_verified', 'has_children', 'children_count',
+)
+
+
+def snapshot_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'USER_SNAPSHOT_CACHE', {})}[name]
+
+
+def make_snapshot(user):
+    snapshot = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    snapshot['pk'] = user.pk
+    if api_settings.CHECK_REVOKE_TOKEN:
+        snapshot['_revoke_hash'] = get_md5_hash_password(user.password)
+    return snapshot
+
+
+class UserSnapshotCache:
+    """user_id -> (özet, eklenme anı) LRU'su"""
+    SEQUENCE_KEY = 'users:snapshot:sequence'
+    CHANGE_KEY = 'users:snapshot:change:{}'
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._changes_checked_at = 0.0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        self._check_changes(now)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            snapshot, stored_at = entry
+            if now - stored_at >= snapshot_setting('MAX_AGE_SECONDS'):
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return snapshot
+
+    def put(self, user_id, snapshot):
+        with self._lock:
+            self._entries[user_id] = (snapshot, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > snapshot_setting('MAX_ENTRIES'):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Bu süreçte hemen düşür, diğer süreçlere değişiklik günlüğüyle bildir"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        # Sıra anahtarı yoksa (ilk değişiklik ya da önbellekten düşmüş) sıfırdan başlar
+        cache.add(self.SEQUENCE_KEY, 0, None)
+        while True:
+            sequence = cache.incr(self.SEQUENCE_KEY)
+            # incr'i atomik olmayan backend'lerde aynı numarayı alan iki yazar birbirini ezmesin;
+            # MAX_AGE_SECONDS'tan eski kayıtlar zaten LRU'da yaşamaz
+            if cache.add(self.CHANGE_KEY.format(sequence), user_id, snapshot_setting('MAX_AGE_SECONDS')):
+                break
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_changes(self, now):
+        if now - self._changes_checked_at < snapshot_setting('CHANGE_CHECK_SECONDS'):
+            return
+        self._changes_checked_at = now
+        # Anahtar yoksa henüz değişiklik yok ya da sıra önbellekten düştü
+        sequence = cache.get(self.SEQUENCE_KEY, 0)
+        if sequence == self._sequence:
+            return
+        previous, self._sequence = self._sequence, sequence
+        if previous is None or not 0 < sequence - previous <= snapshot_setting('MAX_CHANGES'):
+            # İlk kontrol (LRU boş), kaçırılmış günlük ya da sıfırlanmış sıra; hangi kullanıcıların değiştiği bilinmiyor
+            self.clear()
+            return
+        keys = [self.CHANGE_KEY.format(n) for n in range(previous + 1, sequence + 1)]
+        changed = cache.get_many(keys)
+        with self._lock:
+            if len(changed) < len(keys):
+                # Kayıt önbellekten düşmüş ya da yazan süreç henüz yazmadı
+                self._entries.clear()
+                return
+            for user_id in changed.values():
+                self._entries.pop(user_id, None)
+
+
+_snapshots = None
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot_cache():
+    """Süreç düzeyindeki LRU'yu döndür; fork sonrası boş olarak yeniden oluşturulur"""
+    global _snapshots
+    with _snapshots_lock:
+        if _snapshots is None or _snapshots.pid != os.getpid():
+            _snapshots = UserSnapshotCache()
+        return _snapshots
+
+
+class LazyUser(SimpleLazyObject):
+    """Özetteki alanları sorgusuz veren, diğer her erişimde kullanıcıyı yükleyen vekil"""
+
+    def __init__(self, snapshot, load):
+        self.__dict__['_snapshot'] = snapshot
+        super().__init__(load)
+
+    def __getattr__(self, name):
+        if self._wrapped is empty:
+            snapshot = self.__dict__['_snapshot']
+            if name in snapshot:
+                return snapshot[name]
+            if name == 'is_authenticated':
+                return True
+            if name == 'is_anonymous':
+                return False
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        # DRF'in IsAuthenticated'ı `request.user and ...` ile başlar; bu kontrol yükleme yapmasın
+        return True
+
+    @property
+    def is_loaded(self):
+        return self._wrapped is not empty
+
+    def snapshot_model(self):
+        """Yalnızca okunacak, özetteki alanlarla doldurulmuş bir kullanıcı nesnesi (sorgu atmaz, kaydedilmemeli)"""
+        if self._wrapped is not empty:
+            return self._wrapped
+        from .models import CustomUser
+        return CustomUser(**{name: self.__dict__['_snapshot'][name] for name in SNAPSHOT_FIELDS})
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication ile aynı kurallar; kullanıcı özet LRU'sundan gelir"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshots = get_snapshot_cache()
+        snapshot = snapshots.get(user_id)
+        if snapshot is None:
+            # Özet yok: JWTAuthentication gibi yükle, yüklenen nesneyi doğrudan kullan
+            user = super().get_user(validated_token)
+            snapshots.put(user_id, make_snapshot(user))
+            return user
+
+        if not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != snapshot['_revoke_hash']:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return LazyUser(snapshot, lambda: self._load(user_id))
+
+    def _load(self, user_id):
+        try:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            # Özet alındıktan sonra silinmiş
+            get_snapshot_cache().invalidate(user_id)
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
@@ -0,0 +1,95 @@
+"""Mobil uygulamanın açılışta ihtiyaç duyduğu verinin tek yanıtta toplanması (/api/bootstrap/).
+
+Bölümler uygulamanın ayrı ayrı çağırdığı uç noktaların yanıtlarıyla
+aynıdır: profile (/api/profile/), children (/api/children/), barcode
+(/barcodes/user-barcode/), campaign (/barcodes/active-campaign/) ve
+opportunities (/api/opportunities/ ilk sayfası). Kullanıcı alanları kimlik
+doğrulamadaki özetten gelir; çocuklar, barkod ve fırsatlar birer sorguyla,
+aktif kampanya süreç içi önbellekten okunur.
+
+Her bölümün sürümü içeriğinin özetidir. İstemci elindeki sürümleri
+?versions=profile:<sürüm>,barcode:<sürüm> ile gönderir; sürümü değişmeyen
+bölüm verisiz ({'version', 'unchanged': True}) döner.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.settings import api_settings
+
+from barcodes.models import Campaign, UserBarcode
+from barcodes.serializers import CampaignSerializer, UserBarcodeSerializer
+from opportunities.models import OpportunityProduct
+from opportunities.serializers import OpportunityProductSerializer
+
+from .authentication import LazyUser
+from .models import Child
+from .serializers import ChildSerializer, UserProfileSerializer
+
+SECTIONS = ('profile', 'children', 'barcode', 'campaign', 'opportunities')
+
+
+def section_version(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def parse_versions(value):
+    """'profile:abc,barcode:def' -> {'profile': 'abc', 'barcode': 'def'}"""
+    versions = {}
+    for item in (value or '').split(','):
+        name, _, version = item.strip().partition(':')
+        if name in SECTIONS and version:
+            versions[name] = version
+    return versions
+
+
+def _user_barcode(request, user):
+    """get_user_barcode ile aynı akış: barkod yoksa ve atama kuyrukta değilse ata"""
+    user_barcode = UserBarcode.objects.select_related('campaign_barcode__campaign').filter(user_id=user.pk).first()
+    pending = False
+    if not user_barcode:
+        pending = UserBarcode.has_pending_assignment(user)
+        if not pending:
+            user_barcode = UserBarcode.assign_barcode_to_user(request.user)
+    return {
+        'barcode': UserBarcodeSerializer(user_barcode, context={'request': request}).data if user_barcode else None,
+        'pending': pending,
+    }
+
+
+def _opportunities(request):
+    page_size = api_settings.PAGE_SIZE
+    # COUNT sorgusu yerine bir fazla satır okunur
+    products = list(OpportunityProduct.objects.filter(is_active=True)[:page_size + 1])
+    return {
+        'results': OpportunityProductSerializer(products[:page_size], many=True, context={'request': request}).data,
+        'has_more': len(products) > page_size,
+    }
+
+
+def build_sections(request, known_versions=None):
+    known_versions = known_versions or {}
+    user = request.user
+    # Özetten gelen kullanıcı için profil alanları sorgusuz okunur
+    if isinstance(user, LazyUser):
+        user = user.snapshot_model()
+
+    children = list(Child.objects.filter(user_id=user.pk))
+    active_campaign = Campaign.get_active_campaign()
+
+    data = {
+        'profile': UserProfileSerializer(user, context={'children': children}).data,
+        'children': ChildSerializer(children, many=True).data,
+        'barcode': _user_barcode(request, user),
+        'campaign': CampaignSerializer(active_campaign).data if active_campaign else None,
+        'opportunities': _opportunities(request),
+    }
+    sections = {}
+    for name in SECTIONS:
+        version = section_version(data[name])
+        if known_versions.get(name) == version:
+            sections[name] = {'version': version, 'unchanged': True}
+        else:
+            sections[name] = {'version': version, 'data': data[name]}
+    return sections
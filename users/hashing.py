@@ -0,0 +1,132 @@
+"""Şifre hash'leme ve doğrulama için sınırlı süreç havuzu.
+
+PBKDF2 istek başına yüzlerce milisaniye CPU harcar. Async login/register
+görünümleri bu işi olay döngüsünü ve diğer istekleri bekletmeden ayrı
+süreçlerde yapar. Havuzun kuyruğu MAX_PENDING ile sınırlıdır; dolduğunda
+iş kabul edilmez (HashingPoolBusy) ve istek 503 + Retry-After ile
+reddedilir, böylece yük artışında gecikme sınırsız büyümez.
+"""
+import asyncio
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': None,  # None: çekirdek sayısı
+    'MAX_PENDING': None,  # None: WORKERS * 2
+    'RETRY_AFTER_SECONDS': 2,
+}
+
+
+def hashing_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}[name]
+
+
+class HashingPoolBusy(Exception):
+    """Havuzda bekleyen iş sınırı dolu"""
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+# Aşağıdaki fonksiyonlar havuz süreçlerinde çalışır; veritabanına erişmez
+
+def _validate_and_hash(password, user_fields):
+    """(doğrulama hataları, hash) döndür; hata varsa hash None"""
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.password_validation import validate_password
+    from django.core.exceptions import ValidationError
+    from .models import CustomUser
+
+    try:
+        validate_password(password, CustomUser(**user_fields))
+    except ValidationError as e:
+        return list(e.messages), None
+    return [], make_password(password)
+
+
+def _verify(password, encoded):
+    """(doğru mu, güncel hash) döndür; hasher ayarları değiştiyse yeni hash de hesaplanır"""
+    from django.contrib.auth.hashers import check_password, make_password
+
+    upgraded = []
+    valid = check_password(password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def _burn(password):
+    """Olmayan kullanıcı için de aynı süre harcansın (kullanıcı sayımı saldırısına karşı)"""
+    from django.contrib.auth.hashers import make_password
+    make_password(password)
+    return False, None
+
+
+class PasswordHashingPool:
+    def __init__(self, workers, max_pending):
+        self.pid = os.getpid()
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._lock = threading.Lock()
+        # fork yerine spawn: ASGI sunucusunun iş parçacıkları ve açık bağlantıları çocuklara kopyalanmasın
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_setup_worker,
+        )
+
+    @property
+    def saturated(self):
+        return self.pending >= self.max_pending
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HashingPoolBusy()
+            self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(func, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def validate_and_hash(self, password, user_fields):
+        return await self.run(_validate_and_hash, password, user_fields)
+
+    async def verify(self, password, encoded):
+        if not encoded:
+            return await self.run(_burn, password)
+        return await self.run(_verify, password, encoded)
+
+    def warm_up(self):
+        """Süreçleri ilk istekten önce başlat; spawn + django.setup() birkaç saniye sürer"""
+        for _ in range(self.workers):
+            self._executor.submit(os.getpid)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Süreç düzeyindeki havuzu döndür; fork sonrası yeniden oluşturulur"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            workers = hashing_setting('WORKERS') or os.cpu_count() or 1
+            _pool = PasswordHashingPool(workers, hashing_setting('MAX_PENDING') or workers * 2)
+            atexit.register(_pool.shutdown)
+            logger.info(f"HASHING: {workers} süreçlik şifre havuzu başlatıldı (en fazla {_pool.max_pending} bekleyen iş)")
+        return _pool
@@ -0,0 +1,25 @@
+from jobs.registry import register
+from .models import CustomUser, PhoneVerification
+from .sms import get_sms_backend
+from .verification import message_for
+
+PURGE_USERS_JOB = 'purge_users'
+SEND_VERIFICATION_SMS_JOB = 'send_verification_sms'
+
+
+@register(PURGE_USERS_JOB, batch_size=500, max_attempts=10)
+def purge_users(jobs):
+    """Hesabını silen kullanıcıları tek transaction'da toplu sil"""
+    CustomUser.purge_deleted([job.payload['user_id'] for job in jobs])
+    return {}
+
+
+@register(SEND_VERIFICATION_SMS_JOB, batch_size=100, max_attempts=5)
+def send_verification_sms(jobs):
+    """Kuyruktaki doğrulama kodlarını üret ve SMS ağ geçidine tek partide ver"""
+    # Backend yanlış ayarlıysa kod üretilmeden başarısız ol
+    backend = get_sms_backend()
+    jobs_by_phone = {job.payload['phone_e164']: job for job in jobs}
+    codes = PhoneVerification.issue_codes(list(jobs_by_phone))
+    failed = backend.send_messages([(phone, message_for(code)) for phone, code in codes.items()])
+    return {jobs_by_phone[phone].pk: error for phone, error in failed.items()}
@@ -0,0 +1,101 @@
+"""last_login için süreç içi yazma tamponu (write-behind).
+
+Her token alımında kullanıcı satırına ayrı bir UPDATE yapmak yerine giriş
+zamanları kullanıcı başına biriktirilir (aynı kullanıcının ardışık
+girişlerinden yalnızca sonuncusu kalır) ve FLUSH_SECONDS'ta bir tek
+bulk_update ile yazılır. bulk_update sinyal göndermez; last_login kullanıcı
+özetinde (users.authentication) tutulmadığı için özet düşürülmez. Süreç
+çökerse son aralıktaki giriş zamanları kaybolur; alan yalnızca bilgi amaçlıdır.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_SECONDS': 30,
+    'MAX_PENDING': 5000,  # Bu kadar kullanıcı birikince süre dolmadan yaz
+}
+
+
+def last_login_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'LAST_LOGIN_BUFFER', {})}[name]
+
+
+class LastLoginBuffer:
+    """user_id -> son giriş zamanı tamponu"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # on_commit'e bırakılan flush; transaction geri alınırsa hiç çalışmaz, bu yüzden süreli
+        self._flush_scheduled_at = None
+
+    def record(self, user_id, when=None):
+        when = when or timezone.now()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+            now = time.monotonic()
+            interval = last_login_setting('FLUSH_SECONDS')
+            due = now - self._last_flush >= interval or len(self._pending) >= last_login_setting('MAX_PENDING')
+            scheduled = self._flush_scheduled_at is not None and now - self._flush_scheduled_at < interval
+            if due and not scheduled and connection.in_atomic_block:
+                self._flush_scheduled_at = now
+        if not due or scheduled:
+            return
+        if connection.in_atomic_block:
+            transaction.on_commit(self.flush)
+        else:
+            self.flush()
+
+    def pending(self, user_id):
+        """Henüz yazılmamış giriş zamanı (yoksa None)"""
+        with self._lock:
+            return self._pending.get(user_id)
+
+    def flush(self):
+        """Tamponu tek bulk_update ile yaz; hata olursa zamanlar düşürülür, giriş etkilenmez"""
+        from .models import CustomUser
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            self._flush_scheduled_at = None
+        if not pending:
+            return 0
+        try:
+            # Tamponda beklerken silinmiş kullanıcıların UPDATE'i hiçbir satırı etkilemez
+            CustomUser.objects.bulk_update(
+                [CustomUser(pk=user_id, last_login=when) for user_id, when in pending.items()],
+                ['last_login'],
+                batch_size=1000,
+            )
+        except Exception as e:
+            logger.warning(f"LAST_LOGIN: {len(pending)} giriş zamanı yazılamadı: {str(e)}")
+            return 0
+        return len(pending)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_last_login_buffer():
+    """Süreç düzeyindeki tamponu döndür; fork sonrası yeniden oluşturulur"""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None or _buffer.pid != os.getpid():
+            _buffer = LastLoginBuffer()
+            atexit.register(_buffer.flush)
+        return _buffer
@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from users import views
+from users.authentication import get_snapshot_cache
+from users.models import Child, normalize_phone
+
+User = get_user_model()
+
+# Benchmark kullanıcısı bu numarayla oluşturulur ve sonunda silinir
+PHONE_NUMBER = '+905960000000'
+
+
+class Command(BaseCommand):
+    help = 'Açılış (bootstrap) yanıtının gecikmesini ve istek başına sorgu sayısını ölç'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Ölçülecek istek sayısı (varsayılan: 200)'
+        )
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            default=250,
+            help='p99 gecikme üst sınırı; aşılırsa komut hata ile biter (varsayılan: 250)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        if count < 1:
+            raise CommandError('--requests en az 1 olmalı')
+        if User.objects.filter(phone_e164=PHONE_NUMBER).exists():
+            raise CommandError(f'{PHONE_NUMBER} numaralı kullanıcı zaten var, önceki benchmark temizlenmemiş.')
+
+        # Sinyalsiz oluşturulur; barkod ataması ölçüme karışmasın
+        user = User.objects.bulk_create([
+            User(phone_number=PHONE_NUMBER, phone_e164=normalize_phone(PHONE_NUMBER), has_children=True, children_count=1)
+        ])[0]
+        if user.pk is None:
+            user = User.objects.get(phone_e164=PHONE_NUMBER)
+        Child.objects.create(user=user, grade='1_sinif')
+        factory = APIRequestFactory()
+        authorization = f'Bearer {RefreshToken.for_user(user).access_token}'
+        self.stdout.write(f'🏁 {count} açılış isteği')
+
+        try:
+            # İlk istek özeti ve aktif kampanya önbelleğini doldurur; ölçüme katılmaz
+            get_snapshot_cache().clear()
+            views.bootstrap(factory.get('/api/bootstrap/', HTTP_AUTHORIZATION=authorization))
+
+            latencies = []
+            with CaptureQueriesContext(connection) as context:
+                for _ in range(count):
+                    request = factory.get('/api/bootstrap/', HTTP_AUTHORIZATION=authorization)
+                    started = time.perf_counter()
+                    response = views.bootstrap(request)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f'Beklenmeyen yanıt: HTTP {response.status_code}')
+            queries = len(context.captured_queries) / count
+        finally:
+            User.objects.filter(phone_e164=PHONE_NUMBER).delete()
+            self.stdout.write('🧹 Benchmark kullanıcısı temizlendi')
+
+        latencies.sort()
+        p50 = latencies[max(0, round(len(latencies) * 0.50) - 1)]
+        p99 = latencies[max(0, round(len(latencies) * 0.99) - 1)]
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 AÇILIŞ (BOOTSTRAP) RAPORU')
+        self.stdout.write('='*50)
+        self.stdout.write(f'🔎 İstek başına sorgu: {queries:.1f}')
+        self.stdout.write(f'⏱️  Gecikme: p50 {p50:.1f} ms, p99 {p99:.1f} ms (sınır {options["budget_ms"]:.0f} ms)')
+        self.stdout.write('='*50)
+        if p99 > options['budget_ms']:
+            raise CommandError(f'p99 gecikme {p99:.1f} ms, sınır {options["budget_ms"]:.0f} ms')
+        self.stdout.write(self.style.SUCCESS('\n✨ Gecikme sınırın içinde!'))
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncRequestFactory
+from rest_framework.test import APIRequestFactory
+from users import async_views, views
+from users.hashing import get_hashing_pool
+from users.models import normalize_phone
+
+User = get_user_model()
+
+# Benchmark kullanıcıları bu önekle oluşturulur ve sonunda silinir
+PHONE_PREFIX = '+90597'
+PASSWORD = 'Benchmark.Sifre.2025'
+
+
+class Command(BaseCommand):
+    help = 'Sync ve async login görünümlerinin saniyedeki/çekirdek başına giriş sayısını karşılaştır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Her mod için giriş isteği sayısı (varsayılan: 200)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=32,
+            help='Aynı anda açık istek sayısı (varsayılan: 32)'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='Girişlerin dağıtılacağı kullanıcı sayısı (varsayılan: 50)'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=('sync', 'async', 'both'),
+            default='both',
+            help='Ölçülecek görünüm (varsayılan: both)'
+        )
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        concurrency = options['concurrency']
+        if count < 1 or concurrency < 1 or options['users'] < 1:
+            raise CommandError('--requests, --concurrency ve --users en az 1 olmalı')
+        if User.objects.filter(phone_number__startswith=PHONE_PREFIX).exists():
+            raise CommandError(f'{PHONE_PREFIX} önekli kullanıcılar zaten var, önceki benchmark temizlenmemiş.')
+
+        # Tek hash yeterli; her giriş yine tam PBKDF2 doğrulaması yapar
+        password_hash = make_password(PASSWORD)
+        User.objects.bulk_create([
+            User(phone_number=phone, phone_e164=normalize_phone(phone), password=password_hash)
+            for phone in (f'{PHONE_PREFIX}{i:07d}' for i in range(options['users']))
+        ])
+        phones = [f'{PHONE_PREFIX}{i % options["users"]:07d}' for i in range(count)]
+        cores = os.cpu_count() or 1
+        self.stdout.write(f'🏁 {count} giriş, {concurrency} eşzamanlı istek, {cores} çekirdek')
+
+        try:
+            if options['mode'] in ('sync', 'both'):
+                self._report('SYNC (DRF, istek iş parçacığında PBKDF2)', *self._run_sync(phones, concurrency), cores)
+            if options['mode'] in ('async', 'both'):
+                pool = get_hashing_pool()
+                self.stdout.write(f'🔥 Şifre havuzu ısıtılıyor ({pool.workers} süreç)...')
+                asyncio.run(self._warm_up(pool))
+                self._report(
+                    f'ASYNC (süreç havuzu, {pool.workers} süreç, en fazla {pool.max_pending} bekleyen)',
+                    *asyncio.run(self._run_async(phones, concurrency)),
+                    cores,
+                    self.rejected,
+                )
+        finally:
+            User.objects.filter(phone_number__startswith=PHONE_PREFIX).delete()
+            self.stdout.write('🧹 Benchmark kullanıcıları temizlendi')
+
+    def _run_sync(self, phones, concurrency):
+        factory = APIRequestFactory()
+
+        def login(phone):
+            try:
+                request = factory.post('/api/login/', {'phone_number': phone, 'password': PASSWORD}, format='json')
+                started = time.perf_counter()
+                response = views.login(request)
+                return response.status_code, (time.perf_counter() - started) * 1000
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(login, phones))
+        return results, time.perf_counter() - started
+
+    async def _warm_up(self, pool):
+        await asyncio.gather(*(pool.run(os.getpid) for _ in range(pool.workers)))
+
+    async def _run_async(self, phones, concurrency):
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(phone):
+            async with semaphore:
+                while True:
+                    request = factory.post(
+                        '/api/login/', {'phone_number': phone, 'password': PASSWORD}, content_type='application/json'
+                    )
+                    started = time.perf_counter()
+                    response = await async_views.login(request)
+                    if response.status_code != 503:
+                        return response.status_code, (time.perf_counter() - started) * 1000
+                    # Gerçek istemci Retry-After kadar bekler; burada kapasiteyi ölçmek için hemen yeniden dene
+                    self.rejected += 1
+                    await asyncio.sleep(0.1)
+
+        self.rejected = 0
+        started = time.perf_counter()
+        results = await asyncio.gather(*(login(phone) for phone in phones))
+        return results, time.perf_counter() - started
+
+    def _report(self, title, results, elapsed, cores, rejected=0):
+        statuses = Counter(status_code for status_code, _ in results)
+        latencies = sorted(latency for status_code, latency in results if status_code == 200)
+        succeeded = statuses.get(200, 0)
+        rate = succeeded / elapsed if elapsed else 0
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'📊 {title}')
+        self.stdout.write('='*50)
+        self.stdout.write(f'✅ Başarılı: {succeeded} / {len(results)}')
+        for status_code, total in sorted(statuses.items()):
+            if status_code != 200:
+                self.stdout.write(self.style.WARNING(f'⚠️  HTTP {status_code}: {total}'))
+        if rejected:
+            self.stdout.write(f'⏳ 503 ile reddedilip yeniden denenen: {rejected}')
+        self.stdout.write(f'⚡ Giriş/sn: {rate:.1f} (çekirdek başına {rate / cores:.1f})')
+        if latencies:
+            p50 = latencies[max(0, round(len(latencies) * 0.50) - 1)]
+            p99 = latencies[max(0, round(len(latencies) * 0.99) - 1)]
+            self.stdout.write(f'⏱️  Gecikme: p50 {p50:.1f} ms, p99 {p99:.1f} ms')
+        self.stdout.write(f'⏱️  Süre: {elapsed:.2f} sn')
+        self.stdout.write('='*50)
@@ -0,0 +1,126 @@
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from barcodes.models import CampaignBarcode, CampaignBarcodeStats, UserBarcode
+from jobs.models import Job
+from users.views import register
+
+User = get_user_model()
+
+# Benchmark kullanıcıları bu önekle oluşturulur ve sonunda silinir
+PHONE_PREFIX = '+90598'
+
+
+class Command(BaseCommand):
+    help = 'POST /api/register/ yolunun kayıt başına sorgu sayısını ve gecikmesini ölç'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--registrations',
+            type=int,
+            default=200,
+            help='Art arda yapılacak kayıt sayısı (varsayılan: 200)'
+        )
+        parser.add_argument(
+            '--children',
+            type=int,
+            default=2,
+            help='Kayıt başına gönderilecek çocuk sayısı (varsayılan: 2)'
+        )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Barkodu kuyruğa atmak yerine kayıt isteği içinde ata'
+        )
+        parser.add_argument(
+            '--show-queries',
+            action='store_true',
+            help='İlk kaydın SQL sorgularını yazdır'
+        )
+
+    def handle(self, *args, **options):
+        count = options['registrations']
+        if count < 1:
+            raise CommandError('--registrations en az 1 olmalı')
+        if User.objects.filter(phone_number__startswith=PHONE_PREFIX).exists():
+            raise CommandError(f'{PHONE_PREFIX} önekli kullanıcılar zaten var, önceki benchmark temizlenmemiş.')
+
+        is_async = getattr(settings, 'ASYNC_BARCODE_ASSIGNMENT', True) and not options['sync']
+        children = [{'grade': '1_sinif'} for _ in range(options['children'])]
+        factory = APIRequestFactory()
+        self.stdout.write(
+            f'🏁 {count} kayıt, {len(children)} çocuk, barkod ataması: {"kuyruk" if is_async else "istek içinde"}'
+        )
+
+        latencies = []
+        query_counts = []
+        failures = Counter()
+        try:
+            with override_settings(ASYNC_BARCODE_ASSIGNMENT=is_async):
+                for i in range(count):
+                    request = factory.post('/api/register/', {
+                        'phone_number': f'{PHONE_PREFIX}{i:07d}',
+                        'password': 'Benchmark.Sifre.2025',
+                        'password_confirm': 'Benchmark.Sifre.2025',
+                        'first_name': 'Benchmark',
+                        'last_name': 'Kullanıcı',
+                        'children': children,
+                    }, format='json')
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = register(request)
+                        latencies.append((time.perf_counter() - started) * 1000)
+                    query_counts.append(len(queries))
+                    if response.status_code != 201:
+                        failures[response.status_code] += 1
+                    if i == 0 and options['show_queries']:
+                        for query in queries.captured_queries:
+                            self.stdout.write(f'   {query["sql"][:200]}')
+
+            latencies.sort()
+            self.stdout.write('\n' + '='*50)
+            self.stdout.write('📊 KAYIT BENCHMARK RAPORU')
+            self.stdout.write('='*50)
+            self.stdout.write(f'✅ Başarılı: {count - sum(failures.values())} / {count}')
+            for status_code, failed in failures.items():
+                self.stdout.write(self.style.WARNING(f'❌ HTTP {status_code}: {failed}'))
+            self.stdout.write(
+                f'🗄️  Sorgu/kayıt: ort {statistics.mean(query_counts):.1f}, '
+                f'min {min(query_counts)}, maks {max(query_counts)}'
+            )
+            self.stdout.write(
+                f'⏱️  Gecikme: p50 {self._percentile(latencies, 50):.1f} ms, '
+                f'p95 {self._percentile(latencies, 95):.1f} ms, p99 {self._percentile(latencies, 99):.1f} ms'
+            )
+            self.stdout.write(f'⚡ Kayıt/sn: {count / (sum(latencies) / 1000):.1f}')
+            self.stdout.write('='*50)
+        finally:
+            self._cleanup()
+
+    @staticmethod
+    def _percentile(sorted_values, percent):
+        index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+        return sorted_values[index]
+
+    def _cleanup(self):
+        users = User.objects.filter(phone_number__startswith=PHONE_PREFIX)
+        user_ids = list(users.values_list('id', flat=True))
+        with transaction.atomic():
+            user_barcodes = UserBarcode.objects.filter(user_id__in=user_ids)
+            campaign_codes = set(user_barcodes.values_list('campaign_barcode__campaign_code', flat=True))
+            barcode_ids = list(user_barcodes.values_list('campaign_barcode_id', flat=True))
+            user_barcodes.delete()
+            CampaignBarcode.objects.filter(id__in=barcode_ids).update(is_assigned=False, updated_at=timezone.now())
+            Job.objects.filter(key__in=[str(user_id) for user_id in user_ids]).delete()
+            users.delete()
+            for campaign_code in campaign_codes:
+                CampaignBarcodeStats.rebuild(campaign_code)
+        self.stdout.write('🧹 Benchmark kullanıcıları ve atamaları temizlendi')
@@ -0,0 +1,217 @@
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from barcodes.models import Campaign, UserBarcode
+from users.models import Child, CustomUser, normalize_phone
+import csv
+import os
+import time
+
+# Tek tek yazdırılacak en fazla geçersiz satır; büyük dosyalarda çıktı boğulmasın
+MAX_REPORTED_INVALID = 20
+# children sütunundaki sınıflar bu karakterle ayrılır: "1_sinif;3_yas"
+GRADE_SEPARATOR = ';'
+NAME_MAX_LENGTH = CustomUser._meta.get_field('first_name').max_length
+PASSWORD_MAX_LENGTH = CustomUser._meta.get_field('password').max_length
+
+
+class Command(BaseCommand):
+    help = (
+        'Eski sadakat sisteminin üyelerini CSV\'den toplu içe aktar. Sütunlar: phone_number, '
+        'first_name, last_name, password_hash, children ("1_sinif;3_yas"). Hash\'i olmayan ya da '
+        'tanınmayan hesaplar kullanılamaz şifreyle açılır (şifre sıfırlaması gerekir). Barkodlar her '
+        'parçanın kullanıcılarına aynı transaction\'da atanır. Mevcut numaralar atlandığından yarıda '
+        'kalan içe aktarma aynı komutla sürdürülebilir.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='Kullanıcıların bulunduğu CSV dosyasının yolu (başlık satırı zorunlu)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Tek transaction içinde doğrulanıp eklenecek satır sayısı (varsayılan: 10000)'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='PostgreSQL\'de bulk_create yerine COPY ile yükle'
+        )
+        parser.add_argument(
+            '--skip-barcodes',
+            action='store_true',
+            help='Barkod atamasını yapma (kullanıcılar barkodlarını ilk istekte alır)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Sadece doğrula ve rapor et, veritabanına yazma'
+        )
+
+    def handle(self, *args, **options):
+        file_path = options['file']
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        self.use_copy = options['copy']
+
+        if not os.path.exists(file_path):
+            raise CommandError(f'Dosya bulunamadı: {file_path}')
+        if chunk_size < 1:
+            raise CommandError('--chunk-size en az 1 olmalı')
+        if self.use_copy and connection.vendor != 'postgresql':
+            raise CommandError('--copy yalnızca PostgreSQL ile kullanılabilir')
+
+        self.stdout.write(f'📁 Dosya okunuyor: {file_path}')
+        if dry_run:
+            self.stdout.write(self.style.WARNING('🔍 DRY RUN - veritabanına yazılmayacak'))
+
+        # Şifresi taşınamayan hesaplar için tek bir kullanılamaz değer yeterli
+        self.unusable_password = make_password(None)
+        self.grades = {grade for grade, _ in Child.GRADE_CHOICES}
+        self.assign_barcodes = not dry_run and not options['skip_barcodes']
+        if self.assign_barcodes and Campaign.get_active_campaign() is None:
+            self.stdout.write(self.style.WARNING('⚠️  Aktif kampanya yok; barkodlar ilk istekte atanacak'))
+            self.assign_barcodes = False
+        state = {
+            'line': 1, 'created': 0, 'children': 0, 'reset': 0, 'duplicate': 0, 'invalid': 0,
+            'assigned': 0, 'unassigned': 0,
+        }
+        seen = set()
+        started = time.monotonic()
+
+        try:
+            with open(file_path, newline='', encoding='utf-8-sig') as file:
+                reader = csv.DictReader(file)
+                if not reader.fieldnames or 'phone_number' not in reader.fieldnames:
+                    raise CommandError('CSV başlığında phone_number sütunu yok')
+                chunk = []
+                for record in reader:
+                    state['line'] = reader.line_num
+                    row = self._parse(record, state)
+                    if row is None:
+                        continue
+                    if row[0] in seen:
+                        state['duplicate'] += 1
+                        continue
+                    seen.add(row[0])
+                    chunk.append(row)
+
+                    if len(chunk) >= chunk_size:
+                        self._flush(chunk, state, dry_run)
+                        self._report_progress(state, started)
+                        chunk = []
+
+                if chunk:
+                    self._flush(chunk, state, dry_run)
+        except UnicodeDecodeError as e:
+            raise CommandError(f'Dosya UTF-8 değil (satır {state["line"] + 1}): {str(e)}')
+        except PermissionError:
+            raise CommandError(f'Dosya okuma izni yok: {file_path}')
+        except DatabaseError as e:
+            raise CommandError(
+                f'Satır {state["line"]} civarında veritabanı hatası: {str(e)} - '
+                f'komutu tekrar çalıştırarak kaldığı yerden devam edebilirsiniz'
+            )
+
+        elapsed = time.monotonic() - started
+        rate = state['created'] / elapsed if elapsed else 0
+
+        # Sonuçları göster
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write('📊 KULLANICI İÇE AKTARMA RAPORU')
+        self.stdout.write('='*50)
+        self.stdout.write(f'✅ {"Eklenecek" if dry_run else "Oluşturulan"} kullanıcı: {state["created"]}')
+        self.stdout.write(f'👶 {"Eklenecek" if dry_run else "Oluşturulan"} çocuk: {state["children"]}')
+        self.stdout.write(f'🔑 Şifre sıfırlaması gereken: {state["reset"]}')
+        self.stdout.write(f'⚠️  Zaten mevcut / tekrar eden: {state["duplicate"]}')
+        self.stdout.write(f'❌ Geçersiz satırlar: {state["invalid"]}')
+        if self.assign_barcodes:
+            self.stdout.write(f'🎫 Barkod atanan: {state["assigned"]}')
+            if state['unassigned']:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️  Müsait barkod kalmadığı için barkodsuz: {state["unassigned"]} (ilk istekte atanacak)'
+                ))
+        self.stdout.write(f'⏱️  Süre: {elapsed:.2f} sn ({rate:,.0f} kullanıcı/sn)')
+        self.stdout.write('='*50)
+
+        if state['created'] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f'🎉 {state["created"]} kullanıcı {"eklenebilir" if dry_run else "başarıyla içe aktarıldı"}!'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING('⚠️  Hiç yeni kullanıcı eklenmedi.'))
+
+        self.stdout.write('\n✨ İşlem tamamlandı!')
+
+    def _parse(self, record, state):
+        """CSV kaydını (phone_e164, first_name, last_name, password, grades) demetine çevir; geçersizse None"""
+        raw_phone = (record.get('phone_number') or '').strip()
+        phone_e164 = normalize_phone(raw_phone)
+        first_name = (record.get('first_name') or '').strip()
+        last_name = (record.get('last_name') or '').strip()
+        grades = [grade.strip() for grade in (record.get('children') or '').split(GRADE_SEPARATOR) if grade.strip()]
+
+        error = None
+        if phone_e164 is None:
+            error = f'Geçersiz telefon numarası "{raw_phone}"'
+        elif len(first_name) > NAME_MAX_LENGTH or len(last_name) > NAME_MAX_LENGTH:
+            error = f'Ad/soyad {NAME_MAX_LENGTH} karakterden uzun'
+        elif any(grade not in self.grades for grade in grades):
+            error = f'Geçersiz sınıf "{record.get("children")}"'
+        if error:
+            state['invalid'] += 1
+            if state['invalid'] <= MAX_REPORTED_INVALID:
+                self.stdout.write(self.style.WARNING(f'⚠️  Satır {state["line"]}: {error}'))
+            return None
+
+        password = (record.get('password_hash') or '').strip()
+        try:
+            # Boş, tanınmayan ya da sütuna sığmayan hash: hesap şifre sıfırlamasıyla açılır
+            identify_hasher(password)
+            if len(password) > PASSWORD_MAX_LENGTH:
+                raise ValueError
+        except ValueError:
+            password = None
+        return phone_e164, first_name, last_name, password, grades
+
+    def _flush(self, chunk, state, dry_run):
+        """Parçayı veritabanındaki numaralarla karşılaştır ve yenileri tek transaction'da ekle"""
+        existing = set(
+            CustomUser.objects.filter(phone_e164__in=[row[0] for row in chunk]).values_list('phone_e164', flat=True)
+        )
+        new_rows = [row for row in chunk if row[0] not in existing]
+        state['duplicate'] += len(chunk) - len(new_rows)
+        state['reset'] += sum(1 for row in new_rows if row[3] is None)
+        if dry_run:
+            state['created'] += len(new_rows)
+            state['children'] += sum(len(row[4]) for row in new_rows)
+            return
+
+        rows = [
+            (phone_e164, first_name, last_name, password or self.unusable_password, grades)
+            for phone_e164, first_name, last_name, password, grades in new_rows
+        ]
+        with transaction.atomic():
+            user_ids, children = CustomUser.import_rows(rows, use_copy=self.use_copy)
+            # Yalnızca bu parçada eklenenler; komut yarıda kalırsa barkodsuz içe aktarılmış kullanıcı kalmaz
+            if self.assign_barcodes and user_ids:
+                unassigned = UserBarcode.assign_barcodes_to_users(user_ids)
+                state['assigned'] += len(user_ids) - len(unassigned)
+                state['unassigned'] += len(unassigned)
+        # COPY yolunda bu arada kayıt olmuş numaralar atlanır
+        state['duplicate'] += len(rows) - len(user_ids)
+        state['created'] += len(user_ids)
+        state['children'] += children
+
+    def _report_progress(self, state, started):
+        elapsed = time.monotonic() - started
+        rate = state['line'] / elapsed if elapsed else 0
+        self.stdout.write(
+            f'📊 Satır {state["line"]}: {state["created"]} yeni, {state["duplicate"]} mevcut, '
+            f'{state["assigned"]} barkod ({rate:,.0f} satır/sn)'
+        )
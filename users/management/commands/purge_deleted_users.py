@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Silinmiş işaretli kullanıcıları (purge_users işi çalışmadıysa) partiler halinde toplu sil'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Tek transaction\'da silinecek kullanıcı sayısı (varsayılan: 500)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Silme, yalnızca bekleyen kullanıcı sayısını raporla'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size en az 1 olmalı')
+
+        pending = CustomUser.objects.filter(deleted_at__isnull=False)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'🔍 Kuru çalıştırma: {pending.count()} kullanıcı silinmeyi bekliyor.'))
+            return
+
+        total = 0
+        while True:
+            ids = list(pending.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += CustomUser.purge_deleted(ids)
+            self.stdout.write(f'🗑️  {total} kullanıcı silindi...')
+        if total:
+            self.stdout.write(self.style.SUCCESS(f'🎉 {total} kullanıcı silindi.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Silinmeyi bekleyen kullanıcı yok.'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = 'Süresi dolmuş geçersiz refresh token kayıtlarını gün gün toplu sil'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Silme, yalnızca silinecek günleri ve satır sayılarını raporla'
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            days = RevokedToken.expired_days()
+            if not days:
+                self.stdout.write(self.style.SUCCESS('✅ Süresi dolmuş kayıt yok.'))
+                return
+            for day, rows in days:
+                self.stdout.write(f'📅 {day}: {rows} kayıt')
+            total = sum(rows for _, rows in days)
+            self.stdout.write(self.style.WARNING(f'🔍 Kuru çalıştırma: {len(days)} gün, {total} kayıt silinmedi.'))
+            return
+
+        deleted = RevokedToken.purge_expired()
+        if not deleted:
+            self.stdout.write(self.style.SUCCESS('✅ Süresi dolmuş kayıt yok.'))
+            return
+        for day, rows in deleted.items():
+            self.stdout.write(f'🗑️  {day}: {rows} kayıt silindi')
+        self.stdout.write(self.style.SUCCESS(f'🎉 {len(deleted)} gün, {sum(deleted.values())} kayıt silindi.'))
@@ -0,0 +1,27 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_remove_child_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True, verbose_name='JTI')),
+                ('expires_at', models.DateTimeField(verbose_name='Son Geçerlilik')),
+                ('expires_on', models.DateField(db_index=True, verbose_name='Son Geçerlilik Günü')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Geçersiz Kılınma Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Geçersiz Token',
+                'verbose_name_plural': 'Geçersiz Tokenlar',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.1.8 on 2026-10-18 07:53
+
+import re
+
+from django.db import migrations, models, transaction
+
+CHUNK_SIZE = 10000
+
+# users.models.normalize_phone ile aynı kural; migration model koduna bağlı kalmasın diye kopyalandı
+_phone_separators = re.compile(r'[\s\-().]')
+_phone_national = re.compile(r'^(?:\+?90|0)?(5[0-9]{9})$')
+
+
+def normalize_phone(value):
+    if not value:
+        return None
+    match = _phone_national.match(_phone_separators.sub('', value))
+    return f'+90{match.group(1)}' if match else None
+
+
+def backfill_phone_e164(apps, schema_editor):
+    """phone_e164'ü id sırasıyla CHUNK_SIZE'lık transaction'larda doldur.
+
+    Aynı numaranın farklı yazımlarıyla açılmış hesaplarda numara en eski
+    hesaba yazılır, diğerleri boş kalır ve 0007'de kapatılır.
+    """
+    CustomUser = apps.get_model('users', 'CustomUser')
+    seen = set()
+    last_id = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(id__gt=last_id).order_by('id').only('id', 'phone_number')[:CHUNK_SIZE]
+        )
+        if not users:
+            break
+        last_id = users[-1].id
+        for user in users:
+            phone_e164 = normalize_phone(user.phone_number)
+            if phone_e164 in seen:
+                phone_e164 = None
+            elif phone_e164 is not None:
+                seen.add(phone_e164)
+            user.phone_e164 = phone_e164
+        with transaction.atomic():
+            CustomUser.objects.bulk_update(users, ['phone_e164'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    # Her parça kendi transaction'ında commit edilir; tablo tek uzun transaction'da kilitlenmez
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_customuser_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, verbose_name='Telefon (E.164)'),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customuser',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, unique=True, verbose_name='Telefon (E.164)'),
+        ),
+    ]
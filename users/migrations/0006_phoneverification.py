@@ -0,0 +1,30 @@
+# Generated by Django 4.1.8 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_customuser_phone_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhoneVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_e164', models.CharField(max_length=16, unique=True, verbose_name='Telefon (E.164)')),
+                ('code_hash', models.CharField(blank=True, default='', max_length=64, verbose_name='Kod Özeti')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Son Geçerlilik')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Hatalı Deneme')),
+                ('last_requested_at', models.DateTimeField(blank=True, null=True, verbose_name='Son Kod İsteği')),
+                ('window_started_at', models.DateTimeField(blank=True, null=True, verbose_name='Sınır Penceresi Başlangıcı')),
+                ('sends_in_window', models.PositiveSmallIntegerField(default=0, verbose_name='Penceredeki Gönderim')),
+            ],
+            options={
+                'verbose_name': 'Telefon Doğrulama',
+                'verbose_name_plural': 'Telefon Doğrulamaları',
+            },
+        ),
+    ]
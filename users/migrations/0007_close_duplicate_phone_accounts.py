@@ -0,0 +1,123 @@
+import re
+
+from django.db import migrations, models, transaction
+from django.utils import timezone
+
+CHUNK_SIZE = 10000
+# Raporda tek tek yazılacak en fazla hesap
+MAX_REPORTED = 50
+
+# users.models.normalize_phone ile aynı kural; migration model koduna bağlı kalmasın diye kopyalandı
+_phone_separators = re.compile(r'[\s\-().]')
+_phone_national = re.compile(r'^(?:\+?90|0)?(5[0-9]{9})$')
+
+
+def normalize_phone(value):
+    if not value:
+        return None
+    match = _phone_national.match(_phone_separators.sub('', value))
+    return f'+90{match.group(1)}' if match else None
+
+
+def close_duplicate_accounts(apps, schema_editor):
+    """0005'in boş bıraktığı mükerrer hesapları hesap silme isteği gibi kapat.
+
+    Aynı numaranın farklı yazımıyla açılmış yeni hesap giriş yapamaz ve her tam
+    save() phone_e164 benzersizlik kısıtına takılırdı. Numara kullanıcıya özgü
+    yer tutucuya taşınır, hesap pasifleşir ve barkodu kampanyanın politikasına
+    göre havuza döner ya da emekliye ayrılır. Kapatılan hesaplar raporlanır;
+    satırlar silinmez, gerekirse admin'den incelenir.
+    """
+    CustomUser = apps.get_model('users', 'CustomUser')
+    closed = []
+    last_id = 0
+    while True:
+        users = list(
+            CustomUser.objects.filter(id__gt=last_id, phone_e164__isnull=True)
+            .order_by('id').only('id', 'phone_number')[:CHUNK_SIZE]
+        )
+        if not users:
+            break
+        last_id = users[-1].id
+        # Geçerli numarası olup phone_e164'ü boş kalan hesap: numara daha eski bir hesaba yazılmış
+        candidates = {user.id: normalize_phone(user.phone_number) for user in users}
+        owned = set(CustomUser.objects.filter(
+            phone_e164__in={phone for phone in candidates.values() if phone}
+        ).values_list('phone_e164', flat=True))
+        duplicates = [user for user in users if candidates[user.id] in owned]
+        if duplicates:
+            closed += [(user.id, user.phone_number) for user in duplicates]
+            with transaction.atomic():
+                _close(apps, duplicates)
+
+    if closed:
+        print(f'\n  📵 Mükerrer numaralı {len(closed)} hesap kapatıldı (id: eski numara):')
+        for user_id, phone_number in closed[:MAX_REPORTED]:
+            print(f'     {user_id}: {phone_number}')
+        if len(closed) > MAX_REPORTED:
+            print(f'     ... ve {len(closed) - MAX_REPORTED} hesap daha')
+
+
+def _close(apps, users):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    UserBarcode = apps.get_model('barcodes', 'UserBarcode')
+    UserBarcodeHistory = apps.get_model('barcodes', 'UserBarcodeHistory')
+    CampaignBarcode = apps.get_model('barcodes', 'CampaignBarcode')
+    CampaignBarcodeStats = apps.get_model('barcodes', 'CampaignBarcodeStats')
+    now = timezone.now()
+    user_ids = [user.id for user in users]
+
+    for user in users:
+        # soft_delete ile aynı yer tutucu; doğrulayıcıya uymaz, benzersizlik korunur
+        user.phone_number = f'~{user.id}'
+        user.is_active = False
+    CustomUser.objects.bulk_update(users, ['phone_number', 'is_active'])
+
+    rows = list(UserBarcode.objects.filter(user_id__in=user_ids).values_list(
+        'id', 'user_id', 'campaign_barcode_id', 'assigned_at',
+        'campaign_barcode__barcode_code', 'campaign_barcode__campaign_code',
+        'campaign_barcode__is_active', 'campaign_barcode__campaign__released_barcode_policy',
+    ))
+    if not rows:
+        return
+    UserBarcodeHistory.objects.bulk_create([
+        UserBarcodeHistory(
+            user_id=user_id, campaign_barcode_id=barcode_id, barcode_code=code, campaign_code=campaign_code,
+            assigned_at=assigned_at, released_at=now, reason='account_deleted',
+        )
+        for _, user_id, barcode_id, assigned_at, code, campaign_code, _, _ in rows
+    ])
+    UserBarcode.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+    retire, reuse = [], []
+    deltas = {}
+    for _, _, barcode_id, _, _, campaign_code, is_active, policy in rows:
+        retired = policy == 'retire'
+        (retire if retired else reuse).append(barcode_id)
+        counters = deltas.setdefault(campaign_code, {'assigned': 0, 'available': 0, 'inactive': 0})
+        counters['assigned'] -= 1
+        if is_active:
+            counters['inactive' if retired else 'available'] += 1
+    released = {'is_assigned': False, 'lease_owner': '', 'leased_until': None, 'updated_at': now}
+    if reuse:
+        CampaignBarcode.objects.filter(id__in=reuse).update(**released)
+    if retire:
+        CampaignBarcode.objects.filter(id__in=retire).update(is_active=False, **released)
+    for campaign_code, counters in deltas.items():
+        CampaignBarcodeStats.objects.filter(campaign_code=campaign_code).update(
+            **{field: models.F(field) + delta for field, delta in counters.items()}, updated_at=now
+        )
+
+
+class Migration(migrations.Migration):
+    # Her parça kendi transaction'ında commit edilir
+    atomic = False
+
+    dependencies = [
+        ('users', '0006_phoneverification'),
+        ('barcodes', '0011_released_barcode_policy'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicate_accounts, migrations.RunPython.noop),
+    ]
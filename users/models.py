@@ -1,8 +1,23 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.core.exceptions import ValidationError
 from django.db import models
 import re
 
 class CustomUserManager(BaseUserManager):
+    def get_by_natural_key(self, phone_number):
+        """authenticate() numaranın her yazımını E.164 sütunundan tek indeksli sorguyla bulur"""
+        phone_e164 = normalize_phone(phone_number)
+        if phone_e164 is None:
+            raise self.model.DoesNotExist()
+        return self.get(phone_e164=phone_e164)
+
+    def by_phone(self, phone_number):
+        """Numaranın her yazımı için aynı kullanıcıyı veren sorgu; geçersiz numarada boş"""
+        phone_e164 = normalize_phone(phone_number)
+        if phone_e164 is None:
+            return self.none()
+        return self.filter(phone_e164=phone_e164)
+
     def create_user(self, phone_number, password=None, **extra_fields):
         if not phone_number:
             raise ValueError('Telefon numarası zorunludur.')
@@ -24,9 +39,13 @@ class CustomUserManager(BaseUserManager):
         
         return self._create_user(phone_number, password, **extra_fields)
     
-    def _create_user(self, phone_number, password, **extra_fields):
+    def _create_user(self, phone_number, password, password_hash=None, **extra_fields):
         user = self.model(phone_number=phone_number, **extra_fields)
-        user.set_password(password)
+        # Hash başka bir süreçte (users.hashing) hesaplandıysa tekrar hesaplanmaz
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 from django.core.validators import RegexValidator
@@ -34,6 +53,18 @@ phone_validator = RegexValidator(
     regex=r'^(\+90|0)?5[0-9]{9}$',
     message="Telefon numarası geçerli formatta olmalı. Örnek: 05551234567 ya da +905551234567"
 )
+_phone_separators = re.compile(r'[\s\-().]')
+_phone_national = re.compile(r'^(?:\+?90|0)?(5[0-9]{9})$')
+
+
+def normalize_phone(value):
+    """Türkiye cep numarasını E.164 biçimine çevir (05551234567 -> +905551234567); geçersizse None"""
+    if not value:
+        return None
+    match = _phone_national.match(_phone_separators.sub('', value))
+    return f'+90{match.group(1)}' if match else None
+
+
 class CustomUser(AbstractUser):
     # Telefon numarası regex'i (Türkiye)
     phone_regex = re.compile(r'^(\+90|0)?[5][0-9]{9}$')
@@ -45,11 +76,18 @@ class CustomUser(AbstractUser):
         validators=[phone_validator],
         verbose_name='Telefon Numarası'
     )
+    # Aynı numaranın farklı yazımları tek kullanıcıya çıkar; giriş ve arama bu indeksten yapılır.
+    # Geçerli bir numarası olmayan (silinmiş) hesaplarda boştur
+    phone_e164 = models.CharField(
+        max_length=16, unique=True, blank=True, null=True, editable=False, verbose_name='Telefon (E.164)'
+    )
     is_phone_verified = models.BooleanField(default=False, verbose_name='Telefon Doğrulandı')
     
     # Çocuk bilgileri
     has_children = models.BooleanField(default=False, verbose_name='Çocuğu Var mı?')
     children_count = models.PositiveIntegerField(default=0, verbose_name='Çocuk Sayısı')
+    # Hesap silme isteği: kullanıcı hemen pasifleşir, satırlar arka planda silinir (bkz. purge_deleted)
+    deleted_at = models.DateTimeField(blank=True, null=True, verbose_name='Silinme Tarihi')
     
     USERNAME_FIELD = 'phone_number'
     REQUIRED_FIELDS = []
@@ -63,6 +101,195 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.phone_number})"
 
+    def clean(self):
+        super().clean()
+        # phone_e164 formda olmadığından validate_unique aynı numaranın başka yazımını yakalamaz
+        phone_e164 = normalize_phone(self.phone_number)
+        if phone_e164 and type(self)._default_manager.filter(phone_e164=phone_e164).exclude(pk=self.pk).exists():
+            raise ValidationError({'phone_number': 'Bu telefon numarası ile kayıtlı bir kullanıcı zaten var.'})
+
+    def save(self, *args, **kwargs):
+        # E.164 sütunu her kayıtta telefon numarasından türetilir (bulk_create çağıranlar kendisi doldurur)
+        self.phone_e164 = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
+
+    def soft_delete(self):
+        """Hesabı hemen kullanılamaz yap ve silinmesini kuyruğa al; telefon numarası yeni kayıt için boşalır"""
+        from django.db import transaction
+        from django.utils import timezone
+        from jobs.models import Job
+        from .jobs import PURGE_USERS_JOB
+
+        with transaction.atomic():
+            self.is_active = False
+            self.deleted_at = timezone.now()
+            # Doğrulayıcıya uymayan, kullanıcıya özgü bir yer tutucu; benzersizlik korunur
+            self.phone_number = f'~{self.pk}'
+            self.save(update_fields=['is_active', 'deleted_at', 'phone_number'])
+            Job.enqueue(PURGE_USERS_JOB, {'user_id': self.pk}, key=str(self.pk))
+
+    @classmethod
+    def purge_deleted(cls, user_ids):
+        """Silinmiş işaretli kullanıcıları küme tabanlı sil; silinen kullanıcı sayısını döndür.
+
+        Barkodlar kampanyanın politikasına göre havuza döner ya da emekliye ayrılır
+        (UserBarcode.release_for_deleted_users); çocuklar ve kalan ilişkiler Django'nun
+        toplu silmesiyle parti başına birkaç ifadede gider.
+        """
+        from django.db import transaction
+        from barcodes.models import UserBarcode
+
+        with transaction.atomic():
+            ids = list(cls.objects.filter(id__in=user_ids, deleted_at__isnull=False).values_list('id', flat=True))
+            if not ids:
+                return 0
+            UserBarcode.release_for_deleted_users(ids)
+            cls.objects.filter(id__in=ids).delete()
+        return len(ids)
+
+    @classmethod
+    def import_rows(cls, rows, use_copy=False):
+        """Dışarıdan gelen kullanıcıları ve çocuklarını toplu ekle; (eklenen kullanıcı id'leri, çocuk sayısı) döndür.
+
+        transaction.atomic() bloğu içinde çağrılmalıdır. rows: (phone_e164, first_name,
+        last_name, password hash'i, [sınıflar]) demetleri; numaralar normalize edilmiş ve
+        veritabanında olmadığı kontrol edilmiş olmalıdır. use_copy ile PostgreSQL'de
+        kullanıcılar COPY ile geçici tabloya yüklenip tek INSERT ... SELECT ... RETURNING
+        ile aktarılır; bu arada kayıt olmuş numaralar atlanır. save() ve post_save (barkod
+        ataması) çalışmaz; barkodlar çağıran tarafından dönen id'lere toplu atanır.
+        """
+        import csv
+        from io import StringIO
+        from django.db import connection
+        from django.utils import timezone
+
+        if not rows:
+            return [], 0
+        now = timezone.now()
+        if use_copy:
+            table = connection.ops.quote_name(cls._meta.db_table)
+            buffer = StringIO()
+            writer = csv.writer(buffer)
+            for phone_e164, first_name, last_name, password, grades in rows:
+                writer.writerow([phone_e164, first_name, last_name, password, bool(grades), len(grades)])
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'CREATE TEMP TABLE IF NOT EXISTS user_import_stage '
+                    '(phone_e164 varchar(16), first_name varchar(150), last_name varchar(150), '
+                    'password varchar(128), has_children boolean, children_count integer) ON COMMIT DELETE ROWS'
+                )
+                cursor.copy_expert(
+                    'COPY user_import_stage (phone_e164, first_name, last_name, password, has_children, children_count) '
+                    'FROM STDIN WITH (FORMAT csv)',
+                    buffer,
+                )
+                cursor.execute(
+                    f'INSERT INTO {table} (password, is_superuser, first_name, last_name, email, is_staff, is_active, '
+                    'date_joined, phone_number, phone_e164, is_phone_verified, has_children, children_count) '
+                    "SELECT password, false, first_name, last_name, '', false, true, %s, phone_e164, phone_e164, "
+                    'false, has_children, children_count FROM user_import_stage '
+                    'ON CONFLICT DO NOTHING RETURNING phone_e164, id',
+                    [now],
+                )
+                user_ids = dict(cursor.fetchall())
+                cursor.execute('DELETE FROM user_import_stage')
+        else:
+            # Numaranın kanonik biçimi phone_number'a da yazılır (doğrulayıcıya uyar)
+            users = cls.objects.bulk_create([
+                cls(
+                    phone_number=phone_e164, phone_e164=phone_e164, first_name=first_name, last_name=last_name,
+                    password=password, has_children=bool(grades), children_count=len(grades), date_joined=now,
+                )
+                for phone_e164, first_name, last_name, password, grades in rows
+            ], batch_size=2000)
+            user_ids = {user.phone_e164: user.pk for user in users}
+
+        children = Child.objects.bulk_create([
+            Child(user_id=user_ids[phone_e164], grade=grade)
+            for phone_e164, _, _, _, grades in rows if phone_e164 in user_ids
+            for grade in grades
+        ], batch_size=2000)
+        return list(user_ids.values()), len(children)
+
+    def sync_children(self, items, update_fields=()):
+        """Çocuk listesini gönderilen listeye eşitle; yalnızca gereken INSERT/UPDATE/DELETE'ler yapılır.
+
+        items: [{'grade': ..., 'id': (isteğe bağlı)}] istenen tam liste. id'li öğe o satırı
+        günceller, id'siz öğe önce aynı sınıftaki, sonra kalan satırlarla eşleştirilir; eşleşmeyenler
+        eklenir, listede olmayan satırlar silinir. children_count/has_children ve update_fields
+        aynı UPDATE'te yazılır. (güncel çocuklar, {'created', 'updated', 'deleted'}) döndürür.
+        Başka kullanıcının/olmayan bir id'de Child.DoesNotExist fırlatır.
+        """
+        from collections import defaultdict
+        from django.db import transaction
+        from django.utils import timezone
+
+        existing = {child.id: child for child in self.children.order_by('created_at', 'id')}
+        kept, updates = [], []
+        free_grades = []
+        for item in items:
+            if item.get('id') is None:
+                free_grades.append(item['grade'])
+                continue
+            child = existing.pop(item['id'], None)
+            if child is None:
+                raise Child.DoesNotExist(f"Çocuk bulunamadı: {item['id']}")
+            if child.grade != item['grade']:
+                child.grade = item['grade']
+                updates.append(child)
+            kept.append(child)
+
+        # Aynı sınıftaki satır olduğu gibi kalır
+        by_grade = defaultdict(list)
+        for child in existing.values():
+            by_grade[child.grade].append(child)
+        unmatched_grades = []
+        for grade in free_grades:
+            if by_grade[grade]:
+                kept.append(by_grade[grade].pop(0))
+            else:
+                unmatched_grades.append(grade)
+        leftovers = sorted((child for rows in by_grade.values() for child in rows), key=lambda c: (c.created_at, c.id))
+
+        # Sınıfı değişen çocuk: silip eklemek yerine mevcut satır güncellenir
+        for child, grade in zip(leftovers, unmatched_grades):
+            child.grade = grade
+            updates.append(child)
+            kept.append(child)
+        deletes = [child.id for child in leftovers[len(unmatched_grades):]]
+        creates = [Child(user=self, grade=grade) for grade in unmatched_grades[len(leftovers):]]
+
+        count = len(kept) + len(creates)
+        update_fields = list(update_fields)
+        if self.children_count != count or self.has_children != (count > 0):
+            self.children_count = count
+            self.has_children = count > 0
+            update_fields += ['children_count', 'has_children']
+
+        if deletes or updates or creates or update_fields:
+            with transaction.atomic():
+                if deletes:
+                    Child.objects.filter(id__in=deletes).delete()
+                if updates:
+                    now = timezone.now()
+                    for child in updates:
+                        child.updated_at = now
+                    Child.objects.bulk_update(updates, ['grade', 'updated_at'])
+                if creates:
+                    Child.objects.bulk_create(creates)
+                if update_fields:
+                    self.save(update_fields=update_fields)
+
+        children = sorted(kept, key=lambda c: (c.created_at, c.id)) + creates
+        if not all(child.pk for child in children):
+            # bulk_create id döndürmeyen veritabanı: çağıran çocukları yeniden okur
+            children = None
+        return children, {'created': len(creates), 'updated': len(updates), 'deleted': len(deletes)}
+
 class Child(models.Model):
     GRADE_CHOICES = [
         ('3_yas', '3 Yaş'),
@@ -94,3 +321,167 @@ class Child(models.Model):
     
     def __str__(self):
         return f"Çocuk - {self.get_grade_display()}"
+
+
+class RevokedToken(models.Model):
+    """Geçersiz kılınan refresh token'lar; JTI ile aranır, son geçerlilik gününe göre toplu silinir"""
+    jti = models.CharField(max_length=255, unique=True, verbose_name='JTI')
+    expires_at = models.DateTimeField(verbose_name='Son Geçerlilik')
+    # Silme birimi: süresi dolan günün bütün satırları tek DELETE ile gider (bkz. purge_expired)
+    expires_on = models.DateField(db_index=True, verbose_name='Son Geçerlilik Günü')
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Geçersiz Kılınma Tarihi')
+
+    class Meta:
+        verbose_name = 'Geçersiz Token'
+        verbose_name_plural = 'Geçersiz Tokenlar'
+
+    def __str__(self):
+        return f"{self.jti} ({self.expires_on})"
+
+    @classmethod
+    def revoke(cls, jti, expires_at):
+        """Token'ı geçersiz kıl; zaten geçersizse False döndür (aynı token'la eşzamanlı iki rotasyon)"""
+        from django.db import IntegrityError, transaction
+        from django.utils import timezone
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    jti=jti, expires_at=expires_at, expires_on=timezone.localdate(expires_at),
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    @classmethod
+    def expired_days(cls, today=None):
+        """Tamamen süresi dolmuş günler ve satır sayıları: [(gün, sayı)]"""
+        from django.db.models import Count
+        from django.utils import timezone
+
+        today = today or timezone.localdate()
+        return list(
+            cls.objects.filter(expires_on__lt=today).order_by('expires_on')
+            .values('expires_on').annotate(rows=Count('id')).values_list('expires_on', 'rows')
+        )
+
+    @classmethod
+    def purge_expired(cls, today=None):
+        """Süresi dolan günleri gün gün sil; {gün: silinen satır} döndür"""
+        from django.utils import timezone
+
+        today = today or timezone.localdate()
+        deleted = {}
+        for day, _ in cls.expired_days(today):
+            # İlişkisi ve sinyali olmayan model: delete() satırları toplamadan tek DELETE atar
+            deleted[day] = cls.objects.filter(expires_on=day).delete()[0]
+        return deleted
+
+
+class PhoneVerification(models.Model):
+    """Numara başına tek satır: geçerli kodun özeti, deneme sayacı ve gönderim sınırı sayaçları"""
+    RESULT_VERIFIED = 'verified'
+    RESULT_INVALID = 'invalid'
+    RESULT_EXPIRED = 'expired'
+    RESULT_LOCKED = 'locked'
+
+    phone_e164 = models.CharField(max_length=16, unique=True, verbose_name='Telefon (E.164)')
+    # Kodun kendisi değil HMAC'i (bkz. users.verification.hash_code); kod henüz gönderilmediyse boş
+    code_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Kod Özeti')
+    expires_at = models.DateTimeField(blank=True, null=True, verbose_name='Son Geçerlilik')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Hatalı Deneme')
+    last_requested_at = models.DateTimeField(blank=True, null=True, verbose_name='Son Kod İsteği')
+    window_started_at = models.DateTimeField(blank=True, null=True, verbose_name='Sınır Penceresi Başlangıcı')
+    sends_in_window = models.PositiveSmallIntegerField(default=0, verbose_name='Penceredeki Gönderim')
+
+    class Meta:
+        verbose_name = 'Telefon Doğrulama'
+        verbose_name_plural = 'Telefon Doğrulamaları'
+
+    def __str__(self):
+        return self.phone_e164
+
+    def retry_after(self, now):
+        """Yeni kod istenebilmesi için beklenecek saniye; 0 ise istenebilir"""
+        from datetime import timedelta
+        from .verification import verification_setting
+
+        waits = [0]
+        if self.last_requested_at:
+            resend_at = self.last_requested_at + timedelta(seconds=verification_setting('RESEND_SECONDS'))
+            waits.append((resend_at - now).total_seconds())
+        if self.window_started_at and self.sends_in_window >= verification_setting('MAX_SENDS_PER_WINDOW'):
+            window_ends = self.window_started_at + timedelta(seconds=verification_setting('WINDOW_SECONDS'))
+            waits.append((window_ends - now).total_seconds())
+        return max(0, int(max(waits) + 0.999))
+
+    @classmethod
+    def request_code(cls, phone_e164):
+        """Numara için kod gönderimini kuyruğa al; sınır aşıldıysa beklenecek saniyeyi döndür.
+
+        Kod burada üretilmez; SEND_VERIFICATION_SMS_JOB işleyicisi numaraları partiler halinde
+        issue_codes ile kodlayıp SMS ağ geçidine verir. İş numara anahtarıyla kuyruğa
+        alındığından bir numara için kuyrukta en fazla bir gönderim bekler.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from django.utils import timezone
+        from jobs.models import Job
+        from .jobs import SEND_VERIFICATION_SMS_JOB
+        from .verification import verification_setting
+
+        now = timezone.now()
+        with transaction.atomic():
+            row, _ = cls.objects.select_for_update().get_or_create(phone_e164=phone_e164)
+            wait = row.retry_after(now)
+            if wait:
+                return wait
+            window = timedelta(seconds=verification_setting('WINDOW_SECONDS'))
+            if row.window_started_at is None or now - row.window_started_at >= window:
+                row.window_started_at = now
+                row.sends_in_window = 0
+            row.sends_in_window += 1
+            row.last_requested_at = now
+            row.save(update_fields=['window_started_at', 'sends_in_window', 'last_requested_at'])
+            Job.enqueue(SEND_VERIFICATION_SMS_JOB, {'phone_e164': phone_e164}, key=phone_e164)
+        return 0
+
+    @classmethod
+    def issue_codes(cls, phones):
+        """Numaralara yeni kod üret, özetlerini tek UPDATE partisinde yaz; {telefon: kod} döndür"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .verification import generate_code, hash_code, verification_setting
+
+        expires_at = timezone.now() + timedelta(seconds=verification_setting('TTL_SECONDS'))
+        rows = list(cls.objects.filter(phone_e164__in=phones))
+        codes = {}
+        for row in rows:
+            codes[row.phone_e164] = generate_code()
+            row.code_hash = hash_code(row.phone_e164, codes[row.phone_e164])
+            row.expires_at = expires_at
+            row.attempts = 0
+        cls.objects.bulk_update(rows, ['code_hash', 'expires_at', 'attempts'])
+        return codes
+
+    @classmethod
+    def check_code(cls, phone_e164, code):
+        """Kodu kontrol et; RESULT_* döndür. Doğru kod tek kullanımlıktır, hatalılar sayılır"""
+        from django.db import transaction
+        from django.utils import timezone
+        from .verification import code_matches, verification_setting
+
+        with transaction.atomic():
+            row = cls.objects.select_for_update().filter(phone_e164=phone_e164).first()
+            if row is None or not row.code_hash or row.expires_at <= timezone.now():
+                return cls.RESULT_EXPIRED
+            if row.attempts >= verification_setting('MAX_ATTEMPTS'):
+                return cls.RESULT_LOCKED
+            if code_matches(row.code_hash, phone_e164, code):
+                row.code_hash = ''
+                row.expires_at = None
+                row.save(update_fields=['code_hash', 'expires_at'])
+                return cls.RESULT_VERIFIED
+            row.attempts += 1
+            row.save(update_fields=['attempts'])
+        return cls.RESULT_INVALID
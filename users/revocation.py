@@ -0,0 +1,159 @@
+"""Refresh token kara listesi (RevokedToken) ve önündeki süreç içi Bloom filtresi.
+
+simplejwt'nin token_blacklist uygulaması her token'ı OutstandingToken'a
+yazar ve tabloları hiç küçültmez. Burada yalnızca geçersiz kılınan JTI'lar
+saklanır; satırlar son geçerlilik gününe göre gruplanır ve
+purge_revoked_tokens komutuyla gün gün toplu silinir.
+
+Kontrol önce Bloom filtresine bakar: filtrede olmayan JTI kesinlikle geçersiz
+kılınmamıştır ve veritabanına gidilmez. Başka bir süreçteki geçersiz kılma
+paylaşılan önbellekteki nesil anahtarını değiştirir; anahtar değiştiyse
+filtre kontrol öncesinde revoked_at üzerinden yalnızca yeni satırlarla
+güncellenir (OVERLAP_SECONDS, geç commit edilen satırlar için geriye dönük
+pay). Süresi dolan JTI'lar filtreden silinemediğinden filtre
+FULL_REBUILD_SECONDS'ta bir baştan kurulur.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .bloom import BloomFilter
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BLOOM_CAPACITY': 1000000,
+    'BLOOM_ERROR_RATE': 0.001,
+    'OVERLAP_SECONDS': 60,
+    'FULL_REBUILD_SECONDS': 3600,
+}
+
+
+def revocation_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_REVOCATION', {})}[name]
+
+
+class RevocationFilter:
+    """Geçersiz JTI'ların süreç içi Bloom filtresi"""
+    GENERATION_KEY = 'users:revoked_tokens:generation'
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.bloom = None
+        self.watermark = None
+        self.generation = None
+        self.rebuilt_at = 0.0
+        self.checks = 0
+        self.db_lookups = 0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        from .models import RevokedToken
+
+        self.checks += 1
+        self._maybe_refresh()
+        if jti not in self.bloom:
+            return False
+        # Filtrede var: gerçekten geçersiz mi, yanlış pozitif mi?
+        self.db_lookups += 1
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """Token'ı geçersiz kıl; zaten geçersizse False döndür"""
+        from .models import RevokedToken
+
+        revoked = RevokedToken.revoke(jti, expires_at)
+        if revoked:
+            self._maybe_refresh()
+            self.bloom.add(jti)
+            cache.set(self.GENERATION_KEY, uuid.uuid4().hex, None)
+        return revoked
+
+    def _needs_rebuild(self):
+        return (
+            self.bloom is None
+            or self.bloom.saturated
+            or time.monotonic() - self.rebuilt_at >= revocation_setting('FULL_REBUILD_SECONDS')
+        )
+
+    def _maybe_refresh(self):
+        generation = cache.get(self.GENERATION_KEY)
+        if generation == self.generation and not self._needs_rebuild():
+            return
+        with self._lock:
+            if self._needs_rebuild():
+                self._rebuild()
+            elif generation != self.generation:
+                self._apply_changes()
+            self.generation = generation
+
+    def _rows(self, since=None):
+        from .models import RevokedToken
+
+        queryset = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        if since is not None:
+            queryset = queryset.filter(revoked_at__gte=since)
+        return queryset.order_by().values_list('jti', flat=True)
+
+    def _rebuild(self):
+        started = time.perf_counter()
+        watermark = timezone.now()
+        count = self._rows().count()
+        # Kapasite hiçbir zaman mevcut satır sayısının iki katından az olmasın
+        bloom = BloomFilter(max(revocation_setting('BLOOM_CAPACITY'), count * 2), revocation_setting('BLOOM_ERROR_RATE'))
+        for jti in self._rows().iterator(chunk_size=20000):
+            bloom.add(jti)
+        self.bloom = bloom
+        self.watermark = watermark
+        self.rebuilt_at = time.monotonic()
+        logger.info(f"TOKEN REVOCATION: Bloom filtresi {bloom.count} JTI ile kuruldu ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    def _apply_changes(self):
+        watermark = timezone.now()
+        since = self.watermark - timedelta(seconds=revocation_setting('OVERLAP_SECONDS'))
+        for jti in self._rows(since):
+            self.bloom.add(jti)
+        self.watermark = watermark
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_revocation_filter():
+    """Süreç düzeyindeki filtreyi döndür; fork sonrası yeniden kurulur"""
+    global _filter
+    with _filter_lock:
+        if _filter is None or _filter.pid != os.getpid():
+            _filter = RevocationFilter()
+        return _filter
+
+
+class RevocableRefreshToken(RefreshToken):
+    """Kara listeyi RevokedToken + Bloom filtresi üzerinden kontrol eden refresh token"""
+
+    def verify(self):
+        super().verify()
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if get_revocation_filter().is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not get_revocation_filter().revoke(jti, datetime_from_epoch(self.payload['exp'])):
+            # Aynı token'la eşzamanlı ikinci rotasyon: yalnızca biri yeni token alır
+            raise TokenError(_("Token is blacklisted"))
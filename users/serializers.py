@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from .models import CustomUser, Child
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .last_login import get_last_login_buffer
+from .revocation import RevocableRefreshToken
+from .models import CustomUser, Child, normalize_phone, phone_validator
 
 class SimpleChildInputSerializer(serializers.Serializer):
     grade = serializers.ChoiceField(choices=Child.GRADE_CHOICES)
@@ -10,6 +14,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, validators=[validate_password])
     password_confirm = serializers.CharField(write_only=True)
     children = SimpleChildInputSerializer(many=True, required=False, write_only=True)
+    # save() sonrası yazılan çocuklar; yanıttaki UserProfileSerializer'a context ile verilir
+    saved_children = None
     
     class Meta:
         model = CustomUser
@@ -17,6 +23,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             'phone_number', 'password', 'password_confirm', 'first_name', 'last_name',
             'has_children', 'children_count', 'children',
         )
+        # Benzersizlik ayrı bir SELECT ile değil, INSERT'teki kısıtla kontrol edilir (bkz. create)
+        extra_kwargs = {'phone_number': {'validators': [phone_validator]}}
     
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
@@ -24,6 +32,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
+        """Kullanıcı, çocuklar ve barkod ataması (post_save sinyali) tek transaction'da yazılır.
+
+        save(password_hash=...) ile önceden hesaplanmış hash verilebilir.
+        """
         validated_data.pop('password_confirm', None)
         children_data = validated_data.pop('children', None)
 
@@ -32,20 +44,72 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             validated_data['has_children'] = True
             validated_data['children_count'] = len(children_data)
 
-        user = CustomUser.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                user = CustomUser.objects.create_user(**validated_data)
+                children = []
+                if children_data:
+                    children = Child.objects.bulk_create([
+                        Child(user=user, grade=child['grade']) for child in children_data
+                    ])
+        except IntegrityError:
+            # Aynı numaranın başka bir yazımı da phone_e164 kısıtına takılır
+            if CustomUser.objects.by_phone(validated_data['phone_number']).exists():
+                raise serializers.ValidationError(
+                    {'phone_number': ['Bu telefon numarası ile kayıtlı bir kullanıcı zaten var.']}
+                )
+            raise
+
+        # Yanıttaki UserProfileSerializer çocukları yeniden okumasın
+        if all(child.pk for child in children):
+            self.saved_children = children
+        return user
 
-        if children_data:
-            Child.objects.bulk_create([
-                Child(user=user, grade=child['grade']) for child in children_data
-            ])
+class AsyncUserRegistrationSerializer(UserRegistrationSerializer):
+    """Şifre kuralları ve hash users.hashing havuzunda çalışır; burada yalnızca alan doğrulaması"""
+    password = serializers.CharField(write_only=True)
 
-        return user
+    def user_fields(self):
+        """UserAttributeSimilarityValidator'ın karşılaştıracağı alanlar"""
+        return {
+            name: self.validated_data[name]
+            for name in ('phone_number', 'first_name', 'last_name')
+            if name in self.validated_data
+        }
+
+
+class PhoneLookupMixin:
+    """phone_number girdisi istekte bir kez E.164'e çevrilir; view'lar phone_e164 ile sorgular"""
 
-class UserLoginSerializer(serializers.Serializer):
+    def validate_phone_number(self, value):
+        phone_e164 = normalize_phone(value)
+        if phone_e164 is None:
+            raise serializers.ValidationError(phone_validator.message)
+        return phone_e164
+
+
+class UserLoginSerializer(PhoneLookupMixin, serializers.Serializer):
     phone_number = serializers.CharField()
     password = serializers.CharField()
 
-class PhoneVerificationSerializer(serializers.Serializer):
+
+class BufferedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """/api/token/: last_login satıra hemen değil, users.last_login tamponu üzerinden yazılır"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        get_last_login_buffer().record(self.user.pk)
+        return data
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """/api/token/refresh/: rotasyonda eski refresh token RevokedToken'a yazılır (bkz. users.revocation)"""
+    token_class = RevocableRefreshToken
+
+class PhoneCodeRequestSerializer(PhoneLookupMixin, serializers.Serializer):
+    phone_number = serializers.CharField()
+
+class PhoneVerificationSerializer(PhoneLookupMixin, serializers.Serializer):
     phone_number = serializers.CharField()
     verification_code = serializers.CharField(max_length=6)
 
@@ -64,7 +128,7 @@ class ChildUpdateSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 class UserProfileSerializer(serializers.ModelSerializer):
-    children = ChildSerializer(many=True, read_only=True)
+    children = serializers.SerializerMethodField()
     
     class Meta:
         model = CustomUser
@@ -72,8 +136,17 @@ class UserProfileSerializer(serializers.ModelSerializer):
                  'is_phone_verified', 'has_children', 'children_count', 'children')
         read_only_fields = ('id', 'phone_number', 'is_phone_verified')
 
+    def get_children(self, user):
+        # Çocukları zaten elinde olan çağıran context['children'] ile verir; yeniden sorgulanmaz
+        children = self.context.get('children')
+        if children is None:
+            children = user.children.all()
+        return ChildSerializer(children, many=True).data
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     children = SimpleChildInputSerializer(many=True, required=False, write_only=True)
+    # Çocuk listesi eşitlendiyse güncel çocuklar; yanıttaki UserProfileSerializer'a context ile verilir
+    saved_children = None
 
     class Meta:
         model = CustomUser
@@ -82,20 +155,30 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance: CustomUser, validated_data):
         children_data = validated_data.pop('children', None)
 
-        # Kullanıcı temel alanlarını güncelle
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        # Yalnızca değişen alanlar yazılır; çocuk sayaçlarıyla birlikte tek UPDATE
+        changed = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
 
-        # Çocuklar gönderildiyse mevcutları değiştir
         if children_data is not None:
-            # Tamamen yenileme stratejisi
-            instance.children.all().delete()
-            Child.objects.bulk_create([
-                Child(user=instance, grade=child['grade']) for child in children_data
-            ])
-            instance.children_count = len(children_data)
-            instance.has_children = len(children_data) > 0
-            instance.save(update_fields=['children_count', 'has_children'])
-
-        return instance
\ No newline at end of file
+            self.saved_children, _ = instance.sync_children(children_data, update_fields=changed)
+        elif changed:
+            instance.save(update_fields=changed)
+
+        return instance
+
+
+class ChildSyncItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    grade = serializers.ChoiceField(choices=Child.GRADE_CHOICES)
+
+
+class ChildrenSyncSerializer(serializers.Serializer):
+    """Toplu çocuk güncellemesi: istenen tam liste (id'li öğeler o satırı günceller)"""
+    children = ChildSyncItemSerializer(many=True)
+
+    def validate_children(self, value):
+        ids = [item['id'] for item in value if item.get('id') is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Aynı çocuk birden fazla kez gönderildi.')
+        return value
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from barcodes.models import UserBarcode
+from .authentication import get_snapshot_cache
 import logging
 
 User = get_user_model()
@@ -12,22 +15,17 @@ def assign_barcode_to_new_user(sender, instance, created, **kwargs):
     """Yeni kullanıcı oluşturulduğunda barkod ata"""
     if created:
         logger.info(f"SIGNAL: Yeni kullanıcı oluşturuldu: {instance.phone_number}")
+        if getattr(settings, 'ASYNC_BARCODE_ASSIGNMENT', True):
+            # Atamayı run_worker yapar; kayıt isteği barkodu beklemez
+            from jobs.models import Job
+            from barcodes.jobs import ASSIGN_BARCODE_JOB
+            Job.enqueue(ASSIGN_BARCODE_JOB, {'user_id': instance.pk}, key=str(instance.pk))
+            logger.info(f"SIGNAL: Barkod atama kuyruğa alındı: {instance.phone_number}")
+            return
         try:
-            from barcodes.models import Campaign, CampaignBarcode
-            
-            # Debug bilgileri
-            active_campaign = Campaign.get_active_campaign()
-            logger.info(f"SIGNAL: Aktif kampanya: {active_campaign.campaign_code if active_campaign else 'YOK'}")
-            
-            if active_campaign:
-                available_count = CampaignBarcode.objects.filter(
-                    campaign_code=active_campaign.campaign_code,
-                    is_assigned=False,
-                    is_active=True
-                ).count()
-                logger.info(f"SIGNAL: Müsait barkod sayısı: {available_count}")
-            
-            user_barcode = UserBarcode.assign_barcode_to_user(instance)
+            # Barkod, sürecin kiraladığı bloktan (barcodes.pool) bellekten karşılanır;
+            # kullanıcı yeni olduğundan mevcut barkod kontrolü ve savepoint gerekmez
+            user_barcode = UserBarcode.assign_barcode_to_user(instance, is_new=True)
             if user_barcode:
                 logger.info(f"SIGNAL: Kullanıcıya barkod atandı: {instance.phone_number} -> {user_barcode.campaign_barcode.barcode_code}")
             else:
@@ -35,4 +33,24 @@ def assign_barcode_to_new_user(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"SIGNAL: Barkod atama hatası: {instance.phone_number} - {str(e)}")
             import traceback
-            logger.error(f"SIGNAL: Traceback: {traceback.format_exc()}")
\ No newline at end of file
+            logger.error(f"SIGNAL: Traceback: {traceback.format_exc()}")
+            if transaction.get_connection().needs_rollback:
+                # Kayıt transaction'ı kullanılamaz halde; sessizce geri alınmasın, hata yukarı çıksın
+                raise
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, created=False, **kwargs):
+    """Kimlik doğrulamadaki kullanıcı özetini düşür (yeni kullanıcının özeti henüz yoktur)"""
+    if created:
+        return
+    if kwargs['signal'] is post_delete and instance.deleted_at:
+        # Hesap silme isteğinde (soft_delete) özet zaten düştü; toplu silmede kullanıcı başına yazma olmasın
+        return
+    snapshots = get_snapshot_cache()
+    user_id = instance.pk
+    snapshots.invalidate(user_id)
+    if transaction.get_connection().in_atomic_block:
+        # Commit'ten önce başka bir istek eski satırı okuyup özete koymuş olabilir
+        transaction.on_commit(lambda: snapshots.invalidate(user_id))
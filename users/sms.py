@@ -0,0 +1,84 @@
+"""Değiştirilebilir SMS ağ geçidi.
+
+Kullanılacak sınıf SMS_GATEWAY['BACKEND'] ile seçilir. Backend'ler
+send_messages([(telefon, metin), ...]) ile toplu çağrılır ve gönderilemeyen
+numaralar için {telefon: hata} döndürür. Sağlayıcı entegrasyonu
+BaseSMSBackend'den türetilerek eklenir. Yerelde ConsoleBackend (stdout) ve
+FileBackend (satır satır dosya), testlerde LocMemBackend (sms.outbox)
+kullanılır. Kodları düz metin olarak loga ya da diske yazan backend'ler
+DEBUG kapalıyken reddedilir; canlıda sağlayıcı backend'i açıkça seçilmelidir.
+"""
+import sys
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    'BACKEND': 'users.sms.ConsoleBackend',
+    'FILE_PATH': 'sms.log',
+}
+
+# LocMemBackend'in gönderdiği (telefon, metin) çiftleri
+outbox = []
+
+
+def sms_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'SMS_GATEWAY', {})}[name]
+
+
+class BaseSMSBackend:
+    # Mesajları (doğrulama kodlarıyla) düz metin olarak loga/diske yazar; yalnızca DEBUG'da kullanılır
+    debug_only = False
+
+    def send_messages(self, messages):
+        """(telefon, metin) çiftlerini gönder; gönderilemeyenler için {telefon: hata} döndür"""
+        raise NotImplementedError
+
+
+class ConsoleBackend(BaseSMSBackend):
+    debug_only = True
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send_messages(self, messages):
+        with self._lock:
+            for phone, text in messages:
+                self.stream.write(f'📱 SMS -> {phone}: {text}\n')
+            self.stream.flush()
+        return {}
+
+
+class FileBackend(BaseSMSBackend):
+    debug_only = True
+
+    def __init__(self, path=None):
+        self.path = path or sms_setting('FILE_PATH')
+        self._lock = threading.Lock()
+
+    def send_messages(self, messages):
+        sent_at = timezone.now().isoformat()
+        with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+            for phone, text in messages:
+                file.write(f'{sent_at}\t{phone}\t{text}\n')
+        return {}
+
+
+class LocMemBackend(BaseSMSBackend):
+    def send_messages(self, messages):
+        outbox.extend(messages)
+        return {}
+
+
+def get_sms_backend():
+    backend_class = import_string(sms_setting('BACKEND'))
+    if backend_class.debug_only and not settings.DEBUG:
+        raise ImproperlyConfigured(
+            f"{sms_setting('BACKEND')} doğrulama kodlarını düz metin yazar ve DEBUG kapalıyken kullanılamaz; "
+            f"SMS_GATEWAY['BACKEND'] ile bir sağlayıcı backend'i seçin"
+        )
+    return backend_class()
@@ -1,3 +1,582 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import tempfile
+from datetime import timedelta
+from contextlib import redirect_stdout
+from io import StringIO
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from barcodes.models import Campaign, CampaignBarcode, CampaignBarcodeStats, UserBarcode, UserBarcodeHistory
+from jobs.models import Job
+from opportunities.models import OpportunityProduct
+from . import async_views
+from .authentication import CachedJWTAuthentication, UserSnapshotCache, get_snapshot_cache
+from .hashing import get_hashing_pool
+from . import sms
+from .jobs import PURGE_USERS_JOB, SEND_VERIFICATION_SMS_JOB, send_verification_sms
+from .last_login import get_last_login_buffer
+from .models import Child, CustomUser, PhoneVerification, RevokedToken
+from .revocation import get_revocation_filter
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class RegistrationTests(TestCase):
+    def setUp(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(
+                barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+            )
+            for i in range(3)
+        ])
+        CampaignBarcodeStats.rebuild('TEST2025')
+        Campaign.get_active_campaign()
+        self.client = APIClient()
+        self.data = {
+            'phone_number': '05551234567',
+            'password': 'Gizli.Sifre123',
+            'password_confirm': 'Gizli.Sifre123',
+            'first_name': 'Ayşe',
+            'children': [{'grade': '1_sinif'}, {'grade': '3_yas'}],
+        }
+
+    def test_register_in_minimal_queries(self):
+        # Kullanıcı, barkod claim, UserBarcode, sayaç, çocuklar + test transaction'ı içindeki savepoint çifti
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('users:register'), self.data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([child['grade'] for child in response.data['user']['children']], ['1_sinif', '3_yas'])
+        self.assertEqual(response.data['user']['children_count'], 2)
+        user = CustomUser.objects.get(phone_number='05551234567')
+        self.assertEqual(user.children.count(), 2)
+        self.assertEqual(user.user_barcode.campaign_barcode.campaign_code, 'TEST2025')
+
+    def test_duplicate_phone_is_reported_from_constraint(self):
+        self.client.post(reverse('users:register'), self.data, format='json')
+        response = self.client.post(reverse('users:register'), self.data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone_number', response.data['errors'])
+        self.assertEqual(CustomUser.objects.count(), 1)
+
+
+@override_settings(PASSWORD_HASHING={'WORKERS': 1, 'MAX_PENDING': 1, 'RETRY_AFTER_SECONDS': 3})
+class AsyncLoginTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create(phone_number='05551234567', password=make_password('Gizli.Sifre123'))
+        self.factory = AsyncRequestFactory()
+
+    def login(self, password):
+        request = self.factory.post(
+            '/api/login/', {'phone_number': '05551234567', 'password': password}, content_type='application/json'
+        )
+        return async_views.login(request)
+
+    async def test_login_verifies_in_pool(self):
+        response = await self.login('Gizli.Sifre123')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', json.loads(response.content)['tokens'])
+
+        response = await self.login('Yanlis.Sifre')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_saturated_pool_returns_503(self):
+        pool = get_hashing_pool()
+        pool.pending = pool.max_pending
+        try:
+            response = await self.login('Gizli.Sifre123')
+        finally:
+            pool.pending = 0
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        get_snapshot_cache().clear()
+        self.user = CustomUser.objects.create(phone_number='05551234567', password=make_password('Gizli.Sifre123'))
+        Child.objects.create(user=self.user, grade='1_sinif')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('users:get_children'))
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in context.captured_queries if CustomUser._meta.db_table in q['sql'].split('WHERE')[0]]
+
+    def test_snapshot_hit_skips_user_query(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_save_and_delete_invalidate_snapshot(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('users:get_children'))
+        self.assertEqual(response.status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.user_queries()
+        self.user.delete()
+        response = self.client.get(reverse('users:get_children'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_lazy_user_loads_only_for_model_fields(self):
+        self.user_queries()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        user, _ = CachedJWTAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            self.assertTrue(user and user.is_authenticated)
+            self.assertEqual(user.phone_number, '05551234567')
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(user.date_joined)
+        self.assertTrue(user.is_loaded)
+
+    @override_settings(USER_SNAPSHOT_CACHE={'CHANGE_CHECK_SECONDS': 0})
+    def test_other_processes_drop_only_changed_users(self):
+        # Başka bir sürecin LRU'su: günlüğün mevcut ucundan başlar
+        other = UserSnapshotCache()
+        other.get(0)
+        other.put(self.user.pk, {'is_active': True})
+        other.put(-1, {'is_active': True})
+
+        self.user.first_name = 'Ayşe'
+        self.user.save()
+        self.assertIsNone(other.get(self.user.pk))
+        self.assertIsNotNone(other.get(-1))
+
+
+@override_settings(LAST_LOGIN_BUFFER={'FLUSH_SECONDS': 3600, 'MAX_PENDING': 5000})
+class LastLoginBufferTests(TestCase):
+    def test_token_obtain_defers_last_login(self):
+        user = CustomUser.objects.create(phone_number='05551234567', password=make_password('Gizli.Sifre123'))
+        client = APIClient()
+        for _ in range(3):
+            response = client.post(
+                reverse('token_obtain_pair'), {'phone_number': '05551234567', 'password': 'Gizli.Sifre123'}, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertIsNone(user.last_login)
+
+        buffer = get_last_login_buffer()
+        pending = buffer.pending(user.pk)
+        # Üç giriş tek satır güncellemesine iner
+        self.assertEqual(buffer.flush(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.last_login, pending)
+
+
+class RevokedTokenTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(phone_number='05551234567', password=make_password('Gizli.Sifre123'))
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+    def test_rotated_refresh_token_is_rejected(self):
+        old = RefreshToken.for_user(self.user)
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=old['jti']).exists())
+
+        self.assertEqual(self.refresh(old).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_unrevoked_token_skips_database(self):
+        revocation = get_revocation_filter()
+        revocation.revoke('iptal-edilen', timezone.now() + timedelta(days=1))
+        # Nesil değişti: ilk kontrol yalnızca yeni satırları okur, sonrakiler veritabanına gitmez
+        revocation.is_revoked('ilk')
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation.is_revoked('gecerli'))
+        self.assertTrue(revocation.is_revoked('iptal-edilen'))
+
+    def test_purge_deletes_expired_days_in_bulk(self):
+        now = timezone.now()
+        for i, days in enumerate((-3, -3, -2, 1)):
+            RevokedToken.revoke(f'jti-{i}', now + timedelta(days=days))
+        # Gün listesi + gün başına tek DELETE
+        with self.assertNumQueries(3):
+            deleted = RevokedToken.purge_expired()
+        self.assertEqual(sorted(deleted.values()), [1, 2])
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['jti-3'])
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class BootstrapTests(TestCase):
+    def setUp(self):
+        get_snapshot_cache().clear()
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.create(
+            barcode_code='000001', barcode_name='Test', campaign_code='TEST2025', campaign=campaign
+        )
+        CampaignBarcodeStats.rebuild('TEST2025')
+        Campaign.get_active_campaign()
+        self.user = CustomUser.objects.create(phone_number='05551234567', password=make_password('Gizli.Sifre123'))
+        Child.objects.create(user=self.user, grade='1_sinif')
+        OpportunityProduct.objects.bulk_create([
+            OpportunityProduct(name=f'Ürün {i}', description='-', original_price=100, discounted_price=80)
+            for i in range(3)
+        ])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def bootstrap(self, versions=None):
+        response = self.client.get(reverse('users:bootstrap'), {'versions': versions} if versions else None)
+        self.assertEqual(response.status_code, 200)
+        return response.data['sections']
+
+    def test_sections_in_fixed_queries(self):
+        sections = self.bootstrap()
+        self.assertEqual(sections['barcode']['data']['barcode']['barcode_code'], '000001')
+
+        # Kullanıcı özetten: çocuklar, barkod, fırsatlar; gecikme için bkz. benchmark_bootstrap
+        with self.assertNumQueries(3):
+            sections = self.bootstrap()
+
+        self.assertEqual(sections['profile']['data']['phone_number'], '05551234567')
+        self.assertEqual([child['grade'] for child in sections['profile']['data']['children']], ['1_sinif'])
+        self.assertEqual(sections['children']['data'], sections['profile']['data']['children'])
+        self.assertEqual(sections['campaign']['data']['campaign_code'], 'TEST2025')
+        self.assertEqual(len(sections['opportunities']['data']['results']), 3)
+        self.assertFalse(sections['opportunities']['data']['has_more'])
+
+    def test_unchanged_sections_are_skipped(self):
+        sections = self.bootstrap()
+        versions = ','.join(f"{name}:{section['version']}" for name, section in sections.items())
+        sections = self.bootstrap(versions)
+        self.assertTrue(all(section.get('unchanged') for section in sections.values()))
+
+        Child.objects.create(user=self.user, grade='3_yas')
+        sections = self.bootstrap(versions)
+        self.assertIn('data', sections['children'])
+        self.assertIn('data', sections['profile'])
+        self.assertTrue(sections['barcode']['unchanged'])
+
+
+class ChildrenSyncTests(TestCase):
+    def setUp(self):
+        get_snapshot_cache().clear()
+        self.user = CustomUser.objects.create(
+            phone_number='05551234567', password=make_password('Gizli.Sifre123'), has_children=True, children_count=2
+        )
+        self.first = Child.objects.create(user=self.user, grade='1_sinif')
+        self.second = Child.objects.create(user=self.user, grade='3_yas')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        # Kimlik doğrulama özetini ısıt
+        self.client.get(reverse('users:get_children'))
+
+    def sync(self, children):
+        return self.client.patch(reverse('users:sync_children'), {'children': children}, format='json')
+
+    def test_unchanged_list_writes_nothing(self):
+        with self.assertNumQueries(2):  # kullanıcı + mevcut çocuklar
+            response = self.sync([{'grade': '3_yas'}, {'grade': '1_sinif'}])
+        self.assertEqual(response.data['changes'], {'created': 0, 'updated': 0, 'deleted': 0})
+
+        # Kullanıcı, çocuklar, tek UPDATE + test transaction'ı içindeki savepoint çifti; yanıt çocukları yeniden okumaz
+        with self.assertNumQueries(5):
+            response = self.client.put(
+                reverse('users:update_profile'), {'first_name': 'Ayşe', 'children': [{'grade': '1_sinif'}, {'grade': '3_yas'}]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_minimal_changes_keep_rows(self):
+        response = self.sync([{'id': self.first.id, 'grade': '2_sinif'}, {'grade': '5_yas'}, {'grade': '4_yas'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changes'], {'created': 1, 'updated': 2, 'deleted': 0})
+        self.assertEqual(response.data['children_count'], 3)
+
+        children = list(self.user.children.order_by('created_at', 'id'))
+        self.assertEqual([child.grade for child in children], ['2_sinif', '5_yas', '4_yas'])
+        # Mevcut satırlar yeniden oluşturulmadı
+        self.assertEqual([child.id for child in children[:2]], [self.first.id, self.second.id])
+        self.assertEqual(children[0].created_at, self.first.created_at)
+
+        response = self.sync([])
+        self.assertEqual(response.data['changes'], {'created': 0, 'updated': 0, 'deleted': 3})
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.children_count, self.user.has_children), (0, False))
+
+    def test_foreign_child_id_is_rejected(self):
+        other = CustomUser.objects.create(phone_number='05559876543')
+        foreign = Child.objects.create(user=other, grade='1_sinif')
+        self.assertEqual(self.sync([{'id': foreign.id, 'grade': '2_sinif'}]).status_code, 404)
+        self.assertEqual(self.sync([{'id': self.first.id, 'grade': '1_sinif'}] * 2).status_code, 400)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.grade, '1_sinif')
+
+
+@override_settings(BARCODE_POOL={'ENABLED': False}, ASYNC_BARCODE_ASSIGNMENT=False)
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        get_snapshot_cache().clear()
+        self.campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=self.campaign)
+            for i in range(3)
+        ])
+        CampaignBarcodeStats.rebuild('TEST2025')
+        Campaign.get_active_campaign()
+        self.users = [
+            CustomUser.objects.create(phone_number=f'0555123456{i}', password=make_password('Gizli.Sifre123'))
+            for i in range(2)
+        ]
+        for user in self.users:
+            Child.objects.create(user=user, grade='1_sinif')
+        self.client = APIClient()
+
+    def delete_account(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return self.client.delete(reverse('users:delete_account'))
+
+    def test_delete_returns_before_purge(self):
+        user = self.users[0]
+        self.assertEqual(self.delete_account(user).status_code, 200)
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+        self.assertIsNotNone(user.deleted_at)
+        self.assertTrue(Job.is_active(PURGE_USERS_JOB, str(user.pk)))
+        # Token artık geçersiz, telefon numarası yeni kayda açık
+        self.assertEqual(self.client.get(reverse('users:profile')).status_code, 401)
+        self.assertFalse(CustomUser.objects.filter(phone_number='05551234560').exists())
+
+    def test_purge_releases_barcodes_by_campaign_policy(self):
+        for user in self.users:
+            user.soft_delete()
+        barcodes = [user.user_barcode.campaign_barcode for user in self.users]
+
+        # Parti büyüklüğünden bağımsız sabit sayıda ifade (bekleyen devir atamaları dahil)
+        with self.assertNumQueries(20):
+            self.assertEqual(CustomUser.purge_deleted([user.pk for user in self.users]), 2)
+
+        self.assertFalse(CustomUser.objects.filter(pk__in=[user.pk for user in self.users]).exists())
+        self.assertFalse(Child.objects.exists())
+        for barcode in barcodes:
+            barcode.refresh_from_db()
+            self.assertFalse(barcode.is_assigned)
+            self.assertTrue(barcode.is_active)
+        history = UserBarcodeHistory.objects.filter(reason=UserBarcodeHistory.REASON_ACCOUNT_DELETED)
+        self.assertEqual(sorted(history.values_list('barcode_code', flat=True)), sorted(b.barcode_code for b in barcodes))
+        self.assertTrue(all(row.user_id is None for row in history))
+        stats = CampaignBarcodeStats.for_campaign('TEST2025')
+        self.assertEqual((stats.assigned, stats.available), (0, 3))
+
+    def test_retire_policy_and_rollover_skip_deleted(self):
+        self.campaign.released_barcode_policy = Campaign.RELEASED_BARCODE_RETIRE
+        self.campaign.save()
+        user = self.users[0]
+        user.soft_delete()
+        barcode = user.user_barcode.campaign_barcode
+        self.assertEqual(UserBarcode.rollover_chunk('TEST2025')[0], 0)
+
+        CustomUser.purge_deleted([user.pk])
+        barcode.refresh_from_db()
+        self.assertEqual((barcode.is_assigned, barcode.is_active), (False, False))
+        self.assertEqual(CampaignBarcodeStats.rebuild('TEST2025', dry_run=True), {})
+
+
+class PhoneE164Tests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('0555 123 45 67', password='Gizli.Sifre123')
+        self.client = APIClient()
+
+    def test_every_spelling_resolves_to_one_account(self):
+        self.assertEqual(self.user.phone_e164, '+905551234567')
+        for phone in ('05551234567', '+905551234567', '905551234567', '(555) 123-45-67'):
+            with self.assertNumQueries(1):
+                self.assertEqual(CustomUser.objects.get_by_natural_key(phone), self.user)
+        self.assertFalse(CustomUser.objects.by_phone('12345').exists())
+
+        response = self.client.post(
+            reverse('users:login'), {'phone_number': '+90 555 123 4567', 'password': 'Gizli.Sifre123'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_spelling_is_rejected_at_registration(self):
+        response = self.client.post(reverse('users:register'), {
+            'phone_number': '+905551234567', 'password': 'Gizli.Sifre123', 'password_confirm': 'Gizli.Sifre123',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('phone_number', response.data['errors'])
+
+    def test_phone_change_and_soft_delete_keep_column_in_sync(self):
+        self.user.phone_number = '05559876543'
+        self.user.save(update_fields=['phone_number'])
+        self.assertEqual(CustomUser.objects.by_phone('5559876543').get(), self.user)
+
+        self.user.soft_delete()
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.phone_e164)
+        self.assertFalse(CustomUser.objects.by_phone('05559876543').exists())
+
+    def test_backfill_duplicates_are_closed(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025', campaign_name='Test', start_date=timezone.now() - timedelta(days=1)
+        )
+        barcode = CampaignBarcode.objects.create(
+            barcode_code='000001', barcode_name='Test', campaign_code='TEST2025', campaign=campaign, is_assigned=True
+        )
+        CampaignBarcodeStats.rebuild('TEST2025')
+        # 0005 sonrası durum: aynı numaranın başka yazımı, phone_e164 boş
+        duplicate = CustomUser.objects.bulk_create([CustomUser(phone_number='+905551234567', phone_e164=None)])[0]
+        UserBarcode.objects.create(user=duplicate, campaign_barcode=barcode)
+
+        migration = importlib.import_module('users.migrations.0007_close_duplicate_phone_accounts')
+        with redirect_stdout(StringIO()) as out:
+            migration.close_duplicate_accounts(django_apps, None)
+        self.assertIn(f'{duplicate.pk}: +905551234567', out.getvalue())
+
+        duplicate.refresh_from_db()
+        self.assertEqual(duplicate.phone_number, f'~{duplicate.pk}')
+        self.assertFalse(duplicate.is_active)
+        self.assertFalse(UserBarcode.objects.filter(user=duplicate).exists())
+        stats = CampaignBarcodeStats.for_campaign('TEST2025')
+        self.assertEqual((stats.assigned, stats.available), (0, 1))
+        # Tam save() artık benzersizlik kısıtına takılmaz
+        duplicate.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+    def test_clean_rejects_other_spelling_of_taken_number(self):
+        other = CustomUser.objects.create_user('05559876543', password='Gizli.Sifre123')
+        other.phone_number = '+905551234567'
+        with self.assertRaises(ValidationError) as context:
+            other.clean()
+        self.assertIn('phone_number', context.exception.message_dict)
+
+
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        campaign = Campaign.objects.create(
+            campaign_code='TEST2025',
+            campaign_name='Test Kampanyası',
+            start_date=timezone.now() - timedelta(days=1),
+        )
+        CampaignBarcode.objects.bulk_create([
+            CampaignBarcode(barcode_code=f'{i:06d}', barcode_name='Test', campaign_code='TEST2025', campaign=campaign)
+            for i in range(3)
+        ])
+        CampaignBarcodeStats.rebuild('TEST2025')
+        Campaign.get_active_campaign()
+        self.existing = CustomUser.objects.create_user('05559998877', password='Gizli.Sifre123')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            file.write(
+                'phone_number,first_name,last_name,password_hash,children\n'
+                f'0555 111 22 33,Ayşe,Yılmaz,{make_password("Eski.Sifre123")},1_sinif;3_yas\n'
+                '+905551112233,Tekrar,,,\n'
+                '+90 555 999 88 77,Mevcut,,,\n'
+                '12345,Bozuk,,,\n'
+                '05552223344,Mehmet,"Kaya, Jr",,\n'
+            )
+        self.path = file.name
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_skips_signals_and_assigns_barcodes_per_chunk(self):
+        call_command('import_users', file=self.path, chunk_size=1, stdout=StringIO())
+
+        imported = CustomUser.objects.filter(phone_e164__in=['+905551112233', '+905552223344']).order_by('id')
+        self.assertEqual([user.last_name for user in imported], ['Yılmaz', 'Kaya, Jr'])
+        ayse, mehmet = imported
+        self.assertTrue(ayse.check_password('Eski.Sifre123'))
+        self.assertFalse(mehmet.has_usable_password())
+        self.assertEqual((ayse.children_count, sorted(ayse.children.values_list('grade', flat=True))), (2, ['1_sinif', '3_yas']))
+        # Barkodlar her parçada yalnızca o parçanın kullanıcılarına atanır; kuyrukta işi olan kayıtlara dokunulmaz
+        self.assertEqual(set(UserBarcode.objects.values_list('user_id', flat=True)), {ayse.pk, mehmet.pk})
+        stats = CampaignBarcodeStats.for_campaign('TEST2025')
+        self.assertEqual((stats.assigned, stats.available), (2, 1))
+
+        # Tekrar çalıştırmak yeni kullanıcı eklemez
+        call_command('import_users', file=self.path, stdout=StringIO())
+        self.assertEqual(CustomUser.objects.count(), 3)
+
+
+@override_settings(SMS_GATEWAY={'BACKEND': 'users.sms.LocMemBackend'})
+class PhoneVerificationTests(TestCase):
+    def setUp(self):
+        sms.outbox.clear()
+        get_snapshot_cache().clear()
+        self.user = CustomUser.objects.create_user('05551234567', password='Gizli.Sifre123')
+        self.client = APIClient()
+
+    def request_code(self):
+        return self.client.post(reverse('users:request_verification_code'), {'phone_number': '0555 123 45 67'}, format='json')
+
+    def verify(self, code):
+        return self.client.post(
+            reverse('users:verify_phone'), {'phone_number': '+905551234567', 'verification_code': code}, format='json'
+        )
+
+    def send_queued(self):
+        jobs = Job.claim_batch(SEND_VERIFICATION_SMS_JOB, 10, 'test')
+        self.assertEqual(send_verification_sms(jobs), {})
+        Job.complete(jobs, {})
+        return sms.outbox[-1][1].split(': ')[1][:6]
+
+    def test_code_is_queued_sent_in_batch_and_single_use(self):
+        self.assertEqual(self.request_code().status_code, 202)
+        # İstek SMS'i beklemez; kod worker'da üretilir
+        self.assertEqual(sms.outbox, [])
+        response = self.request_code()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+        code = self.send_queued()
+        self.assertEqual(sms.outbox[0][0], '+905551234567')
+        self.assertNotIn(code, PhoneVerification.objects.get().code_hash)
+
+        # Kullanıcı, kilitli kod satırı + tek kullanımlık yazım (savepoint çiftiyle), yalnızca is_phone_verified UPDATE'i
+        with self.assertNumQueries(6):
+            response = self.verify(code)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_phone_verified)
+        self.assertEqual(self.verify(code).status_code, 400)
+
+    @override_settings(PHONE_VERIFICATION={'MAX_ATTEMPTS': 2})
+    def test_wrong_codes_lock_the_code(self):
+        self.request_code()
+        code = self.send_queued()
+        wrong = f'{(int(code) + 1) % 1000000:06d}'
+        self.assertEqual(self.verify(wrong).status_code, 400)
+        self.assertEqual(self.verify(wrong).status_code, 400)
+        self.assertEqual(self.verify(code).status_code, 429)
+        self.assertFalse(CustomUser.objects.get(pk=self.user.pk).is_phone_verified)
+
+    @override_settings(DEBUG=False, SMS_GATEWAY={'BACKEND': 'users.sms.ConsoleBackend'})
+    def test_plaintext_backends_refused_outside_debug(self):
+        self.request_code()
+        jobs = Job.claim_batch(SEND_VERIFICATION_SMS_JOB, 10, 'test')
+        with self.assertRaises(ImproperlyConfigured):
+            send_verification_sms(jobs)
+        # Kod üretilmeden durur
+        self.assertEqual(PhoneVerification.objects.get().code_hash, '')
@@ -1,18 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'users'
 
+# ASGI altında şifre hash'leme olay döngüsünü bloklamasın
+auth_views = async_views if getattr(settings, 'ASYNC_AUTH_VIEWS', False) else views
+
 urlpatterns = [
-    path('register/', views.register, name='register'),
-    path('login/', views.login, name='login'),
+    path('register/', auth_views.register, name='register'),
+    path('login/', auth_views.login, name='login'),
     path('verify/', views.verify_phone, name='verify_phone'),
+    path('verify/send/', views.request_verification_code, name='request_verification_code'),
     path('profile/', views.profile, name='profile'),
     path('profile/update/', views.update_profile, name='update_profile'),
     path('profile/delete/', views.delete_account, name='delete_account'),
+    path('bootstrap/', views.bootstrap, name='bootstrap'),
     
     # Çocuk bilgileri endpoint'leri
     path('children/', views.get_children, name='get_children'),
+    path('children/sync/', views.sync_children, name='sync_children'),
     path('children/add/', views.add_child, name='add_child'),
     path('children/<int:child_id>/update/', views.update_child, name='update_child'),
     path('children/<int:child_id>/delete/', views.delete_child, name='delete_child'),
@@ -0,0 +1,42 @@
+"""Telefon doğrulama kodları (OTP) için ayarlar ve yardımcılar.
+
+Kodun kendisi hiçbir yerde saklanmaz: worker kodu üretir, SMS'e koyar ve
+PhoneVerification'a yalnızca SECRET_KEY ile anahtarlanmış HMAC'ini yazar.
+İstek tarafı yalnızca gönderim sınırlarını kontrol edip işi kuyruğa alır;
+SMS sağlayıcısının gecikmesi isteği bekletmez.
+"""
+import secrets
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+DEFAULTS = {
+    'TTL_SECONDS': 300,
+    'MAX_ATTEMPTS': 5,
+    'RESEND_SECONDS': 60,
+    'MAX_SENDS_PER_WINDOW': 5,
+    'WINDOW_SECONDS': 3600,
+}
+
+CODE_LENGTH = 6
+MESSAGE = 'Şafak doğrulama kodunuz: {code}. Kod {minutes} dakika geçerlidir.'
+
+
+def verification_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'PHONE_VERIFICATION', {})}[name]
+
+
+def generate_code():
+    return f'{secrets.randbelow(10 ** CODE_LENGTH):0{CODE_LENGTH}d}'
+
+
+def hash_code(phone_e164, code):
+    return salted_hmac('users.verification', f'{phone_e164}:{code}', algorithm='sha256').hexdigest()
+
+
+def code_matches(code_hash, phone_e164, code):
+    return bool(code_hash) and constant_time_compare(code_hash, hash_code(phone_e164, code))
+
+
+def message_for(code):
+    return MESSAGE.format(code=code, minutes=verification_setting('TTL_SECONDS') // 60)
@@ -1,5 +1,5 @@
 import logging
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
@@ -7,9 +7,12 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
-    UserUpdateSerializer, PhoneVerificationSerializer, ChildUpdateSerializer, ChildSerializer
+    UserUpdateSerializer, PhoneCodeRequestSerializer, PhoneVerificationSerializer, ChildUpdateSerializer,
+    ChildSerializer, ChildrenSyncSerializer
 )
-from .models import CustomUser, Child
+from .bootstrap import build_sections, parse_versions
+from .last_login import get_last_login_buffer
+from .models import CustomUser, Child, PhoneVerification
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +24,15 @@ def register(request):
     serializer = UserRegistrationSerializer(data=request.data)
     if serializer.is_valid():
         logger.info("✅ Register validasyonu başarılı")
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except serializers.ValidationError as e:
+            # Telefon numarası INSERT sırasında benzersizlik kısıtına takıldı
+            logger.error(f"❌ Register validasyonu başarısız: {e.detail}")
+            return Response({
+                'message': 'Kayıt işlemi başarısız.',
+                'errors': e.detail
+            }, status=status.HTTP_400_BAD_REQUEST)
         logger.info(f"✅ Kullanıcı oluşturuldu: {user.phone_number}")
         
         # JWT token oluştur
@@ -29,7 +40,7 @@ def register(request):
         
         return Response({
             'message': 'Kullanıcı başarıyla oluşturuldu.',
-            'user': UserProfileSerializer(user).data,
+            'user': UserProfileSerializer(user, context={'children': serializer.saved_children}).data,
             'tokens': {
                 'access': str(refresh.access_token),
                 'refresh': str(refresh),
@@ -57,6 +68,7 @@ def login(request):
         
         if user:
             logger.info(f"✅ Login başarılı: {user.phone_number}")
+            get_last_login_buffer().record(user.pk)
             refresh = RefreshToken.for_user(user)
             return Response({
                 'message': 'Giriş başarılı.',
@@ -78,34 +90,76 @@ def login(request):
         'errors': serializer.errors
     }, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def request_verification_code(request):
+    """Doğrulama kodunu kuyruğa al; SMS worker tarafından gönderilir, istek sağlayıcıyı beklemez"""
+    serializer = PhoneCodeRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'message': 'Kod isteği başarısız.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    phone_e164 = serializer.validated_data['phone_number']
+    is_verified = CustomUser.objects.filter(phone_e164=phone_e164).values_list('is_phone_verified', flat=True).first()
+    if is_verified is None:
+        return Response({
+            'message': 'Kullanıcı bulunamadı.'
+        }, status=status.HTTP_404_NOT_FOUND)
+    if is_verified:
+        return Response({
+            'message': 'Telefon numarası zaten doğrulanmış.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    retry_after = PhoneVerification.request_code(phone_e164)
+    if retry_after:
+        response = Response({
+            'message': 'Çok sık kod istendi, lütfen biraz sonra tekrar deneyin.',
+            'retry_after': retry_after
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    logger.info(f"📨 Doğrulama kodu kuyruğa alındı: {phone_e164}")
+    return Response({
+        'message': 'Doğrulama kodu gönderiliyor.'
+    }, status=status.HTTP_202_ACCEPTED)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def verify_phone(request):
     serializer = PhoneVerificationSerializer(data=request.data)
     if serializer.is_valid():
-        phone_number = serializer.validated_data['phone_number']
+        phone_e164 = serializer.validated_data['phone_number']
         verification_code = serializer.validated_data['verification_code']
         
         try:
-            user = CustomUser.objects.get(phone_number=phone_number)
-            
-            # Simülasyon için basit doğrulama
-            if verification_code == "123456":
-                user.is_phone_verified = True
-                user.save()
-                
-                return Response({
-                    'message': 'Telefon numarası başarıyla doğrulandı.'
-                }, status=status.HTTP_200_OK)
-            else:
-                return Response({
-                    'message': 'Geçersiz doğrulama kodu.'
-                }, status=status.HTTP_400_BAD_REQUEST)
-                
+            user = CustomUser.objects.get(phone_e164=phone_e164)
         except CustomUser.DoesNotExist:
             return Response({
                 'message': 'Kullanıcı bulunamadı.'
             }, status=status.HTTP_404_NOT_FOUND)
+
+        result = PhoneVerification.check_code(phone_e164, verification_code)
+        if result == PhoneVerification.RESULT_VERIFIED:
+            user.is_phone_verified = True
+            # Yalnızca bu sütun yazılır; kullanıcı özeti post_save sinyaliyle düşer
+            user.save(update_fields=['is_phone_verified'])
+            return Response({
+                'message': 'Telefon numarası başarıyla doğrulandı.'
+            }, status=status.HTTP_200_OK)
+        if result == PhoneVerification.RESULT_LOCKED:
+            return Response({
+                'message': 'Çok fazla hatalı deneme, lütfen yeni kod isteyin.'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        if result == PhoneVerification.RESULT_EXPIRED:
+            return Response({
+                'message': 'Doğrulama kodunun süresi doldu, lütfen yeni kod isteyin.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'Geçersiz doğrulama kodu.'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     return Response({
         'message': 'Doğrulama işlemi başarısız.',
@@ -126,7 +180,7 @@ def update_profile(request):
         serializer.save()
         return Response({
             'message': 'Profil başarıyla güncellendi.',
-            'user': UserProfileSerializer(request.user).data
+            'user': UserProfileSerializer(request.user, context={'children': serializer.saved_children}).data
         }, status=status.HTTP_200_OK)
     
     return Response({
@@ -137,8 +191,8 @@ def update_profile(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_account(request):
-    user = request.user
-    user.delete()
+    # Hesap hemen pasifleşir; kullanıcı, çocuklar ve barkod arka planda toplu silinir (purge_users işi)
+    request.user.soft_delete()
     return Response({
         'message': 'Hesap başarıyla silindi.'
     }, status=status.HTTP_200_OK)
@@ -147,10 +201,37 @@ def delete_account(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_children(request):
-    children = request.user.children.all()
+    # request.user.children kullanıcıyı yükler; yalnızca id yeterli
+    children = Child.objects.filter(user_id=request.user.pk)
     serializer = ChildSerializer(children, many=True)
     return Response(serializer.data)
 
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+def sync_children(request):
+    """Çocuk listesini tek istekte eşitle; yalnızca değişen satırlar yazılır"""
+    serializer = ChildrenSyncSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'message': 'Çocuk bilgileri güncellenirken hata oluştu.',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    user = request.user
+    try:
+        children, changes = user.sync_children(serializer.validated_data['children'])
+    except Child.DoesNotExist:
+        return Response({
+            'message': 'Çocuk bulunamadı.'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'message': 'Çocuk bilgileri başarıyla güncellendi.',
+        'children': ChildSerializer(user.children.all() if children is None else children, many=True).data,
+        'children_count': user.children_count,
+        'changes': changes
+    }, status=status.HTTP_200_OK)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_child(request):
@@ -203,3 +284,13 @@ def delete_child(request, child_id):
         return Response({
             'message': 'Çocuk bulunamadı.'
         }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap(request):
+    """Uygulama açılışındaki profil, çocuk, barkod, kampanya ve fırsat çağrılarını tek yanıtta topla"""
+    sections = build_sections(request, parse_versions(request.query_params.get('versions')))
+    return Response({
+        'success': True,
+        'sections': sections
+    }, status=status.HTTP_200_OK)
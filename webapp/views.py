@@ -10,6 +10,7 @@ import json
 
 from users.models import CustomUser, Child
 from users.serializers import UserRegistrationSerializer
+from rest_framework import serializers
 from opportunities.models import OpportunityProduct
 from barcodes.models import UserBarcode, Campaign
 
@@ -22,17 +23,14 @@ def home_view(request):
     # Kullanıcının barkodunu al
     user_barcode = None
     try:
-        user_barcode = UserBarcode.objects.select_related('campaign_barcode').get(user=request.user)
+        user_barcode = UserBarcode.objects.select_related('campaign_barcode__campaign').get(user=request.user)
     except UserBarcode.DoesNotExist:
-        # Barkod yoksa otomatik ata
-        user_barcode = UserBarcode.assign_barcode_to_user(request.user)
+        # Barkod yoksa otomatik ata (kuyrukta bekleyen atama yoksa)
+        if not UserBarcode.has_pending_assignment(request.user):
+            user_barcode = UserBarcode.assign_barcode_to_user(request.user)
     
-    # Aktif kampanya bilgisi
-    active_campaign = None
-    try:
-        active_campaign = Campaign.objects.filter(is_active=True).first()
-    except Campaign.DoesNotExist:
-        pass
+    # Aktif kampanya bilgisi (süreç içi önbellekten)
+    active_campaign = Campaign.get_active_campaign()
     
     context = {
         'user': request.user,
@@ -103,7 +101,12 @@ def register_view(request):
                 for field, errors in serializer.errors.items():
                     for error in errors:
                         messages.error(request, f'{field}: {error}')
-                        
+
+        except serializers.ValidationError as e:
+            # Telefon numarası INSERT sırasında benzersizlik kısıtına takıldı
+            for field, errors in e.detail.items():
+                for error in errors:
+                    messages.error(request, f'{field}: {error}')
         except Exception as e:
             messages.error(request, f'Kayıt sırasında hata oluştu: {str(e)}')
     